@@ -326,7 +326,7 @@
                       (cons
                         ifn
                         (cons (clojure.lang.symbol/Symbol
-                                (.concat (.getName name) "__inliner"))
+                                (py.bytecode/BINARY_ADD (.getName name) "__inliner"))
                               (next inline))))
                     m))
               m (conj (py/if (meta name) (meta name) {}) m)]
@@ -363,10 +363,10 @@
   {:added "1.0"}
   ([] {})
   ([& keyvals]
-    (let [coll {}]
+    (let [coll (.asTransient {})]
       (loop [keyvals (seq keyvals) coll coll]
         (py/if (nil? keyvals)
-          coll
+          (.persistent coll)
           (do
             (py/if (py.bytecode/COMPARE_OP "==" (py/len keyvals) 1)
               (throw (py/Exception "Even number of args required to hash-map")))
@@ -702,7 +702,8 @@
   "Returns a number one greater than num. Does not auto-promote longs, will
   throw on overflow. See also: inc'"
   {:added "1.2"
-   :static true}
+   :static true
+   :inline (fn [x] (list 'py.bytecode/BINARY_ADD x 1))}
   [x] (py.bytecode/BINARY_ADD x 1))
 
 (defmacro lazy-seq
@@ -757,6 +758,11 @@
           (if (py.bytecode/COMPARE_OP "==" (first s) (first o))
             (recur (next s) (next o))
             false)))))
+  (__hash__ [self]
+    (let [s (seq self)]
+      (py/if (nil? s)
+        1
+        (py/hash s))))
   (__iter__ [self]
     (loop [s (seq self)]
       (when s
@@ -837,38 +843,9 @@
     Seqable
     generic-interator-fn)
 
-(definterface IChunkedSeq []
-  clojure.lang.sequential/Sequential
-  clojure.lang.iseq/ISeq
-  (chunkedFirst [self] nil)
-  (chunkedNext [self] nil)
-  (chunkedMore [self] nil))
-
-(deftype ArrayChunk [array off end]
-  (__getitem__
-    ([self i]
-      (py.bytecode/BINARY_SUBSCR array (py.bytecode/BINARY_ADD off i)))
-    ([self i not-found]
-      (if (py.bytecode/COMPARE_OP ">=" i 0)
-        (if (py.bytecode/COMPARE_OP "<" i (py/len self))
-          (py.bytecode/BINARY_SUBSCR array i)
-          not-found)
-        not-found)))
-  (__len__ [self]
-    (py.bytecode/BINARY_SUBTRACT end off))
-  (nth [self & args]
-    (apply (.-__getitem__ self) args))
-  (dropFirst [self]
-    (if (= off end)
-      (throw (IllegalStateException "dropFirst of empty chunk")))
-    (ArrayChunk array (inc off) end))
-  (reduce [self f start]
-    (loop [ret (f start (py.bytecode/BINARY_SUBSCR array off))
-         x (inc off)]
-       (if (py.bytecode/COMPARE_OP "<" x end)
-       (recur (f ret (py.bytecode/BINARY_SUBSCR array x))
-        (inc x))
-       ret))))
+(def IChunkedSeq clojure.lang.ichunkedseq/IChunkedSeq)
+
+(def ArrayChunk clojure.lang.arraychunk/ArrayChunk)
 
 (deftype ChunkBuffer [buffer end]
   (add [self o]
@@ -910,6 +887,9 @@
       '()
       _more)))
 
+;; else the ISeq protocol fns would dispatch to the methods of ASeq
+(clojure.lang.protocol/extendForAllSubclasses clojure.lang.iseq/ISeq)
+
 (defn chunk-buffer [capacity]
   (ChunkBuffer (py.bytecode/BINARY_MULTIPLY (py/list [nil]) capacity) 0))
 
@@ -1024,10 +1004,22 @@
 (defn >1? [n] (py.bytecode/COMPARE_OP ">" n 1))
 (defn >0? [n] (py.bytecode/COMPARE_OP ">" n 0))
 
+(defn- nary-inline
+  "Returns an :inline fn expanding calls with 2 or more args to the binary
+  bytecode op, applied left to right."
+  [op]
+  (fn
+    ([x y] (list op x y))
+    ([x y & more]
+     (reduce1 (fn [expr z] (list op expr z)) (list op x y) more))))
+
 (defn +
   "Returns the sum of nums. (+) returns 0. Does not auto-promote longs, will
   throw on overflow. See also: +'"
-  {:added "1.2"}
+  {:added "1.2"
+   :static true
+   :inline (nary-inline 'py.bytecode/BINARY_ADD)
+   :inline-arities >1?}
   ([] 0)
   ([x] x)
   ([x y] (py.bytecode/BINARY_ADD x y))
@@ -1037,7 +1029,10 @@
 (defn *
   "Returns the product of nums. (*) returns 1. Does not auto-promote longs,
   will throw on overflow. See also: *'"
-  {:added "1.2"}
+  {:added "1.2"
+   :static true
+   :inline (nary-inline 'py.bytecode/BINARY_MULTIPLY)
+   :inline-arities >1?}
   ([] 1)
   ([x] x)
   ([x y] (py.bytecode/BINARY_MULTIPLY x y))
@@ -1047,7 +1042,13 @@
 (defn /
   "If no denominators are supplied, returns 1/numerator, else returns numerator
   divided by all of the denominators."
-  {:added "1.0"}
+  {:added "1.0"
+   :static true
+   :inline (fn
+             ([x] `(py.bytecode/BINARY_DIVIDE 1 ~x))
+             ([x & more] (apply (nary-inline 'py.bytecode/BINARY_DIVIDE)
+                                x more)))
+   :inline-arities >0?}
   ([x] (/ 1 x))
   ([x y] (py.bytecode/BINARY_DIVIDE x y))
   ([x y & more]
@@ -1057,7 +1058,13 @@
   "If no ys are supplied, returns the negation of x, else subtracts the ys from
   x and returns the result. Does not auto-promote longs, will throw on
   overflow. See also: -'"
-  {:added "1.2"}
+  {:added "1.2"
+   :static true
+   :inline (fn
+             ([x] `(py.bytecode/UNARY_NEGATIVE ~x))
+             ([x & more] (apply (nary-inline 'py.bytecode/BINARY_SUBTRACT)
+                                x more)))
+   :inline-arities >0?}
   ([x] (py.bytecode/UNARY_NEGATIVE x))
   ([x y] (py.bytecode/BINARY_SUBTRACT x y))
   ([x y & more]
@@ -1067,7 +1074,9 @@
   "Returns non-nil if nums are in monotonically increasing order, otherwise
   false."
   {:added "1.0"
-   :static true}
+   :static true
+   :inline (fn [x y] `(py.bytecode/COMPARE_OP "<" ~x ~y))
+   :inline-arities #{2}}
   ([x] true)
   ([x y] (py.bytecode/COMPARE_OP "<" x y))
   ([x y & more]
@@ -1080,7 +1089,10 @@
 (defn <=
   "Returns non-nil if nums are in monotonically non-decreasing order, otherwise
   false."
-  {:added "1.0"}
+  {:added "1.0"
+   :static true
+   :inline (fn [x y] `(py.bytecode/COMPARE_OP "<=" ~x ~y))
+   :inline-arities #{2}}
   ([x] true)
   ([x y] (py.bytecode/COMPARE_OP "<=" x y))
   ([x y & more]
@@ -1093,7 +1105,10 @@
 (defn >
   "Returns non-nil if nums are in monotonically decreasing order, otherwise
   false."
-  {:added "1.0"}
+  {:added "1.0"
+   :static true
+   :inline (fn [x y] `(py.bytecode/COMPARE_OP ">" ~x ~y))
+   :inline-arities #{2}}
   ([x] true)
   ([x y] (py.bytecode/COMPARE_OP ">" x y))
   ([x y & more]
@@ -1106,7 +1121,10 @@
 (defn >=
   "Returns non-nil if nums are in monotonically non-increasing order, otherwise
   false."
-  {:added "1.0"}
+  {:added "1.0"
+   :static true
+   :inline (fn [x y] `(py.bytecode/COMPARE_OP ">=" ~x ~y))
+   :inline-arities #{2}}
   ([x] true)
   ([x y] (py.bytecode/COMPARE_OP ">=" x y))
   ([x y & more]
@@ -1119,7 +1137,10 @@
 (defn ==
   "Returns non-nil if nums all have the equivalent value (type-independent),
   otherwise false"
-  {:added "1.0"}
+  {:added "1.0"
+   :static true
+   :inline (fn [x y] `(py.bytecode/COMPARE_OP "==" ~x ~y))
+   :inline-arities #{2}}
   ([x] true)
   ([x y] (py.bytecode/COMPARE_OP "==" x y))
   ([x y & more]
@@ -1132,7 +1153,9 @@
 (defn dec
   "Returns a number one less than num. Does not auto-promote longs, will throw
   on overflow. See also: dec'"
-  {:added "1.2"}
+  {:added "1.2"
+   :static true
+   :inline (fn [x] (list 'py.bytecode/BINARY_SUBTRACT x 1))}
   [x] (py.bytecode/BINARY_SUBTRACT x 1))
 
 (defn max
@@ -1393,6 +1416,76 @@
          (recur ret (first ks) (next ks))
          ret)))))
 
+(defn transient
+  "Returns a new, transient version of the collection, in constant time."
+  {:added "1.1"
+   :static true}
+  [coll]
+  (.asTransient coll))
+
+(defn persistent!
+  "Returns a new, persistent version of the transient collection, in
+  constant time. The transient collection cannot be used after this
+  call, any such use will throw an exception."
+  {:added "1.1"
+   :static true}
+  [coll]
+  (.persistent coll))
+
+(defn conj!
+  "Adds x to the transient collection, and return coll. The 'addition'
+  may happen at different 'places' depending on the concrete type."
+  {:added "1.1"
+   :static true}
+  [coll x]
+  (.conj coll x))
+
+(defn assoc!
+  "When applied to a transient map, adds mapping of key(s) to
+  val(s). When applied to a transient vector, sets the val at index.
+  Note - index must be <= (count vector). Returns coll."
+  {:added "1.1"
+   :static true}
+  ([coll key val] (.assoc coll key val))
+  ([coll key val & kvs]
+   (let [ret (.assoc coll key val)]
+     (if kvs
+       (recur ret (first kvs) (second kvs) (nnext kvs))
+       ret))))
+
+(defn dissoc!
+  "Returns a transient map that doesn't contain a mapping for key(s)."
+  {:added "1.1"
+   :static true}
+  ([map key] (.without map key))
+  ([map key & ks]
+   (let [ret (.without map key)]
+     (if ks
+       (recur ret (first ks) (next ks))
+       ret))))
+
+(defn pop!
+  "Removes the last item from a transient vector. If
+  the collection is empty, throws an exception. Returns coll"
+  {:added "1.1"
+   :static true}
+  [coll]
+  (.pop coll))
+
+(defn disj!
+  "disj[oin]. Returns a transient set of the same (hashed/sorted) type, that
+  does not contain key(s)."
+  {:added "1.1"
+   :static true}
+  ([set] set)
+  ([set key]
+   (.disjoin set key))
+  ([set key & ks]
+   (let [ret (.disjoin set key)]
+     (if ks
+       (recur ret (first ks) (next ks))
+       ret))))
+
 (defn find
   "Returns the map entry for key, or nil if key not present."
   {:added "1.0"}
@@ -1908,7 +2001,11 @@
   {:added "1.0"}
   [& maps]
   (when (some identity maps)
-    (reduce1 #(conj (or %1 {}) %2) maps)))
+    (let [to (or (first maps) {})]
+      (if (instance? clojure.lang.ieditablecollection/IEditableCollection to)
+        (with-meta (persistent! (reduce1 conj! (transient to) (rest maps)))
+                   (meta to))
+        (reduce1 conj to (rest maps))))))
 
 (defn merge-with
   "Returns a map that consists of the rest of the maps conj-ed onto the first.
@@ -1931,14 +2028,14 @@
   "Returns a map with the keys mapped to the corresponding vals."
   {:added "1.0"}
   [keys vals]
-    (loop [map {}
+    (loop [map (transient {})
            ks (seq keys)
            vs (seq vals)]
       (if (and ks vs)
-        (recur (assoc map (first ks) (first vs))
+        (recur (assoc! map (first ks) (first vs))
                (next ks)
                (next vs))
-        map)))
+        (persistent! map))))
 
 (defn line-seq
   "Returns the lines of text from rdr as a lazy sequence of strings. rdr must
@@ -2902,7 +2999,12 @@
           (py/print (str "py/import " lib)))
         (try
           (py/__import__ (name lib))
-          (catch NoNamespaceException e nil)))))
+          (catch NoNamespaceException e nil))))
+  ; the cache of the file being compiled depends on the libs it requires
+  (let [comp-var (.-currentCompiler (.-globals clojure/lang))]
+    (when-let [writer (and (.isBound comp-var)
+                           (.-cacheWriter (.deref comp-var)))]
+      (.require writer (name lib)))))
 
 (defn- load-lib
   "Loads a lib with options."
@@ -3101,7 +3203,7 @@
   "readable, no newline"
   ([] nil)
   ([x]
-     (clojure.protocols/writeAsReplString x *out*))
+     (.write *out* (clojure.lang.rt/prStr x)))
   ([x & more]
      (pr x)
      (.write *out* " ")
@@ -3119,7 +3221,7 @@
 (defn print-pr
   ([] nil)
   ([x]
-     (clojure.protocols/writeAsString x *out*))
+     (.write *out* (clojure.lang.rt/printStr x)))
   ([x & more]
      (print-pr x)
      (.write *out* " ")
@@ -3153,6 +3255,30 @@
   [& more]
   (apply print-prn more))
 
+(defn pr-str
+  "pr to a string, returning it"
+  {:added "1.0"}
+  [& xs]
+  (apply clojure.lang.rt/prStr xs))
+
+(defn prn-str
+  "prn to a string, returning it"
+  {:added "1.0"}
+  [& xs]
+  (str (apply clojure.lang.rt/prStr xs) "\n"))
+
+(defn print-str
+  "print to a string, returning it"
+  {:added "1.0"}
+  [& xs]
+  (apply clojure.lang.rt/printStr xs))
+
+(defn println-str
+  "println to a string, returning it"
+  {:added "1.0"}
+  [& xs]
+  (str (apply clojure.lang.rt/printStr xs) "\n"))
+
 ;;; interactivity
 (require 'clojure.lang.lispreader)
 (defn read-string
@@ -3166,6 +3292,18 @@
    :static true}
   [form] (clojure.lang.compiler/evalForm form *ns*))
 
+(defmacro definline
+  "Experimental - like defmacro, except defines a named function whose
+  body is the expansion, calls to which may be expanded inline as if
+  it were a macro. Cannot be used with variadic (&) args."
+  {:added "1.0"}
+  [name & decl]
+  (let [[pre-args [args expr]] (split-with (comp not vector?) decl)]
+    `(defn ~(vary-meta name assoc :inline (list `fn args expr))
+       ~@pre-args
+       ~args
+       ~(apply (eval (list `fn args expr)) args))))
+
 (defmacro doc
   [itm]
   `(let [itm# (clojure.core/var ~itm)]
@@ -3886,7 +4024,51 @@ Returns val."
   {:added "1.0"
    :static true}
   [to from]
-  (reduce conj to from))
+  (if (instance? clojure.lang.ieditablecollection/IEditableCollection to)
+    (with-meta (persistent! (reduce conj! (transient to) from)) (meta to))
+    (reduce conj to from)))
+
+(defn mapv
+  "Returns a vector consisting of the result of applying f to the
+  set of first items of each coll, followed by applying f to the set
+  of second items in each coll, until any one of the colls is
+  exhausted.  Any remaining items in other colls are ignored. Function
+  f should accept number-of-colls arguments."
+  {:added "1.4"
+   :static true}
+  ([f coll]
+   (persistent! (reduce (fn [v o] (conj! v (f o))) (transient []) coll)))
+  ([f c1 c2]
+   (into [] (map f c1 c2)))
+  ([f c1 c2 c3]
+   (into [] (map f c1 c2 c3)))
+  ([f c1 c2 c3 & colls]
+   (into [] (apply map f c1 c2 c3 colls))))
+
+(defn group-by
+  "Returns a map of the elements of coll keyed by the result of
+  f on each element. The value at each key will be a vector of the
+  corresponding elements, in the order they appeared in coll."
+  {:added "1.2"
+   :static true}
+  [f coll]
+  (persistent!
+   (reduce
+    (fn [ret x]
+      (let [k (f x)]
+        (assoc! ret k (conj (get ret k []) x))))
+    (transient {}) coll)))
+
+(defn frequencies
+  "Returns a map from distinct items in coll to the number of times
+  they appear."
+  {:added "1.2"
+   :static true}
+  [coll]
+  (persistent!
+   (reduce (fn [counts x]
+             (assoc! counts x (inc (get counts x 0))))
+           (transient {}) coll)))
 
 (defmacro lazy-cat
   "Expands to code which yields a lazy sequence of the concatenation of the
@@ -0,0 +1,42 @@
+(ns ^{:doc "Reading edn, the data subset of the clojure syntax. The reader
+  never involves the compiler: no syntax-quote, #(), ::keywords or
+  metadata, and tagged literals are passed to the :readers fns.
+
+  The fns take an opts map of:
+
+  :readers - a map of tag symbols to fns called with the value read after
+             the tag, #inst and #uuid are read by default
+  :default - a fn of the tag and the value, called for tags without a
+             reader fn instead of throwing
+  :eof     - the value returned at the end of the input; without it read
+             throws and read-string returns nil"}
+  clojure.edn
+  (:require [clojure.lang.ednreader]
+            [clojure.lang.fileseq]))
+
+(defn read-string
+  "Reads one value from the string s, the :eof value of opts, or nil, if s
+  holds none."
+  ([s] (read-string {} s))
+  ([opts s]
+   (clojure.lang.ednreader/readString s (:readers opts) (:default opts)
+                                      (:eof opts))))
+
+(defn read
+  "Reads the next value from reader, a clojure.lang.fileseq/StringReader
+  or BufferedReader."
+  ([reader] (read {} reader))
+  ([opts reader]
+   (.read (clojure.lang.ednreader/EdnReader (:readers opts) (:default opts))
+          reader
+          (not (contains? opts :eof))
+          (:eof opts))))
+
+(defn read-seq
+  "Returns a lazy seq of the top-level values of f, a file object. The
+  values are read as the seq is realized and the file is read a block at a
+  time, so as long as the head of the seq isn't held, a file of any size
+  is processed in constant memory."
+  ([f] (read-seq {} f))
+  ([opts f]
+   (seq (clojure.lang.ednreader/readAll f (:readers opts) (:default opts)))))
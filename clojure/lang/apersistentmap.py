@@ -1,16 +1,20 @@
 
+import collections
+
 import clojure.lang.rt as RT
 from clojure.lang.aseq import ASeq
 from clojure.lang.mapentry import MapEntry
 from clojure.lang.iprintable import IPrintable
 from clojure.lang.ipersistentmap import IPersistentMap
-from clojure.lang.ipersistentset import IPersistentSet
 from clojure.lang.ipersistentvector import IPersistentVector
 from clojure.lang.cljexceptions import (ArityException,
                                         InvalidArgumentException)
 
 
 class APersistentMap(IPersistentMap, IPrintable):
+    # the hash once computed, see __hash__
+    _hash = -1
+
     def cons(self, o):
         if isinstance(o, MapEntry):
             return self.assoc(o.getKey(), o.getValue())
@@ -38,13 +42,10 @@ class APersistentMap(IPersistentMap, IPrintable):
     def __eq__(self, other):
         if self is other:
             return True
-        if isinstance(other, (IPersistentSet, IPersistentVector)):
-            return False
-        try:
-            return (len(self) == len(other) and
-                    all(s in other and other[s] == self[s] for s in self))
-        except TypeError:
+        if not isinstance(other, (IPersistentMap, collections.Mapping)):
             return False
+        return (len(self) == len(other) and
+                all(s in other and other[s] == self[s] for s in self))
 
     def __ne__(self, other):
         return not self == other
@@ -60,8 +61,10 @@ class APersistentMap(IPersistentMap, IPrintable):
             yield s.first().getKey()
             s = s.next()
 
-    # def __hash__(self):
-    #     return mapHash(self)
+    def __hash__(self):
+        if self._hash == -1:
+            self._hash = mapHash(self)
+        return self._hash
 
     def __call__(self, *args, **kwargs):
         return apply(self.valAt, args)
@@ -97,12 +100,17 @@ class APersistentMap(IPersistentMap, IPrintable):
 
 
 def mapHash(m):
-    return reduce(lambda h, v: h + (0 if v.getKey() is None
-                                      else hash(v.getKey()))
-                                 ^ (0 if v.getValue() is None
-                                      else hash(v.getValue())),
-                  m.interator(),
-                  0)
+    """Return the sum of the hashes of the entries of m, an entry hashing as
+    the hash of its key xor the hash of its value, None as 0."""
+    hsh = 0
+    s = m.seq()
+    while s is not None:
+        e = s.first()
+        k = e.getKey()
+        v = e.getValue()
+        hsh += (0 if k is None else hash(k)) ^ (0 if v is None else hash(v))
+        s = s.next()
+    return hsh
 
 
 class KeySeq(ASeq):
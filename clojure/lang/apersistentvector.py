@@ -15,6 +15,9 @@ class APersistentVector(IPersistentVector, IPrintable):
     """Pseudo-Abstract class to define a persistent vector.
 
     For concrete classes see: PersistentVector, MapEntry, and SubVec."""
+    # the hash once computed, see __hash__
+    _hash = -1
+
     def __iter__(self):
         """Return an iterator on this vector."""
         for x in range(len(self)):
@@ -55,12 +58,15 @@ class APersistentVector(IPersistentVector, IPrintable):
     def __hash__(self):
         """Return the hash on this vector or 1 if the vector is empty.
 
-        See: ASeq.hasheq()"""
-        s = self.seq()
-        if not s is None:
-            return s.hasheq();
-        else:
-            return 1            # EmptyList.__hash__() => 1
+        The hash is that of a seq of the same items, see ASeq.hasheq(). It is
+        computed on the first call only."""
+        if self._hash == -1:
+            s = self.seq()
+            if s is None:
+                self._hash = 1  # EmptyList.__hash__() => 1
+            else:
+                self._hash = s.hasheq()
+        return self._hash
 
     def __ne__(self, other):
         """Return not self.__eq__(other)"""
@@ -0,0 +1,45 @@
+from clojure.lang.cljexceptions import (IllegalStateException,
+                                        IndexOutOfBoundsException)
+from clojure.lang.ichunk import IChunk
+
+
+# Acts sort-of-like supplied-p in Common Lisp.
+_notSupplied = object()
+
+
+class ArrayChunk(IChunk):
+    """The items of array from off to end, a window on the array, which
+    isn't copied."""
+    def __init__(self, array, off=0, end=None):
+        self.array = array
+        self.off = off
+        self.end = len(array) if end is None else end
+
+    def __getitem__(self, i):
+        return self.array[self.off + i]
+
+    def nth(self, i, notFound=_notSupplied):
+        """Return the item at index i.
+
+        If i is out of bounds and notFound is supplied, return notFound, else
+        raise IndexOutOfBoundsException."""
+        if 0 <= i < self.end - self.off:
+            return self.array[self.off + i]
+        if notFound is _notSupplied:
+            raise IndexOutOfBoundsException()
+        return notFound
+
+    def __len__(self):
+        return self.end - self.off
+
+    def dropFirst(self):
+        if self.off == self.end:
+            raise IllegalStateException("dropFirst of empty chunk")
+        return ArrayChunk(self.array, self.off + 1, self.end)
+
+    def reduce(self, f, start):
+        ret = start
+        array = self.array
+        for i in xrange(self.off, self.end):
+            ret = f(ret, array[i])
+        return ret
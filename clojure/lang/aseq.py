@@ -14,6 +14,9 @@ from clojure.lang.cljexceptions import AbstractMethodCall
 
 
 class ASeq(Obj, Sequential, ISeq, IHashEq, Iterable, IPrintable):
+    # the hash once computed, see __hash__
+    _hash = -1
+
     def __eq__(self, other):
         if self is other:
             return True
@@ -93,6 +96,14 @@ class ASeq(Obj, Sequential, ISeq, IHashEq, Iterable, IPrintable):
             ret = 31 * ret + hash(s)
         return ret
 
+    def __hash__(self):
+        """Return hasheq(), computed on the first call only.
+
+        Equal to the hash of a vector of the same items."""
+        if self._hash == -1:
+            self._hash = self.hasheq()
+        return self._hash
+
     def cons(self, other):
         """Return a Cons.
 
@@ -1,9 +1,14 @@
 from clojure.lang.ifn import IFn
-from clojure.lang.cljexceptions import AbstractMethodCall
+from clojure.lang.cljexceptions import (AbstractMethodCall,
+                                        InvalidArgumentException)
 from clojure.lang.itransientmap import ITransientMap
+from clojure.lang.ipersistentvector import IPersistentVector
+from clojure.lang.mapentry import MapEntry
 import clojure.lang.rt as RT
 from clojure.lang.iprintable import IPrintable
 
+_notFound = object()
+
 class ATransientMap(IFn, ITransientMap, IPrintable):
     def ensureEditable(self):
         raise AbstractMethodCall(self)
@@ -25,30 +30,49 @@ class ATransientMap(IFn, ITransientMap, IPrintable):
 
     def conj(self, val):
         self.ensureEditable()
-        return RT.conjToAssoc(self, val)
+        if isinstance(val, MapEntry):
+            return self.assoc(val.getKey(), val.getValue())
+        if isinstance(val, IPersistentVector):
+            if len(val) != 2:
+                raise InvalidArgumentException("Vector arg to map conj must "
+                                               "be a pair")
+            return self.assoc(val[0], val[1])
+        ret = self
+        s = RT.seq(val)
+        while s is not None:
+            e = s.first()
+            ret = ret.assoc(e.getKey(), e.getValue())
+            s = s.next()
+        return ret
 
     def __call__(self, *args):
         return apply(self.valAt, args)
 
     def without(self, key):
         self.ensureEditable()
-        return self.doWithout()
+        return self.doWithout(key)
 
     def valAt(self, key, notFound = None):
         self.ensureEditable()
         return self.doValAt(key, notFound)
 
+    def containsKey(self, key):
+        return self.valAt(key, _notFound) is not _notFound
+
+    def __contains__(self, key):
+        return self.containsKey(key)
+
     def assoc(self, key, value):
         self.ensureEditable()
         return self.doAssoc(key, value)
 
-    def count(self):
+    def __len__(self):
         self.ensureEditable()
-        return self.count()
+        return self.doCount()
 
     def persistent(self):
         self.ensureEditable()
-        return self.persistent()
+        return self.doPersistent()
 
     def writeAsString(self, writer):
         writer.write(repr(self))
@@ -16,8 +16,9 @@ class Keyword(IFn, Named, IPrintable):
         already interned, it will be returned.
         """
         sym = Symbol(*args).withMeta(None)
-        if sym in Keyword.interned.get():
-            return Keyword.interned.get()[sym]
+        obj = Keyword.interned.get().valAt(sym)
+        if obj is not None:
+            return obj
         obj = super(Keyword, cls).__new__(cls)
         Keyword.interned.mutate(
             lambda old: old if sym in old else old.assoc(sym, obj))
@@ -28,6 +29,10 @@ class Keyword(IFn, Named, IPrintable):
     def __hash__(self):
         return self.hash
 
+    def __reduce__(self):
+        # unpickled keywords are interned too
+        return Keyword, (self.sym.ns, self.sym.name)
+
     def __call__(self, obj, notFound=None):
         if obj is None:
             return None
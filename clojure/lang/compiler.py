@@ -7,28 +7,37 @@ import re
 import sys
 import time
 import fractions
+import operator
 
+from clojure.lang.arraychunk import ArrayChunk
 from clojure.lang.cons import Cons
 from clojure.lang.cljexceptions import CompilerException, AbstractMethodCall
-from clojure.lang.cljkeyword import Keyword
+from clojure.lang.cljkeyword import Keyword, TAG_KEY
+from clojure.lang.ilookup import ILookup
 from clojure.lang.ipersistentvector import IPersistentVector
 from clojure.lang.ipersistentmap import IPersistentMap
 from clojure.lang.ipersistentset import IPersistentSet
 from clojure.lang.ipersistentlist import IPersistentList
 from clojure.lang.iseq import ISeq
 from clojure.lang.lispreader import _AMP_, LINE_KEY, garg
-from clojure.lang.namespace import Namespace, findNS, findItem, intern
+from clojure.lang.namespace import (Namespace, findNS, findItem, intern,
+                                    lazyNamespaces, realizeItem)
 from clojure.lang.persistentlist import PersistentList, EmptyList
 from clojure.lang.persistentvector import PersistentVector
+import clojure.lang.loadprofile as loadprofile
+import clojure.lang.macrocache as macrocache
+import clojure.lang.peephole as peephole
 import clojure.lang.rt as RT
 from clojure.lang.symbol import Symbol
-from clojure.lang.var import Var, threadBindings
+from clojure.lang.var import Var, link, threadBindings
 from clojure.util.byteplay import *
 import clojure.util.byteplay as byteplay
 import marshal
 import types
 
 _MACRO_ = Keyword("macro")
+_INLINE_ = Keyword("inline")
+_INLINE_ARITIES_ = Keyword("inline-arities")
 _NS_ = Symbol("*ns*")
 version = (sys.version_info[0] * 10) + sys.version_info[1]
 
@@ -41,7 +50,17 @@ class MetaBytecode(object):
     pass
 
 
+# constants of these types may be shared with literals of the same value,
+# so the roots of static Vars of these types are not replaced on redefinition
+UNLINKED_TYPES = frozenset([type(None), bool, int, long, float, complex, str,
+                            unicode, tuple, Keyword, Symbol])
+
+
 class GlobalPtr(MetaBytecode):
+    """The access to a global. The root of a non-dynamic Var is loaded as a
+    constant, and the fn being compiled is linked to the Var so that
+    redefining it replaces the constant (see Var.relink).
+    """
     def __init__(self, ns, name):
         self.ns = ns
         self.name = name
@@ -55,8 +74,11 @@ class GlobalPtr(MetaBytecode):
 
         if isinstance(val, Var):
             if not val.isDynamic():
-                val = val.deref()
-                return [(LOAD_CONST, val)]
+                root = val.deref()
+                if (comp.linkedVars is not None
+                    and type(root) not in UNLINKED_TYPES):
+                    comp.linkedVars.add(val)
+                return [(LOAD_CONST, root)]
             else:
                 if mode is PTR_MODE_DEREF:
                     return [(LOAD_CONST, val),
@@ -207,12 +229,66 @@ def compileBytecode(comp, form):
     while s is not None:
         code.extend(comp.compile(s.first()))
         s = s.next()
+    folded = foldConstants(bc, arg, code)
+    if folded is not None:
+        return folded
     code.append((bc, arg))
     if se[1] == 0:
         code.append((LOAD_CONST, None))
     return code
 
 
+# pure numeric bytecodes, evaluated at compile time when all their operands
+# are numeric constants
+FOLDABLE_OPS = {
+    UNARY_POSITIVE: operator.pos,
+    UNARY_NEGATIVE: operator.neg,
+    BINARY_ADD: operator.add,
+    BINARY_SUBTRACT: operator.sub,
+    BINARY_MULTIPLY: operator.mul,
+    BINARY_DIVIDE: operator.div,
+    BINARY_FLOOR_DIVIDE: operator.floordiv,
+    BINARY_TRUE_DIVIDE: operator.truediv,
+    BINARY_MODULO: operator.mod,
+}
+
+FOLDABLE_COMPARISONS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+FOLDABLE_TYPES = (int, long, float, fractions.Fraction)
+
+
+def foldConstants(bc, arg, code):
+    """Returns the code loading the result of bc applied to the operands
+    loaded by code, or None if they are not all numeric constants.
+
+    Operations that raise (such as a division by zero) are left to fail at
+    run time.
+    """
+    if bc is COMPARE_OP:
+        fn = FOLDABLE_COMPARISONS.get(arg)
+    else:
+        fn = FOLDABLE_OPS.get(bc)
+    if fn is None:
+        return None
+    args = []
+    for op in code:
+        if (not isinstance(op, tuple) or op[0] != LOAD_CONST
+            or type(op[1]) not in FOLDABLE_TYPES):
+            return None
+        args.append(op[1])
+    try:
+        return [(LOAD_CONST, fn(*args))]
+    except (ArithmeticError, TypeError, ValueError):
+        return None
+
+
 @register_builtin("kwapply")
 def compileKWApply(comp, form):
     if len(form) < 3:
@@ -245,32 +321,97 @@ def compileLoopStar(comp, form):
         raise CompilerException(
             "loop* takes a vector as it's first argument", form)
     bindings = RT.seq(form.first())
-    args = []
-    code = []
+    pairs = []
     if bindings and len(bindings) % 2:
         raise CompilerException("loop* takes a even number of bindings", form)
     while bindings:
         local, bindings = bindings.first(), bindings.next()
-        body, bindings = bindings.first(), bindings.next()
+        init, bindings = bindings.first(), bindings.next()
         if not isinstance(local, Symbol) or local.ns is not None:
             raise CompilerException(
                 "bindings must be non-namespaced symbols", form)
-        code.extend(comp.compile(body))
-        alias = RenamedLocal(Symbol("{0}_{1}".format(local, RT.nextID()))
-                             if comp.getAlias(local)
-                             else local)
+        pairs.append((local, init))
+    body = form.next()
+
+    walkat = None
+    for i, (local, init) in enumerate(pairs):
+        if seqWalkColl(comp, init) is not None:
+            walkat = i
+            break
+    if walkat is None:
+        return compileLoop(comp, pairs, body, [])
+
+    # (seq coll) binding: evaluate coll once, then walk it by index if it is
+    # of an INDEXED_TYPES and the seq never escapes the loop
+    args = []
+    code = compileLoopBindings(comp, pairs[:walkat], args)
+    local, init = pairs[walkat]
+    tag = tagOf(comp, seqWalkColl(comp, init))
+    walk = IndexedSeqWalk(local, tag in INDEXED_TYPES)
+    code.extend(comp.compile(seqWalkColl(comp, init)))
+    code.append((STORE_FAST, walk.coll))
+    loop = None
+    if (tag is None or walk.hinted) and onlyWalked(local, body):
+        loop = compileLoop(comp, pairs[walkat:], body, args, walk)
+        if walk.escapes():
+            loop = None
+    if loop is None:
+        loop = compileLoop(comp, pairs[walkat:], body, args, None,
+                           init.first(), walk.coll)
+    code.extend(loop)
+    comp.popAliases(args[:walkat])
+    return code
+
+
+def compileLoopBindings(comp, pairs, args, walk=None, seqfn=None,
+                        coll=None):
+    """Compiles the bindings of a loop*, pushing their aliases and appending
+    their locals to args.
+
+    The first binding is the (seq coll) one when walk or seqfn is given:
+    with walk the local becomes an IndexedSeqWalk over the coll stored in
+    walk.coll, with seqfn the seq of the coll in the local coll is bound.
+    """
+    code = []
+    for i, (local, init) in enumerate(pairs):
+        if i == 0 and walk is not None:
+            alias = walk
+            code.extend(walk.compileInit(comp, init))
+        else:
+            if i == 0 and seqfn is not None:
+                code.extend(comp.compile(seqfn))
+                code.extend([(LOAD_FAST, coll), (CALL_FUNCTION, 1)])
+            else:
+                code.extend(comp.compile(init))
+            # recur may rebind the local to any type, only hints are trusted
+            alias = RenamedLocal(Symbol("{0}_{1}".format(local, RT.nextID()))
+                                 if comp.getAlias(local)
+                                 else local,
+                                 tag=tagOf(comp, local))
         comp.pushAlias(local, alias)
         args.append(local)
-        code.extend(alias.compileSet(comp))
-    form = form.next()
+        if alias is not walk:
+            code.extend(alias.compileSet(comp))
+    return code
+
+
+def compileLoop(comp, pairs, body, args, walk=None, seqfn=None, coll=None):
+    """Compiles the bindings in pairs and the body of a loop*, args holds
+    the locals of the bindings already compiled.
+    """
+    args = list(args)
+    start = len(args)
+    code = compileLoopBindings(comp, pairs, args, walk, seqfn, coll)
     recurlabel = Label("recurLabel")
     recur = {"label": recurlabel,
-             "args": [comp.getAlias(arg).compileSet(comp) for arg in args]}
+             "args": [comp.getAlias(arg).compileSet(comp) for arg in args],
+             "walks": [comp.getAlias(arg) if comp.getAlias(arg) is walk
+                       else None for arg in args]}
     code.append((recurlabel, None))
     comp.pushRecur(recur)
-    code.extend(compileImplcitDo(comp, form))
+    code.extend(compileImplcitDo(comp, body))
     comp.popRecur()
-    comp.popAliases(args)
+    comp.popAliases(args[start:])
     return code
 
 
@@ -296,7 +437,8 @@ def compileLetStar(comp, form):
         code.extend(comp.compile(body))
         alias = RenamedLocal(Symbol("{0}_{1}".format(local, RT.nextID()))
                              if comp.getAlias(local)
-                             else local)
+                             else local,
+                             tag=tagOf(comp, local) or tagOf(comp, body))
         comp.pushAlias(local, alias)
         args.append(local)
         code.extend(alias.compileSet(comp))
@@ -377,7 +519,9 @@ def compileIfStar(comp, form):
     """
     if len(form) != 3 and len(form) != 4:
         raise CompilerException("if takes 2 or 3 args", form)
-    cmp = comp.compile(form.next().first())
+    walk = walkedBy(comp, form.next().first())
+    if walk is None:
+        cmp = comp.compile(form.next().first())
     body = comp.compile(form.next().next().first())
     if len(form) == 3:
         body2 = [(LOAD_CONST, None)]
@@ -386,6 +530,15 @@ def compileIfStar(comp, form):
 
     elseLabel = Label("IfElse")
     endlabel = Label("IfEnd")
+    if walk is not None:
+        code = walk.compileTest(comp, form.next().first())
+        code.extend(emitJump(elseLabel))
+        code.extend(body)
+        code.append((JUMP_ABSOLUTE, endlabel))
+        code.extend(emitLanding(elseLabel))
+        code.extend(body2)
+        code.append((endlabel, None))
+        return code
     condition_name = garg(0).name
     code = cmp
     code.append((STORE_FAST, condition_name))
@@ -440,7 +593,7 @@ def compileFn(comp, name, form, orgform):
     locals, args, lastisargs, argsname = unpackArgs(form.first())
 
     for x in locals:
-        comp.pushAlias(x, FnArgument(x))
+        comp.pushAlias(x, FnArgument(x, tag=tagOf(comp, x)))
 
     if orgform.meta() is not None:
         line = orgform.meta()[LINE_KEY]
@@ -463,10 +616,12 @@ def compileFn(comp, name, form, orgform):
     comp.popAliases(locals)
 
     clist = map(lambda x: RT.name(x.sym), comp.closureList())
-    code = expandMetas(code, comp)
-    c = Code(code, clist, args, lastisargs, False, True, str(Symbol(comp.getNS().__name__, name.name)), comp.filename, 0, None)
-    if not clist:
-        c = types.FunctionType(c.to_code(), comp.ns.__dict__, name.name)
+    with loadprofile.phase("assemble"):
+        code = peephole.optimize(expandMetas(code, comp),
+                                 comp.getNS().__name__)
+        c = Code(code, clist, args, lastisargs, False, True, str(Symbol(comp.getNS().__name__, name.name)), comp.filename, 0, None)
+        if not clist:
+            c = types.FunctionType(c.to_code(), comp.ns.__dict__, name.name)
 
     return [(LOAD_CONST, c)], c
 
@@ -521,7 +676,7 @@ class MultiFn(object):
                     (STORE_FAST, self.args[x])])
 
         for x in self.locals:
-            comp.pushAlias(x, FnArgument(x))
+            comp.pushAlias(x, FnArgument(x, tag=tagOf(comp, x)))
 
         recurlabel = Label("recurLabel")
 
@@ -570,10 +725,12 @@ def compileMultiFn(comp, name, form):
         code.append((RAISE_VARARGS, 1))
 
     clist = map(lambda x: RT.name(x.sym), comp.closureList())
-    code = expandMetas(code, comp)
-    c = Code(code, clist, argslist, hasvararg, False, True, str(Symbol(comp.getNS().__name__, name.name)), comp.filename, 0, None)
-    if not clist:
-        c = types.FunctionType(c.to_code(), comp.ns.__dict__, name.name)
+    with loadprofile.phase("assemble"):
+        code = peephole.optimize(expandMetas(code, comp),
+                                 comp.getNS().__name__)
+        c = Code(code, clist, argslist, hasvararg, False, True, str(Symbol(comp.getNS().__name__, name.name)), comp.filename, 0, None)
+        if not clist:
+            c = types.FunctionType(c.to_code(), comp.ns.__dict__, name.name)
     return [(LOAD_CONST, c)], c
 
 
@@ -597,7 +754,7 @@ def compileFNStar(comp, form):
     if len(comp.aliases) > 0: # we might have closures to deal with
         for x in comp.aliases:
 
-            comp.pushAlias(x, Closure(x))
+            comp.pushAlias(x, Closure(x, tag=comp.getAlias(x).tag))
             aliases.append(x)
         haslocalcaptures = True
 
@@ -627,15 +784,28 @@ def compileFNStar(comp, form):
     selfalias = Closure(name)
     comp.pushAlias(name, selfalias)
 
-    # form = ([x] x)
-    if isinstance(form.first(), IPersistentVector):
-        code, ptr = compileFn(comp, name, form, orgform)
-    # form = (([x] x))
-    elif len(form) == 1:
-        code, ptr = compileFn(comp, name, RT.list(*form.first()), orgform)
-    # form = (([x] x) ([x y] x))
-    else:
-        code, ptr = compileMultiFn(comp, name, form)
+    # static Vars this fn and the closures it contains hold the roots of
+    outerlinks = comp.linkedVars
+    comp.linkedVars = set()
+    try:
+        # form = ([x] x)
+        if isinstance(form.first(), IPersistentVector):
+            code, ptr = compileFn(comp, name, form, orgform)
+        # form = (([x] x))
+        elif len(form) == 1:
+            code, ptr = compileFn(comp, name, RT.list(*form.first()), orgform)
+        # form = (([x] x) ([x y] x))
+        else:
+            code, ptr = compileMultiFn(comp, name, form)
+    finally:
+        links = comp.linkedVars
+        comp.linkedVars = outerlinks
+    if links:
+        if isinstance(ptr, types.FunctionType):
+            link(ptr, links)
+        elif outerlinks is not None:
+            # the code of a closure is a constant of the enclosing fn
+            outerlinks.update(links)
 
     if pushed:
         comp.popName()
@@ -685,8 +855,16 @@ def compileRecur(comp, form):
     code = []
     if len(s) > len(comp.recurPoint.first()["args"]):
         raise CompilerException("too many arguments to recur", form)
-    for recur_val in s:
-        code.extend(comp.compile(recur_val))
+    walks = comp.recurPoint.first().get("walks", ())
+    for i, recur_val in enumerate(s):
+        walk = walks[i] if i < len(walks) else None
+        if walk is not None:
+            code.extend(walk.compileStep(comp, recur_val))
+        else:
+            code.extend(comp.compile(recur_val))
+    for walk in walks[len(s):]:
+        if walk is not None:
+            walk.escaped = True
     sets = comp.recurPoint.first()["args"][:]
     sets.reverse()
     for x in sets:
@@ -1066,6 +1244,8 @@ class AAlias(object):
     """Base class for all aliases"""
     def __init__(self, rest = None):
         self.rest = rest
+        # the type of the local if it is known, see tagOf
+        self.tag = None
     def compile(self, comp):
         raise AbstractMethodCall(self)
     def compileSet(self, comp):
@@ -1077,9 +1257,10 @@ class AAlias(object):
 class FnArgument(AAlias):
     """An alias provided by the arguments to a fn*
        in the fragment (fn [a] a) a is a FnArgument"""
-    def __init__(self, sym, rest = None):
+    def __init__(self, sym, rest = None, tag = None):
         AAlias.__init__(self, rest)
         self.sym = sym
+        self.tag = tag
     def compile(self, comp):
         return [(LOAD_FAST, RT.name(self.sym))]
     def compileSet(self, comp):
@@ -1088,9 +1269,10 @@ class FnArgument(AAlias):
 
 class RenamedLocal(AAlias):
     """An alias created by a let, loop, etc."""
-    def __init__(self, sym, rest = None):
+    def __init__(self, sym, rest = None, tag = None):
         AAlias.__init__(self, rest)
         self.sym = sym
+        self.tag = tag
         self.newsym = Symbol(RT.name(sym) + str(RT.nextID()))
     def compile(self, comp):
         return [(LOAD_FAST, RT.name(self.newsym))]
@@ -1100,9 +1282,10 @@ class RenamedLocal(AAlias):
 
 class Closure(AAlias):
     """Represents a value that is contained in a closure"""
-    def __init__(self, sym, rest = None):
+    def __init__(self, sym, rest = None, tag = None):
         AAlias.__init__(self, rest)
         self.sym = sym
+        self.tag = tag
         self.isused = False  ## will be set to true whenever this is compiled
     def isUsed(self):
         return self.isused
@@ -1136,6 +1319,118 @@ class SelfReference(AAlias):
                 (CALL_FUNCTION, 0)]
 
 
+class IndexedSeqWalk(AAlias):
+    """Stands for a loop* local bound to (seq coll): when coll is of one of
+    the INDEXED_TYPES the loop keeps an index into coll instead of a seq.
+
+    Unless coll is hinted, whether it is indexed is only known at run time,
+    so the local holds either the index or the seq and each use of it
+    branches on the indexed flag, within the one body of the loop.
+
+    Only (first s), s or (seq s) as the test of an if, and (next s) or
+    (rest s) as the value recur binds to s are supported, (rest s) only
+    when s is always tested as (seq s). Any other use sets escaped, and
+    the loop is then compiled the generic way.
+    """
+    def __init__(self, sym, hinted, rest = None):
+        AAlias.__init__(self, rest)
+        self.sym = sym
+        self.hinted = hinted
+        name = RT.name(sym) + str(RT.nextID())
+        self.coll = name + "_coll"
+        self.local = name + "_walk"
+        self.count = name + "_count"
+        self.indexed = name + "_indexed"
+        self.escaped = False
+        self.bareTest = False
+        self.restStep = False
+    def escapes(self):
+        # an empty (rest s) is truthy, unlike the end of the index
+        return self.escaped or (self.bareTest and self.restStep)
+    def compile(self, comp):
+        self.escaped = True
+        return [(LOAD_CONST, None)]
+    def compileSet(self, comp):
+        return [(STORE_FAST, self.local)]
+    def branch(self, indexed, generic):
+        """Returns the code running indexed when coll is indexed, generic
+        otherwise.
+        """
+        if self.hinted:
+            return indexed
+        genericlabel = Label("WalkGeneric")
+        endlabel = Label("WalkEnd")
+        code = [(LOAD_FAST, self.indexed)]
+        code.extend(emitJump(genericlabel))
+        code.extend(indexed)
+        code.append((JUMP_ABSOLUTE, endlabel))
+        code.extend(emitLanding(genericlabel))
+        code.extend(generic)
+        code.append((endlabel, None))
+        return code
+    def callOnLocal(self, comp, fn):
+        return comp.compile(fn) + [(LOAD_FAST, self.local),
+                                   (CALL_FUNCTION, 1)]
+    def compileInit(self, comp, init):
+        """Compiles the binding of the local to init, (seq coll)."""
+        code = []
+        if not self.hinted:
+            code.extend([(LOAD_CONST, isIndexed),
+                         (LOAD_FAST, self.coll),
+                         (CALL_FUNCTION, 1),
+                         (STORE_FAST, self.indexed)])
+        code.extend(self.branch([(LOAD_CONST, len),
+                                 (LOAD_FAST, self.coll),
+                                 (CALL_FUNCTION, 1),
+                                 (STORE_FAST, self.count),
+                                 (LOAD_CONST, 0)],
+                                comp.compile(init.first())
+                                + [(LOAD_FAST, self.coll),
+                                   (CALL_FUNCTION, 1)]))
+        code.append((STORE_FAST, self.local))
+        return code
+    def compileIndexTest(self):
+        return [(LOAD_FAST, self.local),
+                (LOAD_FAST, self.count),
+                (COMPARE_OP, "<")]
+    def compileTest(self, comp, form):
+        """Compiles the truth of form, s or (seq s)."""
+        if isinstance(form, Symbol):
+            self.bareTest = True
+            generic = [(LOAD_FAST, self.local)]
+        else:
+            generic = self.callOnLocal(comp, form.first())
+        # seqs are never false, only nil
+        generic.extend([(LOAD_CONST, None), (COMPARE_OP, "is not")])
+        return self.branch(self.compileIndexTest(), generic)
+    def compileFirst(self, comp, fn):
+        # (first s) is nil once the walk is over
+        nonelabel = Label("WalkDone")
+        endlabel = Label("WalkFirst")
+        code = self.compileIndexTest()
+        code.extend(emitJump(nonelabel))
+        code.extend([(LOAD_FAST, self.coll),
+                     (LOAD_FAST, self.local),
+                     (BINARY_SUBSCR, None),
+                     (JUMP_ABSOLUTE, endlabel)])
+        code.extend(emitLanding(nonelabel))
+        code.extend([(LOAD_CONST, None), (endlabel, None)])
+        return self.branch(code, self.callOnLocal(comp, fn))
+    def compileStep(self, comp, form):
+        """Compiles the value recur binds to the local."""
+        if (isinstance(form, ISeq) and len(form) == 2
+            and comp.getAlias(form.next().first()) is self
+            and isCoreCall(comp, form, "next", "rest")):
+            if form.first().name == "rest":
+                self.restStep = True
+            return self.branch([(LOAD_FAST, self.local),
+                                (LOAD_CONST, 1),
+                                (BINARY_ADD, None)],
+                               self.callOnLocal(comp, form.first()))
+        self.escaped = True
+        return comp.compile(form)
+
+
 class Name(object):
     """Slot for a name"""
     def __init__(self, name, rest=None):
@@ -1175,6 +1470,285 @@ def meta(form):
     return getattr(form, "meta", lambda: None)()
 
 
+# Var -> (:inline form, :inline-arities form, inline fn, arities fn)
+inlineCache = {}
+
+
+def evalMeta(form, ns):
+    """Evaluates a metadata form of a Var of ns, such as :inline. Metadata
+    maps of defs are not evaluated, fns found there are used as is.
+    """
+    if form is None or callable(form):
+        return form
+    comp = Compiler()
+    comp.setNS(ns.__name__)
+    return comp.executeCode(comp.compile(form), ns)
+
+
+def inlineCall(form, comp):
+    """Returns the expansion of a call to a Var that has :inline metadata,
+    or None.
+
+    :inline is a fn taking the unevaluated args of the call and returning
+    the form to compile instead, like a macro. If :inline-arities is given,
+    only calls for which it returns true when passed the arg count are
+    expanded.
+    """
+    var = findItem(comp.getNS(), form.first())
+    if not isinstance(var, Var):
+        return None
+    meta = var.meta()
+    if not meta:
+        return None
+    inline = meta[_INLINE_]
+    if inline is None:
+        return None
+    arities = meta[_INLINE_ARITIES_]
+    cached = inlineCache.get(var)
+    if cached is None or cached[0] is not inline or cached[1] is not arities:
+        cached = (inline, arities, evalMeta(inline, var.ns),
+                  evalMeta(arities, var.ns))
+        inlineCache[var] = cached
+    args = RT.seqToTuple(form.next())
+    if cached[3] is not None and not cached[3](len(args)):
+        return None
+    expansion = cached[2](*args)
+    if hasattr(expansion, "withMeta") and hasattr(form, "meta"):
+        expansion = expansion.withMeta(form.meta())
+    return expansion
+
+
+# type hints: ^int, ^str, ^float, ... or the name of a class
+TAG_TYPES = {"int": int, "long": long, "float": float, "bool": bool,
+             "str": str, "unicode": unicode, "list": list, "tuple": tuple,
+             "dict": dict}
+LITERAL_TYPES = frozenset([int, long, float, str, unicode])
+NUMERIC_TYPES = frozenset([int, long, float])
+
+
+def resolveTag(comp, tag):
+    """Returns the type named by a :tag, or None if it isn't a known type.
+    """
+    if isinstance(tag, str):
+        tag = Symbol(tag)
+    if not isinstance(tag, Symbol):
+        return None
+    if tag.ns is None and tag.name in TAG_TYPES:
+        return TAG_TYPES[tag.name]
+    if tag.ns == "py":
+        tp = getattr(__builtin__, tag.name, None)
+    else:
+        tp = findItem(comp.getNS(), tag)
+        if isinstance(tp, Var):
+            tp = tp.deref()
+    return tp if isinstance(tp, type) else None
+
+
+def tagOf(comp, form):
+    """Returns the type a form evaluates to if it is known at compile time:
+    from a ^tag on the form, the tag of a local or the type of a literal.
+
+    A hinted value is trusted to be of that type, or nil.
+    """
+    m = meta(form)
+    if m is not None and m[TAG_KEY] is not None:
+        return resolveTag(comp, m[TAG_KEY])
+    if isinstance(form, Symbol):
+        return getattr(comp.getAlias(form), "tag", None)
+    if type(form) in LITERAL_TYPES:
+        return type(form)
+    if isinstance(form, PersistentVector):
+        return PersistentVector
+    return None
+
+
+def nilGuarded(comp, sym, args, fast):
+    """Returns the code of a call to sym specialized by fast, the code that
+    runs with the value of the first arg on the stack.
+
+    A hint doesn't rule out nil: when the first arg is nil the generic fn
+    is called instead, unless the arg is a literal.
+    """
+    code = comp.compile(args[0])
+    if type(args[0]) in LITERAL_TYPES or isinstance(args[0], PersistentVector):
+        return code + fast
+    genericlabel = Label("HintedGeneric")
+    endlabel = Label("HintedEnd")
+    code.extend([(DUP_TOP, None),
+                 (LOAD_CONST, None),
+                 (COMPARE_OP, "is not")])
+    code.extend(emitJump(genericlabel))
+    code.extend(fast)
+    code.append((JUMP_ABSOLUTE, endlabel))
+    code.extend(emitLanding(genericlabel))
+    code.extend(comp.compile(sym))
+    code.append((ROT_TWO, None))
+    for arg in args[1:]:
+        code.extend(comp.compile(arg))
+    code.append((CALL_FUNCTION, len(args)))
+    code.append((endlabel, None))
+    return code
+
+
+def hintedCount(comp, sym, args, tags):
+    if len(args) == 1 and hasattr(tags[0], "__len__"):
+        return nilGuarded(comp, sym, args,
+                          [(LOAD_CONST, len),
+                           (ROT_TWO, None),
+                           (CALL_FUNCTION, 1)])
+
+
+def hintedNth(comp, sym, args, tags):
+    if len(args) == 2 and hasattr(tags[0], "__getitem__"):
+        return nilGuarded(comp, sym, args,
+                          comp.compile(args[1]) + [(BINARY_SUBSCR, None)])
+
+
+def hintedGet(comp, sym, args, tags):
+    if len(args) not in (2, 3) or tags[0] is None:
+        return None
+    if issubclass(tags[0], ILookup):
+        method = "valAt"
+    elif issubclass(tags[0], dict):
+        method = "get"
+    else:
+        return None
+    fast = [(LOAD_ATTR, method)]
+    fast.extend(comp.compile(args[1]))
+    fast.extend(comp.compile(args[2]) if len(args) == 3
+                else [(LOAD_CONST, None)])
+    fast.append((CALL_FUNCTION, 2))
+    return nilGuarded(comp, sym, args, fast)
+
+
+def hintedEquals(comp, sym, args, tags):
+    if len(args) == 2 and tags[0] in NUMERIC_TYPES \
+       and tags[1] in NUMERIC_TYPES:
+        return comp.compile(args[0]) + comp.compile(args[1]) \
+               + [(COMPARE_OP, "==")]
+
+
+def hintedStr(comp, sym, args, tags):
+    if len(args) == 1 and tags[0] is str:
+        return nilGuarded(comp, sym, args, [])
+
+
+def hintedFirst(comp, sym, args, tags):
+    if len(args) == 1 and isinstance(args[0], Symbol):
+        alias = comp.getAlias(args[0])
+        if isinstance(alias, IndexedSeqWalk):
+            return alias.compileFirst(comp, sym)
+
+
+# name of a clojure.core fn -> fn returning the code of a call to it
+# specialized for the types of its args, or None
+HINTED_CALLS = {"count": hintedCount,
+                "nth": hintedNth,
+                "get": hintedGet,
+                "=": hintedEquals,
+                "str": hintedStr,
+                "first": hintedFirst}
+
+
+def compileHintedCall(form, comp):
+    """Compiles a call to one of the HINTED_CALLS of clojure.core when the
+    types of its args allow to skip the generic implementation, returns
+    None otherwise.
+    """
+    sym = form.first()
+    specializer = HINTED_CALLS.get(sym.name)
+    if specializer is None:
+        return None
+    var = findItem(comp.getNS(), sym)
+    if not isinstance(var, Var) or var.ns.__name__ != "clojure.core":
+        return None
+    args = RT.seqToTuple(form.next()) if form.next() is not None else ()
+    return specializer(comp, sym, args, [tagOf(comp, x) for x in args])
+
+
+# collections a (loop [s (seq coll)] ...) can walk by index
+INDEXED_TYPES = frozenset([PersistentVector, ArrayChunk, list, tuple])
+
+
+def isIndexed(coll):
+    return type(coll) in INDEXED_TYPES
+
+
+def isCoreCall(comp, form, *names):
+    """Is form a call to one of the clojure.core fns names, not shadowed
+    by a local?
+    """
+    sym = form.first()
+    if (not isinstance(sym, Symbol) or sym.name not in names
+        or sym in comp.aliases):
+        return False
+    var = findItem(comp.getNS(), sym)
+    return isinstance(var, Var) and var.ns.__name__ == "clojure.core"
+
+
+def seqWalkColl(comp, form):
+    """Returns coll if form is (seq coll), None otherwise.
+    """
+    if (isinstance(form, ISeq) and len(form) == 2
+        and isCoreCall(comp, form, "seq")):
+        return form.next().first()
+    return None
+
+
+# forms an IndexedSeqWalk local s may appear in: (first s), (seq s), ...
+WALK_CALLS = frozenset(["first", "next", "rest", "seq"])
+# ... and (if s ...)
+WALK_TESTS = frozenset(["if", "if*", "when"])
+
+
+def onlyWalked(sym, form):
+    """Does sym appear in form only the ways an IndexedSeqWalk supports?
+
+    Only the unexpanded form is looked at, so that loops whose seq obviously
+    escapes are not compiled twice, the compiled loop is still checked.
+    """
+    if isinstance(form, Symbol):
+        return form != sym
+    if isinstance(form, ISeq):
+        head = form.first()
+        if isinstance(head, Symbol) and form.next() is not None:
+            if (head.name in WALK_CALLS and len(form) == 2
+                and form.next().first() == sym):
+                return True
+            if head.name in WALK_TESTS and form.next().first() == sym:
+                form = form.next().next()
+    elif isinstance(form, IPersistentMap):
+        form = RT.seq(form)
+        while form is not None:
+            if not (onlyWalked(sym, form.first().getKey())
+                    and onlyWalked(sym, form.first().getValue())):
+                return False
+            form = form.next()
+        return True
+    elif not isinstance(form, (IPersistentVector, IPersistentSet)):
+        return True
+    form = RT.seq(form)
+    while form is not None:
+        if not onlyWalked(sym, form.first()):
+            return False
+        form = form.next()
+    return True
+
+
+def walkedBy(comp, form):
+    """Returns the IndexedSeqWalk a test form is about, when it is the walked
+    local or (seq local).
+    """
+    coll = seqWalkColl(comp, form)
+    if coll is not None:
+        form = coll
+    if isinstance(form, Symbol):
+        alias = comp.getAlias(form)
+        if isinstance(alias, IndexedSeqWalk):
+            return alias
+    return None
+
+
 def macroexpand(form, comp, one=False):
     if isinstance(form.first(), Symbol):
         if form.first().ns == 'py' or form.first().ns == "py.bytecode":
@@ -1193,10 +1767,14 @@ def macroexpand(form, comp, one=False):
 
             macroform = getattr(macro, "_macro-form", macro)
 
-            mresult = macro(macroform, None, *args)
-
-            if hasattr(mresult, "withMeta") and hasattr(form, "meta"):
-                mresult = mresult.withMeta(form.meta())
+            def expand():
+                with loadprofile.phase("macroexpand"):
+                    mresult = macro(macroform, None, *args)
+                if hasattr(mresult, "withMeta") and hasattr(form, "meta"):
+                    mresult = mresult.withMeta(form.meta())
+                return mresult
+            mresult = macrocache.cache.expand(macro, comp.getNS().__name__,
+                                              form, expand)
             if not one:
                 mresult = comp.compile(mresult)
             return mresult, True
@@ -1213,6 +1791,11 @@ class Compiler(object):
         self.aliases = {}
         self.filename = "<unknown>"
         self._NS_ = findItem(clojure_core, _NS_)
+        # receives the code objects of executed top-level forms, see
+        # clojure.main.CacheWriter
+        self.cacheWriter = None
+        # the static Vars the fn being compiled is linked to, see GlobalPtr
+        self.linkedVars = None
 
     def setFile(self, filename):
         self.filename = filename
@@ -1305,6 +1888,13 @@ class Compiler(object):
                 return self.compilePropertyAccess(form)
             if form.first().name.startswith(".") and form.first().ns is None:
                 return self.compileMethodAccess(form)
+            if form.first() not in self.aliases:
+                hinted = compileHintedCall(form, self)
+                if hinted is not None:
+                    return hinted
+                inlined = inlineCall(form, self)
+                if inlined is not None:
+                    return self.compile(inlined)
         c = self.compile(form.first())
         f = form.next()
         acount = 0
@@ -1324,6 +1914,8 @@ class Compiler(object):
         return code
 
     def getAccessCode(self, sym):
+        if lazyNamespaces:
+            realizeItem(self.getNS(), sym)
         if sym.ns is None or sym.ns == self.getNS().__name__:
             if self.getNS() is None:
                 raise CompilerException("no namespace has been defined", None)
@@ -1448,23 +2040,29 @@ class Compiler(object):
         ns = ns or self.getNS()
         if code == []:
             return None
+        with loadprofile.phase("assemble"):
+            c = self.assembleCode(code, ns)
+        if self.cacheWriter is not None:
+            self.cacheWriter.record(ns, c)
+        return self.executeCompiled(c, ns)
+
+    def assembleCode(self, code, ns):
+        """Turns the bytecode of a top-level form into a code object."""
         newcode = expandMetas(code, self)
         newcode.append((RETURN_VALUE, None))
+        newcode = peephole.optimize(newcode, ns.__name__)
         c = Code(newcode, [], [], False, False, False,
                  str(Symbol(ns.__name__, "<string>")), self.filename, 0, None)
         try:
-            c = c.to_code()
+            return c.to_code()
         except:
             for x in newcode:
                 print x
             raise
 
-        # work on .cljs
-        #from clojure.util.freeze import write, read
-        #with open("foo.cljs", "wb") as fl:
-        #    f = write(c, fl)
-
-        with threadBindings({self._NS_: ns}):
+    def executeCompiled(self, c, ns):
+        """Evaluates the code object of a top-level form in ns."""
+        with threadBindings({self._NS_: ns}), loadprofile.phase("eval"):
             retval = eval(c, ns.__dict__)
         return retval
 
@@ -1490,16 +2088,3 @@ class Compiler(object):
             (LOAD_CONST, None),
             (IMPORT_NAME, "clojure.standardimports"),
             (IMPORT_STAR, None)]
-
-    def executeModule(self, code):
-        code.append((RETURN_VALUE, None))
-        c = Code(code, [], [], False, False, False,
-                 str(Symbol(self.getNS().__name__, "<string>")), self.filename, 0, None)
-
-        dis.dis(c)
-        codeobject = c.to_code()
-
-        with open('output.pyc', 'wb') as fc:
-            fc.write(py_compile.MAGIC)
-            py_compile.wr_long(fc, long(time.time()))
-            marshal.dump(c, fc)
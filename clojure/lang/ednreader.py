@@ -0,0 +1,276 @@
+"""A reader for edn, the data subset of the clojure syntax.
+
+Unlike lispreader, it never involves the compiler: there is no syntax-quote,
+#(), ::keyword or metadata, and lists are read without the line they were
+found on. Tagged literals #tag value are passed to the reader functions
+given for their tag, #inst and #uuid are read by default.
+
+readAll reads the top-level values of a file one at a time, with a
+BufferedReader, so a file of any size can be processed a value at a time.
+"""
+
+import datetime
+import decimal
+import re
+import uuid
+
+from clojure.lang.cljexceptions import (ReaderException,
+                                         IllegalArgumentException)
+from clojure.lang.fileseq import StringReader, BufferedReader
+from clojure.lang.lispreader import (read1, whiteSpace, whiteSpacePat,
+                                     INTERPRET_TOKENS, matchNumber,
+                                     matchSymbol, readToken, stringReader,
+                                     characterReader, commentReader)
+from clojure.lang.persistenthashmap import fromItems as mapFromItems
+from clojure.lang.persistenthashset import createWithCheck
+from clojure.lang.persistentvector import fromList as vectorFromList
+import clojure.lang.rt as RT
+from clojure.lang.symbol import Symbol
+
+EOF = object()
+
+# 2012-03-16T12:30:00.123-04:00, every part after the year being optional
+instPat = re.compile(r"""
+(?P<year>\d{4})
+(-(?P<month>\d{2})
+ (-(?P<day>\d{2})
+  (T(?P<hour>\d{2})
+   (:(?P<minute>\d{2})
+    (:(?P<second>\d{2})
+     (\.(?P<fraction>\d+))?)?)?
+   (?P<offset>Z|[+-]\d{2}:\d{2})?)?)?)?
+$
+""", re.X)
+
+def readInst(s):
+    """Returns the datetime, in UTC and without tzinfo, of the RFC 3339
+    timestamp s.
+    """
+    if not isinstance(s, basestring):
+        raise ReaderException("#inst value must be a string: {0}".format(s))
+    m = instPat.match(s)
+    if m is None:
+        raise ReaderException("Unrecognized timestamp: {0}".format(s))
+    fraction = (m.group("fraction") or "0")[:6]
+    inst = datetime.datetime(int(m.group("year")),
+                             int(m.group("month") or 1),
+                             int(m.group("day") or 1),
+                             int(m.group("hour") or 0),
+                             int(m.group("minute") or 0),
+                             int(m.group("second") or 0),
+                             int(fraction.ljust(6, "0")))
+    offset = m.group("offset")
+    if offset and offset != "Z":
+        sign = -1 if offset[0] == "-" else 1
+        inst -= sign * datetime.timedelta(hours=int(offset[1:3]),
+                                          minutes=int(offset[4:6]))
+    return inst
+
+
+def readUUID(s):
+    if not isinstance(s, basestring):
+        raise ReaderException("#uuid value must be a string: {0}".format(s))
+    try:
+        return uuid.UUID(s)
+    except ValueError:
+        raise ReaderException("Invalid #uuid: {0}".format(s))
+
+
+defaultReaders = {Symbol("inst"): readInst,
+                  Symbol("uuid"): readUUID,
+                  }
+
+
+def interpretToken(s):
+    """Returns nil, true, false or the symbol or keyword s stands for.
+
+    Raises ReaderException if s is not a valid edn token."""
+    if s in INTERPRET_TOKENS:
+        return INTERPRET_TOKENS[s]
+    # ::keywords are resolved in the current namespace, edn has none
+    ret = matchSymbol(s) if not s.startswith("::") else None
+    if ret is None:
+        raise ReaderException("Invalid token: {0}".format(s))
+    return ret
+
+
+def interpretNumber(rdr, initch):
+    """Reads a number, allowing the 1N and 1.5M suffixes of clojure's
+    arbitrary precision integers and decimals.
+
+    May raise ReaderException."""
+    s = readToken(rdr, initch)
+    try:
+        if s[-1] == "N":
+            n = matchNumber(s[:-1])
+            if isinstance(n, (int, long)):
+                return long(n)
+        elif s[-1] == "M":
+            if matchNumber(s[:-1]) is not None:
+                return decimal.Decimal(s[:-1])
+        else:
+            n = matchNumber(s)
+            if n is not None:
+                return n
+    except Exception as e:
+        raise ReaderException(e.args[0], rdr)
+    raise ReaderException("Invalid number: " + s, rdr)
+
+
+class EdnReader(object):
+    """Reads edn values.
+
+    readers -- a map of tag symbols to the functions called with the value
+               read after #tag, looked up before #inst and #uuid
+    default -- called with the tag and value of a tagged literal without a
+               reader function, instead of raising ReaderException
+    """
+
+    def __init__(self, readers=None, default=None):
+        self.readers = readers
+        self.default = default
+        self.macros = {'"': stringReader,
+                       "(": self.listReader,
+                       ")": self.unmatchedDelimiterReader,
+                       "[": self.vectorReader,
+                       "]": self.unmatchedDelimiterReader,
+                       "{": self.mapReader,
+                       "}": self.unmatchedDelimiterReader,
+                       ";": commentReader,
+                       "#": self.dispatchReader,
+                       "\\": characterReader,
+                       }
+
+    def read(self, rdr, eofIsError=True, eofValue=None):
+        """Reads and returns the next value of rdr.
+
+        rdr -- a read/unread-able object
+        eofIsError -- if True, raise ReaderException when rdr is out of
+                      characters, if False, return eofValue instead"""
+        scan = isinstance(rdr, StringReader)
+        while True:
+            if scan:
+                rdr.scan(whiteSpacePat)
+            ch = read1(rdr)
+            while ch in whiteSpace:
+                ch = read1(rdr)
+
+            if ch == "":
+                if eofIsError:
+                    raise ReaderException("EOF while reading", rdr)
+                return eofValue
+
+            if ch.isdigit():
+                return interpretNumber(rdr, ch)
+
+            m = self.macros.get(ch)
+            if m is not None:
+                ret = m(rdr, ch)
+                if ret is rdr:
+                    continue
+                return ret
+
+            if ch in "+-":
+                ch2 = read1(rdr)
+                rdr.back()
+                if ch2.isdigit():
+                    return interpretNumber(rdr, ch)
+
+            return interpretToken(readToken(rdr, ch))
+
+    def readDelimitedList(self, delim, rdr):
+        """Reads values until delim, returns them in a Python list."""
+        firstline = rdr.lineCol()[0]
+        scan = isinstance(rdr, StringReader)
+        a = []
+        while True:
+            if scan:
+                rdr.scan(whiteSpacePat)
+            ch = read1(rdr)
+            while ch in whiteSpace:
+                ch = read1(rdr)
+            if ch == "":
+                raise ReaderException("EOF while reading starting at line"
+                                      " {0}".format(firstline))
+            if ch == delim:
+                return a
+            m = self.macros.get(ch)
+            if m is not None:
+                o = m(rdr, ch)
+                if o is not rdr:
+                    a.append(o)
+            else:
+                rdr.back()
+                a.append(self.read(rdr))
+
+    def unmatchedDelimiterReader(self, rdr, delim):
+        raise ReaderException("Unmatched delimiter: {0}".format(delim), rdr)
+
+    def listReader(self, rdr, leftparen):
+        return RT.list(*self.readDelimitedList(")", rdr))
+
+    def vectorReader(self, rdr, leftbracket):
+        return vectorFromList(self.readDelimitedList("]", rdr))
+
+    def mapReader(self, rdr, leftbrace):
+        lst = self.readDelimitedList("}", rdr)
+        if len(lst) % 2:
+            raise ReaderException("Map literal must contain an even number"
+                                  " of forms", rdr)
+        return mapFromItems(zip(lst[::2], lst[1::2]))
+
+    def setReader(self, rdr, leftbrace):
+        try:
+            return createWithCheck(self.readDelimitedList("}", rdr))
+        except IllegalArgumentException as e:
+            raise ReaderException(e.args[0], rdr)
+
+    def discardReader(self, rdr, underscore):
+        self.read(rdr)
+        return rdr
+
+    def dispatchReader(self, rdr, hash):
+        ch = read1(rdr)
+        if ch == "":
+            raise ReaderException("EOF while reading character", rdr)
+        if ch == "{":
+            return self.setReader(rdr, ch)
+        if ch == "_":
+            return self.discardReader(rdr, ch)
+        if ch in whiteSpace or ch in self.macros:
+            raise ReaderException("No dispatch macro for: ({0})".format(ch),
+                                  rdr)
+        return self.taggedReader(rdr, ch)
+
+    def taggedReader(self, rdr, initch):
+        tag = interpretToken(readToken(rdr, initch))
+        if not isinstance(tag, Symbol):
+            raise ReaderException("Reader tag must be a symbol", rdr)
+        value = self.read(rdr)
+        if self.readers is not None and tag in self.readers:
+            return self.readers[tag](value)
+        if tag in defaultReaders:
+            return defaultReaders[tag](value)
+        if self.default is not None:
+            return self.default(tag, value)
+        raise ReaderException("No reader function for tag {0}".format(tag),
+                              rdr)
+
+
+def readString(s, readers=None, default=None, eofValue=None):
+    """Returns the first value of the string s, or eofValue if there is
+    none."""
+    return EdnReader(readers, default).read(StringReader(s), False, eofValue)
+
+
+def readAll(fl, readers=None, default=None):
+    """Yields the top-level values of fl, a file object or a StringReader.
+    The values are read as they are consumed, none are kept after that.
+    """
+    rdr = fl if isinstance(fl, StringReader) else BufferedReader(fl)
+    reader = EdnReader(readers, default)
+    while True:
+        value = reader.read(rdr, False, EOF)
+        if value is EOF:
+            return
+        yield value
@@ -1,110 +1,6 @@
-from clojure.lang.aseq import ASeq
-from clojure.lang.cljexceptions import IllegalAccessError, ArityException, InvalidArgumentException
+import mmap
 
-def isReader(rdr):
-    return hasattr(rdr, "read") and hasattr(rdr, "tell")
-
-
-class FileSeq(ASeq):
-    def __init__(self, *args):
-        if len(args) == 1:
-            if not isReader(args[0]):
-                raise InvalidArgumentException("must pass in a object with a read() method")
-            FileSeq.__init__(self, args[0], 1, 1, args[0].read(1))
-            return
-        elif len(args) == 4:
-            self.rdr, self.line, self.col, self.ccur = args
-            self._next = None
-
-    def first(self):
-        return self.ccur
-
-    def reuseNext(self, nxt):
-        c = self.rdr.read(1)
-        if c == "":
-            return None
-
-        newline = self.line + 1 if c == '\n' else self.line
-        newcol = 1 if newline != self.line else self.col + 1
-
-        nxt.rdr = self.rdr
-        nxt.line = newline
-        nxt.col = newcol
-        nxt.ccur = c
-        nxt._next = None
-        return nxt
-
-    def next(self):
-        if self._next is not None:
-            return self._next
-        c = self.rdr.read(1)
-        if c == "":
-            return None
-
-        newline = self.line + 1 if c == '\n' else self.line
-        newcol = 1 if newline != self.line else self.col + 1
-
-        # Nasty mutation here please don't use this
-        # with threads
-        self._next = FileSeq(self.rdr, newline, newcol, c)
-        return self._next
-
-    def lineCol(self):
-        return [self.line, self.col]
-
-    def tell(self):
-        return self.rdr.tell()
-
-    def atLineStart(self):
-        return self.col == 1
-
-    def atLineEnd(self):
-        nxt = self.next()
-        return True if nxt is None else nxt.atLineStart()
-
-    def __eq__(self, other):
-        if isinstance(other, str):
-            return self.ccur == other
-        if other is None:
-            return False
-        if self is other:
-            return True
-        if self.rdr is other.rdr and \
-           self.tell() == other.tell():
-            return True
-        return False
-
-    def __ne__(self, other):
-        return not self == other
-
-
-class MutatableFileSeq(ASeq):
-    def __init__(self, fs):
-        self.fs = fs
-        self.old = None
-        self.d = dir
-
-    def first(self):
-        return self.fs.first()
-
-    def next(self):
-        o = self.old
-        self.old = self.fs
-        if o is not None:
-            ret = self.fs.reuseNext(o)
-        else:
-            ret = self.fs.next()
-        self.fs = ret
-        return ret
-
-    def back(self):
-        if self.old is None:
-            raise InvalidArgumentException("Can only go back once")
-        self.fs = self.old
-        self.old = None
-
-    def lineCol(self):
-        return self.fs.lineCol() if self.fs is not None else [None, None]
+from clojure.lang.cljexceptions import IllegalAccessError
 
 
 class StringReader(object):
@@ -141,6 +37,30 @@ class StringReader(object):
     def lineCol(self):
         return [self.line, self.col]
 
+    def scan(self, pattern):
+        """Reads the run of characters matching the compiled regex pattern
+        at the current position, and returns it.
+
+        The reader ends up as if the characters had been read one by one:
+        back() goes back to the last one.
+        """
+        start = self.idx + 1
+        return self.advance(start, pattern.match(self.s, start).end())
+
+    def advance(self, start, end):
+        if end <= start:
+            return ""
+        run = self.s[start:end]
+        newlines = run.count("\n")
+        if newlines:
+            self.line += newlines
+            self.col = 1
+        self.lastline = self.line - 1 if run[-1] == "\n" else self.line
+        self.lastcol = self.col
+        self.haslast = True
+        self.idx = end - 1
+        return run
+
     def back(self):
         if not self.haslast:
             raise IllegalAccessError()
@@ -148,3 +68,94 @@ class StringReader(object):
         self.haslast = False
         self.line = self.lastline
         self.col = self.lastcol
+
+
+class BufferedReader(StringReader):
+    """A StringReader over a file object, read blocksize characters at a
+    time. Only the current block, and the character before it for back(),
+    are kept in memory: reading a character is amortized O(1) however large
+    the file is, and runs spanning blocks are scanned block by block.
+    """
+
+    def __init__(self, fl, blocksize=65536):
+        StringReader.__init__(self, "")
+        self.fl = fl
+        self.blocksize = blocksize
+        self.eof = False
+
+    def close(self):
+        self.fl.close()
+
+    def fill(self):
+        """Reads the next block, dropping the characters before the current
+        one. Returns False at the end of the file.
+        """
+        if self.eof:
+            return False
+        block = self.fl.read(self.blocksize)
+        if not block:
+            self.eof = True
+            return False
+        keep = max(self.idx, 0)
+        self.s = self.s[keep:] + block
+        self.idx -= keep
+        return True
+
+    def read(self):
+        self.lastcol = self.col
+        self.lastline = self.line
+        self.haslast = True
+        self.idx += 1
+        if self.idx >= len(self.s) and not self.fill():
+            return ""
+
+        cc = self.s[self.idx]
+        if cc == '\n':
+            self.line += 1;
+            self.col = 1
+        return cc
+
+    def scan(self, pattern):
+        start = self.idx + 1
+        end = pattern.match(self.s, start).end()
+        if end < len(self.s):
+            return self.advance(start, end)
+        # the run may go on in the next block
+        runs = [self.advance(start, end)]
+        while self.fill():
+            start = self.idx + 1
+            end = pattern.match(self.s, start).end()
+            runs.append(self.advance(start, end))
+            if end < len(self.s):
+                break
+        return "".join(runs)
+
+
+class MappedReader(StringReader):
+    """A StringReader over a memory-mapped file: the file is paged in as it
+    is read, and only the tokens and strings read are copied out of it.
+    """
+
+    def close(self):
+        self.s.close()
+
+
+def mapFile(filename):
+    """Returns the contents of filename mapped read-only, or None for the
+    files that can't be mapped, like empty files and pipes.
+    """
+    with open(filename, "rb") as fl:
+        try:
+            return mmap.mmap(fl.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            return None
+
+
+def openReader(filename):
+    """Returns a MappedReader over filename, or a BufferedReader if it
+    can't be mapped. Both have a close method.
+    """
+    mapped = mapFile(filename)
+    if mapped is not None:
+        return MappedReader(mapped)
+    return BufferedReader(open(filename))
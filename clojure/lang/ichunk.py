@@ -0,0 +1,13 @@
+from clojure.lang.cljexceptions import AbstractMethodCall
+from clojure.lang.indexed import Indexed
+
+
+class IChunk(Indexed):
+    def dropFirst(self):
+        """Return a chunk of the items of this one but the first."""
+        raise AbstractMethodCall(self)
+
+    def reduce(self, f, start):
+        """Return the reduction of the items of this chunk by f, from
+        start."""
+        raise AbstractMethodCall(self)
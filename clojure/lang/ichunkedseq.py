@@ -0,0 +1,17 @@
+from clojure.lang.cljexceptions import AbstractMethodCall
+from clojure.lang.iseq import ISeq
+from clojure.lang.sequential import Sequential
+
+
+class IChunkedSeq(Sequential, ISeq):
+    def chunkedFirst(self):
+        """Return the IChunk of the first items of this seq."""
+        raise AbstractMethodCall(self)
+
+    def chunkedNext(self):
+        """Return the seq of the items after the first chunk or None."""
+        raise AbstractMethodCall(self)
+
+    def chunkedMore(self):
+        """Return the seq of the items after the first chunk or ()."""
+        raise AbstractMethodCall(self)
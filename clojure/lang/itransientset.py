@@ -0,0 +1,14 @@
+from clojure.lang.cljexceptions import AbstractMethodCall
+from clojure.lang.itransientcollection import ITransientCollection
+from clojure.lang.counted import Counted
+
+
+class ITransientSet(ITransientCollection, Counted):
+    def disjoin(self, key):
+        raise AbstractMethodCall(self)
+
+    def __contains__(self, item):
+        raise AbstractMethodCall(self)
+
+    def get(self, key):
+        raise AbstractMethodCall(self)
@@ -0,0 +1,11 @@
+from clojure.lang.cljexceptions import AbstractMethodCall
+from clojure.lang.indexed import Indexed
+from clojure.lang.itransientassociative import ITransientAssociative
+
+
+class ITransientVector(ITransientAssociative, Indexed):
+    def assocN(self, i, val):
+        raise AbstractMethodCall(self)
+
+    def pop(self):
+        raise AbstractMethodCall(self)
@@ -0,0 +1,327 @@
+"""Lazy, compile-on-first-use loading of a clj file.
+
+A LazyNamespace skims its file into top-level forms without reading them.
+Definitions (def, defn, defmacro, ...) are only read, compiled and executed
+once the name they define is resolved, through
+clojure.lang.namespace.findItem or the compiler. Every other form is
+executed in file order while the file is indexed, so side effects such as
+set-macro, extend or require still happen where the file puts them.
+
+Definitions are resolved against the position of the form that needs them:
+a form loaded lazily sees the last definition of a name that precedes it in
+the file, code running after the file is loaded sees the last one. A name
+that was already loaded from a later definition is not rolled back.
+"""
+
+import re
+import threading
+
+from clojure.lang.fileseq import StringReader, mapFile
+from clojure.lang.globals import currentCompiler
+import clojure.lang.lispreader as lispreader
+import clojure.lang.loadprofile as loadprofile
+import clojure.lang.namespace as namespace
+import clojure.lang.rt as RT
+from clojure.lang.symbol import Symbol
+from clojure.lang.var import Var, threadBindings
+
+
+# types and protocols are not deferred: extending a protocol to every
+# subclass of a type only reaches the subclasses that exist at that point
+DEF_HEADS = frozenset(["def", "defn", "defn-", "defmacro", "defonce",
+                       "definline", "defmulti"])
+
+# a datum needs its prefix and the datum (or two, for metadata and discards)
+# that follows to make a complete form
+_ONE_DATUM_PREFIXES = frozenset(["'", "`", "~", "~@", "@", "#'", "#"])
+_TWO_DATUM_PREFIXES = frozenset(["^", "#^", "#_"])
+
+_SKIM_RE = re.compile(r"""
+    (?P<ws>[\s,]+)
+  | (?P<comment>;[^\n]*)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<char>\\.[^\s,"\\;()\[\]{}]*)
+  | (?P<open>[(\[{])
+  | (?P<close>[)\]}])
+  | (?P<token>[^\s,"\\;()\[\]{}]+)
+""", re.S | re.X)
+
+_HEAD_RE = re.compile(r"\(\s*([^\s,\"\\;()\[\]{}]+)")
+
+
+def _datumsNeeded(token):
+    """Returns how many data must follow a top-level token to complete it.
+    """
+    if token in _ONE_DATUM_PREFIXES:
+        return 1
+    if token in _TWO_DATUM_PREFIXES:
+        return 2
+    if token[0] == "^" or token.startswith("#^") or token.startswith("#_"):
+        return 1
+    return 0
+
+
+def countLines(text, start, end):
+    """Returns the number of newlines in text[start:end], text being a
+    string or a memory-mapped file.
+    """
+    return text[start:end].count("\n")
+
+
+def skim(text):
+    """Splits clj source into its top-level forms, without reading them.
+
+    Returns a list of (start, end, line) tuples, where text[start:end] is
+    the source of a form and line the line number it starts on.
+    """
+    spans = []
+    depth = 0
+    pending = 0
+    start = None
+    line = 1
+    scanned = 0
+    for m in _SKIM_RE.finditer(text):
+        kind = m.lastgroup
+        if kind == "ws" or kind == "comment":
+            continue
+        if start is None:
+            start = m.start()
+            line += countLines(text, scanned, start)
+            scanned = start
+        if kind == "open":
+            depth += 1
+            continue
+        if kind == "close":
+            depth -= 1
+            if depth > 0:
+                continue
+        elif depth > 0:
+            continue
+        elif kind == "token":
+            needed = _datumsNeeded(m.group())
+            if needed:
+                pending += needed
+                continue
+        # a complete datum at the top level
+        if pending:
+            pending -= 1
+            if pending:
+                continue
+        spans.append((start, m.end(), line))
+        start = None
+        depth = 0
+    if start is not None:
+        # unterminated, reading it will report the error
+        spans.append((start, len(text),
+                      line + countLines(text, scanned, start)))
+    return spans
+
+
+class LazyNamespace(object):
+    """The index of a lazily loaded clj file.
+    """
+
+    def __init__(self, filename, text):
+        self.filename = filename
+        # the source, possibly a mapping of the file, until it is indexed
+        self.text = text
+        self.forms = skim(text)
+        # form index -> source of the deferred forms not loaded yet, copied
+        # out of text once the file is indexed
+        self.sources = {}
+        # form index -> namespace name it is compiled in
+        self.formNS = [None] * len(self.forms)
+        # name -> indices of the forms defining it, in file order
+        self.defs = {}
+        # name -> index of the form it was last loaded from
+        self.loadedAt = {}
+        self.done = set()
+        self.stack = []
+        self.names = set()
+        self.lock = threading.RLock()
+
+    def index(self):
+        """Executes the forms that don't define anything and registers the
+        namespaces the file defines as lazy. Returns self.
+        """
+        RT.init()
+        comp = Compiler()
+        comp.setFile(self.filename)
+        deferred = []
+        for i, span in enumerate(self.forms):
+            name = self.classify(span)
+            if name is not None:
+                self.defs.setdefault(name, []).append(i)
+                deferred.append(i)
+        deferred = set(deferred)
+        with self.lock:
+            try:
+                with threadBindings({currentCompiler: comp}):
+                    for i in range(len(self.forms)):
+                        self.formNS[i] = comp.getNS().__name__
+                        if i in deferred:
+                            continue
+                        self.done.add(i)
+                        ns = comp.getNS()
+                        before = self.snapshot(ns)
+                        loaded = dict(self.loadedAt)
+                        self.stack.append(i)
+                        try:
+                            self.execute(comp, i)
+                        finally:
+                            self.stack.pop()
+                        self.register(comp.getNS())
+                        self.noteChanges(ns, before, loaded, i)
+            finally:
+                self.detach()
+        return self
+
+    def detach(self):
+        """Copies the source of the forms not loaded yet out of text and
+        closes it, if it is a mapping of the file: once indexed, the
+        namespace doesn't depend on the file being left unchanged.
+        """
+        text = self.text
+        for i, (start, end, line) in enumerate(self.forms):
+            if i not in self.done:
+                self.sources[i] = text[start:end]
+        self.text = None
+        if hasattr(text, "close"):
+            text.close()
+
+    def register(self, ns):
+        if ns.__name__ not in self.names:
+            self.names.add(ns.__name__)
+            namespace.lazyNamespaces[ns.__name__] = self
+
+    def classify(self, span):
+        """Returns the name a form defines, or None.
+        """
+        start, end, line = span
+        m = _HEAD_RE.match(self.text, start, end)
+        if m is None:
+            return None
+        head = m.group(1)
+        if head not in DEF_HEADS:
+            return None
+        rdr = StringReader(self.text)
+        rdr.idx = m.end() - 1
+        rdr.line = line + countLines(self.text, start, m.end())
+        EOF = object()
+        try:
+            arg = lispreader.read(rdr, False, EOF, True)
+        except Exception:
+            return None
+        if isinstance(arg, Symbol) and arg.ns is None:
+            return arg.name
+        return None
+
+    def execute(self, comp, i):
+        """Reads, compiles and executes form i with comp.
+        """
+        with loadprofile.form(self.filename, self.forms[i][2]) as timing:
+            with loadprofile.phase("read"):
+                form = self.readForm(i)
+            with loadprofile.phase("compile"):
+                code = comp.compile(form)
+            comp.executeCode(code)
+            timing.ns = comp.getNS().__name__
+
+    def readForm(self, i):
+        start, end, line = self.forms[i]
+        text = self.sources.get(i)
+        if text is None:
+            text = self.text
+        else:
+            start = 0
+        rdr = StringReader(text)
+        rdr.idx = start - 1
+        rdr.line = line
+        return lispreader.read(rdr, True, None, True)
+
+    def snapshot(self, ns):
+        return dict((k, v.root.get()) for k, v in ns.__dict__.items()
+                    if isinstance(v, Var) and v.ns is ns)
+
+    def noteChanges(self, ns, before, loaded, i):
+        """Records the Vars an executed form changed, other than by loading
+        their definitions.
+        """
+        for k, v in ns.__dict__.items():
+            if (isinstance(v, Var) and v.ns is ns
+                and before.get(k, _MISSING) is not v.root.get()
+                and self.loadedAt.get(k) == loaded.get(k)):
+                self.loadedAt[k] = i
+
+    def position(self):
+        return self.stack[-1] if self.stack else len(self.forms)
+
+    def load(self, i):
+        """Compiles and executes the deferred form i.
+        """
+        comp = Compiler()
+        comp.setNS(self.formNS[i])
+        comp.setFile(self.filename)
+        self.done.add(i)
+        self.stack.append(i)
+        try:
+            with threadBindings({currentCompiler: comp}):
+                self.execute(comp, i)
+        except:
+            self.done.discard(i)
+            raise
+        finally:
+            self.stack.pop()
+        self.sources.pop(i, None)
+
+    def ensureDefined(self, name):
+        """Loads the definition of name visible from the current position,
+        if it was not loaded yet.
+        """
+        indices = self.defs.get(name)
+        if indices is None:
+            return
+        with self.lock:
+            pos = self.position()
+            for i in reversed(indices):
+                if i < pos and i not in self.stack:
+                    break
+            else:
+                return
+            if self.loadedAt.get(name, -1) >= i or i in self.done:
+                return
+            self.load(i)
+            self.loadedAt[name] = i
+
+    def loadAll(self):
+        """Loads the last definition of every name, in file order.
+        """
+        last = sorted((indices[-1], name)
+                      for name, indices in self.defs.items())
+        for i, name in last:
+            self.ensureDefined(name)
+
+
+def loadLazy(filename):
+    """Indexes a clj file, deferring its definitions until they're used.
+
+    The file is mapped in memory while it is indexed. The source of the
+    deferred forms is then copied out of the mapping, which is closed.
+    """
+    text = mapFile(filename)
+    if text is None:
+        with open(filename) as fl:
+            text = fl.read()
+    return LazyNamespace(filename, text).index()
+
+
+def loadAll():
+    """Loads every deferred definition of every lazy namespace.
+    """
+    for lazy in set(namespace.lazyNamespaces.values()):
+        lazy.loadAll()
+
+
+_MISSING = object()
+
+from clojure.lang.compiler import Compiler
@@ -7,7 +7,7 @@ import unicodedata
 
 from clojure.lang.cljexceptions import ReaderException, IllegalStateException
 from clojure.lang.cljkeyword import Keyword, TAG_KEY, T, LINE_KEY
-from clojure.lang.fileseq import FileSeq, MutatableFileSeq, StringReader
+from clojure.lang.fileseq import StringReader
 from clojure.lang.globals import currentCompiler
 from clojure.lang.ipersistentlist import IPersistentList
 from clojure.lang.ipersistentvector import IPersistentVector
@@ -16,11 +16,13 @@ from clojure.lang.ipersistentset import IPersistentSet
 from clojure.lang.ipersistentcollection import IPersistentCollection
 from clojure.lang.iseq import ISeq
 from clojure.lang.persistenthashmap import EMPTY as EMPTY_MAP
+from clojure.lang.persistenthashmap import fromItems as mapFromItems
 from clojure.lang.persistentvector import EMPTY as EMPTY_VECTOR
+from clojure.lang.persistentvector import fromList as vectorFromList
 import clojure.lang.persistenthashset
 from clojure.lang.persistenthashset import createWithCheck
 import clojure.lang.rt as RT
-from clojure.lang.symbol import Symbol
+from clojure.lang.symbol import Symbol, intern as internSymbol
 from clojure.lang.var import Var, threadBindings
 import clojure.lang.namespace as namespace
 
@@ -169,6 +171,8 @@ def read(rdr, eofIsError, eofValue, isRecursive):
     5. check for a number (with [+-])
     6. check for a symbol"""
     while True:
+        if isinstance(rdr, StringReader):
+            rdr.scan(whiteSpacePat)
         ch = read1(rdr)
 
         while ch in whiteSpace:
@@ -328,37 +332,48 @@ def stringReader(rdr, doublequote):
 
     May raise ReaderException. Return a str or unicode object."""
     buf = []
-    ch = read1(rdr)
+    scan = isinstance(rdr, StringReader)
     while True:
+        if scan:
+            buf.append(rdr.scan(stringPat))
+        ch = read1(rdr)
         if ch == "":
             raise ReaderException("EOF while reading string")
         if ch == '\\':
-            ch = read1(rdr)
-            if ch == "":
-                raise ReaderException("EOF while reading string")
-            elif ch in chrLiterals:
-                ch = chrLiterals[ch]
-            elif ch == "u":
-                ch = read1(rdr)
-                if not ch in hexChars:
-                    raise ReaderException("Hexidecimal digit expected after"
-                                          " \\u in literal string, got:"
-                                          " ({0})".format(ch), rdr)
-                ch = readUnicodeChar(rdr, ch, 16, 4, True)
-            elif ch in octalChars:
-                ch = readUnicodeChar(rdr, ch, 8, 3, False)
-                if ord(ch) > 255:
-                    raise ReaderException("Octal escape sequence in literal"
-                                          " string must be in range [0, 377]"
-                                          ", got: ({0})".format(ord(ch)),
-                                          rdr)
-            else:
-                raise ReaderException("Unsupported escape character in"
-                                      " literal string: \\{0}".format(ch), rdr)
+            ch = readEscape(rdr)
         elif ch == '"':
             return "".join(buf)
-        buf += ch
+        buf.append(ch)
+
+
+def readEscape(rdr):
+    """Read the escape sequence following a backslash in a literal string.
+
+    rdr -- a read/unread-able object
+
+    May raise ReaderException. Return the character it stands for."""
+    ch = read1(rdr)
+    if ch == "":
+        raise ReaderException("EOF while reading string")
+    elif ch in chrLiterals:
+        return chrLiterals[ch]
+    elif ch == "u":
         ch = read1(rdr)
+        if not ch in hexChars:
+            raise ReaderException("Hexidecimal digit expected after"
+                                  " \\u in literal string, got:"
+                                  " ({0})".format(ch), rdr)
+        return readUnicodeChar(rdr, ch, 16, 4, True)
+    elif ch in octalChars:
+        ch = readUnicodeChar(rdr, ch, 8, 3, False)
+        if ord(ch) > 255:
+            raise ReaderException("Octal escape sequence in literal"
+                                  " string must be in range [0, 377]"
+                                  ", got: ({0})".format(ord(ch)),
+                                  rdr)
+        return ch
+    raise ReaderException("Unsupported escape character in"
+                          " literal string: \\{0}".format(ch), rdr)
 
 
 def readToken(rdr, initch):
@@ -369,6 +384,8 @@ def readToken(rdr, initch):
 
     Collect characters until the eof is reached, white space is read, or a
     terminating macro character is read."""
+    if isinstance(rdr, StringReader):
+        return initch + rdr.scan(tokenPat)
     sb = [initch]
     while True:
         ch = read1(rdr)
@@ -403,15 +420,17 @@ def readNumber(rdr, initch):
     initch -- the first character of the number
 
     May raise ReaderException."""
-    sb = [initch]
-    while True:
-        ch = read1(rdr)
-        if ch == "" or ch in whiteSpace or isMacro(ch):
-            rdr.back()
-            break
-        sb.append(ch)
-
-    s = "".join(sb)
+    if isinstance(rdr, StringReader):
+        s = initch + rdr.scan(numberPat)
+    else:
+        sb = [initch]
+        while True:
+            ch = read1(rdr)
+            if ch == "" or ch in whiteSpace or isMacro(ch):
+                rdr.back()
+                break
+            sb.append(ch)
+        s = "".join(sb)
     try:
         n = matchNumber(s)
     except Exception as e:
@@ -465,6 +484,8 @@ def commentReader(rdr, semicolon):
     semicolon -- ignored
 
     Return rdr"""
+    if isinstance(rdr, StringReader):
+        rdr.scan(commentPat)
     while True:
         ch = read1(rdr)
         if ch in commentTerminators:
@@ -529,8 +550,7 @@ def vectorReader(rdr, leftbracket):
     leftbracket -- ignored"""
     startline = rdr.lineCol()[0]
     lst = readDelimitedList(']', rdr, True)
-    lst = apply(RT.vector, lst)
-    return lst
+    return vectorFromList(lst)
 
 def mapReader(rdr, leftbrace):
     """Read and return a possibly empty map {} from rdr.
@@ -539,8 +559,11 @@ def mapReader(rdr, leftbrace):
     leftbrace -- ignored"""
     startline = rdr.lineCol()[0]
     lst = readDelimitedList('}', rdr, True)
-    lst = apply(RT.map, lst)
-    return lst
+    if len(lst) % 2:
+        raise ReaderException(
+            "Map literal must contain an even number of forms at line {0}"
+            .format(startline))
+    return mapFromItems(zip(lst[::2], lst[1::2]))
 
 
 def setReader(rdr, leftbrace):
@@ -573,8 +596,11 @@ def readDelimitedList(delim, rdr, isRecursive):
     May raise ReaderException. Return a Python list of those objects."""
     firstline = rdr.lineCol()[0]
     a = []
+    scan = isinstance(rdr, StringReader)
 
     while True:
+        if scan:
+            rdr.scan(whiteSpacePat)
         ch = read1(rdr)
         while ch in whiteSpace:
             ch = read1(rdr)
@@ -838,7 +864,7 @@ def matchSymbol(s):
         if iskeyword:
             return Keyword(s[1:])
         else:
-            return Symbol(ns, name)
+            return internSymbol(ns, name)
     return None
 
 
@@ -1074,3 +1100,19 @@ dispatchMacros = {"\"": regexReader,
                   "r": rawRegexReader,
                   "=": evalReaderNotImplemented, # temporary?
                   }
+
+
+# Runs of characters a StringReader reads in one go with scan(), instead of
+# one read1() per character: white space, the rest of a token, a number or
+# a comment, and the characters of a string up to a quote or an escape.
+def runPattern(chars, negate=False):
+    return re.compile("[{0}{1}]*".format("^" if negate else "",
+                                         "".join(re.escape(c)
+                                                 for c in sorted(chars))))
+
+whiteSpacePat = runPattern(whiteSpace)
+tokenPat = runPattern(whiteSpace | set(c for c in macros
+                                       if isTerminatingMacro(c)), True)
+numberPat = runPattern(whiteSpace | set(macros), True)
+commentPat = runPattern(commentTerminators - set([""]), True)
+stringPat = runPattern('"\\', True)
@@ -0,0 +1,170 @@
+"""Timing of the phases of loading clj code, per namespace and per top-level
+form.
+
+The phases are read, macroexpand, compile, assemble (byteplay's to_code)
+and eval. A phase running inside another one, like the macroexpansions
+done while compiling a form or a namespace required while evaluating one,
+is only counted once: the enclosing phase is paused meanwhile.
+
+Profiling is off by default, see enable, and report. clojure.main turns it
+on with --profile-load, or at startup when CLOJURE_PY_PROFILE_LOAD is set.
+"""
+
+import sys
+import threading
+import time
+
+
+PHASES = ("read", "macroexpand", "compile", "assemble", "eval")
+
+enabled = False
+
+# namespace name -> {phase: seconds}
+namespaces = {}
+# FormTimings of the loaded top-level forms, in load order
+forms = []
+
+# guards namespaces and forms, which the loads of every thread record to
+_lock = threading.Lock()
+
+
+class _Stacks(threading.local):
+    """The phases and forms a thread is timing, innermost last, and the
+    time its innermost phase was last resumed at."""
+    def __init__(self):
+        self.phases = []
+        self.forms = []
+        self.mark = 0.0
+
+_stacks = _Stacks()
+
+
+def enable(enable=True):
+    """Switches profiling on or off.
+    """
+    global enabled
+    enabled = enable
+
+
+def reset():
+    """Forgets the timings recorded so far.
+    """
+    with _lock:
+        namespaces.clear()
+        del forms[:]
+
+
+def _charge(now):
+    stacks = _stacks
+    if stacks.phases and stacks.forms:
+        stacks.forms[-1].times[stacks.phases[-1]] += now - stacks.mark
+    stacks.mark = now
+
+
+class Phase(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        _charge(time.time())
+        _stacks.phases.append(self.name)
+
+    def __exit__(self, *exc):
+        _charge(time.time())
+        _stacks.phases.pop()
+
+
+class NoPhase(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+_noPhase = NoPhase()
+
+
+def phase(name):
+    """Returns a context manager timing the phase name, when profiling is
+    on.
+    """
+    return Phase(name) if enabled else _noPhase
+
+
+class FormTiming(object):
+    """The time a top-level form spent in each phase.
+
+    Used as a context manager around the loading of the form; the loader
+    sets ns to the name of the namespace the form ended in, a form without
+    ns (the end of the file) is not recorded.
+    """
+
+    def __init__(self, filename, line=None):
+        self.filename = filename
+        self.line = line
+        self.ns = None
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.timed = False
+
+    def total(self):
+        return sum(self.times.values())
+
+    def __enter__(self):
+        if enabled:
+            self.timed = True
+            _charge(time.time())
+            _stacks.forms.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        if not self.timed:
+            return
+        _charge(time.time())
+        _stacks.forms.pop()
+        if self.ns is None:
+            return
+        with _lock:
+            forms.append(self)
+            totals = namespaces.setdefault(self.ns,
+                                           dict.fromkeys(PHASES, 0.0))
+            for name, seconds in self.times.items():
+                totals[name] += seconds
+
+
+def form(filename, line=None):
+    """Returns a FormTiming for a top-level form of filename.
+    """
+    return FormTiming(filename, line)
+
+
+def slowest(limit=10):
+    """Returns the limit FormTimings with the largest total time.
+    """
+    with _lock:
+        return sorted(forms, key=FormTiming.total, reverse=True)[:limit]
+
+
+def report(out=None, limit=10):
+    """Writes the time spent in each phase per namespace, and the slowest
+    top-level forms.
+    """
+    out = out or sys.stderr
+    header = "".join("{0:>12}".format(name) for name in PHASES + ("total",))
+    out.write("{0:<32}{1}\n".format("namespace", header))
+    with _lock:
+        totals = [(nsname, dict(times))
+                  for nsname, times in namespaces.items()]
+    for nsname, times in sorted(totals, key=lambda x: sum(x[1].values()),
+                                reverse=True):
+        out.write("{0:<32}{1}{2:12.3f}\n".format(
+            nsname,
+            "".join("{0:12.3f}".format(times[name]) for name in PHASES),
+            sum(times.values())))
+    out.write("\nslowest forms:\n")
+    for timing in slowest(limit):
+        where = "{0}:{1}".format(timing.filename,
+                                 "?" if timing.line is None else timing.line)
+        phases = ", ".join("{0} {1:.3f}".format(name, timing.times[name])
+                           for name in PHASES if timing.times[name] >= 0.001)
+        out.write("{0:8.3f}  {1} ({2}) {3}\n".format(
+            timing.total(), where, timing.ns, phases))
@@ -0,0 +1,176 @@
+"""A bounded cache of macro expansions for the compiler.
+
+An expansion is looked up by the macro fn, the namespace it is expanded in
+and a structural key of the form, metadata included: re-compiling the same
+form in the same place (reloading a namespace, evaluating it again in the
+REPL) reuses the expansion instead of calling the macro again. Redefining a
+macro gives it a new fn, its old expansions are no longer found and age out
+of the cache.
+
+Macros are assumed to depend only on their arguments and namespace: a
+macro that has side effects or reads other state when expanding should not
+be expanded through the cache, see enable. A cached expansion keeps the
+gensyms it was built with.
+
+The cache is shared by the threads compiling at once: its structures are
+only touched under locks, macros are called without holding them.
+"""
+
+from collections import OrderedDict
+import threading
+
+from clojure.lang.cljkeyword import Keyword, LINE_KEY
+from clojure.lang.ipersistentmap import IPersistentMap
+from clojure.lang.ipersistentset import IPersistentSet
+from clojure.lang.ipersistentvector import IPersistentVector
+from clojure.lang.iseq import ISeq
+import clojure.lang.rt as RT
+from clojure.lang.symbol import Symbol
+
+
+class Unhashable(Exception):
+    pass
+
+
+# id of a collection -> (collection, key). Expansions are built from the
+# forms they expand, keys of nested macro calls reuse the keys computed for
+# the enclosing call.
+_keys = {}
+_keysLock = threading.Lock()
+MAX_KEYS = 8192
+
+
+def _metaKey(form):
+    m = getattr(form, "meta", None)
+    m = m() if m is not None else None
+    if m is None:
+        return None
+    # most forms only carry the line the reader found them on
+    if len(m) == 1 and LINE_KEY in m:
+        return m[LINE_KEY]
+    return _key(m)
+
+
+def _key(form):
+    # keys are hashed whole on every lookup, symbols and keywords are keyed
+    # by their names whose hashes Python caches
+    if type(form) is Symbol:
+        return (Symbol, _metaKey(form), form.ns, form.name)
+    if type(form) is Keyword:
+        return (Keyword, form.sym.ns, form.sym.name)
+    if not isinstance(form, (ISeq, IPersistentVector, IPersistentMap,
+                             IPersistentSet)):
+        try:
+            hash(form)
+        except TypeError:
+            raise Unhashable()
+        # 1, 1.0 and True are equal in Python but not the same form
+        return (type(form), _metaKey(form), form)
+    known = _keys.get(id(form))
+    if known is not None and known[0] is form:
+        return known[1]
+    key = _collKey(form)
+    if len(_keys) >= MAX_KEYS:
+        _keys.clear()
+    _keys[id(form)] = (form, key)
+    return key
+
+
+def _collKey(form):
+    if isinstance(form, ISeq):
+        items = []
+        s = form
+        while s is not None:
+            items.append(_key(s.first()))
+            s = s.next()
+        return (ISeq, _metaKey(form), tuple(items))
+    if isinstance(form, IPersistentVector):
+        return (IPersistentVector, _metaKey(form),
+                tuple(_key(x) for x in form))
+    if isinstance(form, IPersistentMap):
+        return (IPersistentMap, _metaKey(form),
+                frozenset((_key(e.getKey()), _key(e.getValue()))
+                          for e in RT.seqToTuple(RT.seq(form))))
+    return (IPersistentSet, _metaKey(form),
+            frozenset(_key(x) for x in RT.seqToTuple(RT.seq(form))))
+
+
+def formKey(form):
+    """Returns a hashable key that is equal for two forms only when they
+    are equal, of the same types and carry the same metadata, or None if
+    form holds something unhashable.
+    """
+    try:
+        with _keysLock:
+            return _key(form)
+    except Unhashable:
+        return None
+
+
+class MacroCache(object):
+    """A least recently used cache of macro expansions, with hit and miss
+    counters.
+    """
+
+    def __init__(self, maxsize=2048):
+        self.maxsize = maxsize
+        self.enabled = True
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def expand(self, macro, nsname, form, expander):
+        """Returns the expansion of form by macro in the namespace nsname,
+        calling expander() to expand it if it isn't cached.
+        """
+        if not self.enabled:
+            return expander()
+        fkey = formKey(form)
+        if fkey is None:
+            return expander()
+        key = (macro, nsname, fkey)
+        with self.lock:
+            try:
+                result = self.entries.pop(key)
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries[key] = result
+                return result
+        # the macro may expand others through the cache
+        result = expander()
+        with self.lock:
+            self.entries.pop(key, None)
+            if len(self.entries) >= self.maxsize:
+                self.entries.popitem(last=False)
+            self.entries[key] = result
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+        with _keysLock:
+            _keys.clear()
+
+    def stats(self):
+        """Returns a dict of the hit and miss counts and the size of the
+        cache.
+        """
+        with self.lock:
+            return {"hits": self.hits,
+                    "misses": self.misses,
+                    "size": len(self.entries),
+                    "maxsize": self.maxsize}
+
+
+cache = MacroCache()
+
+
+def enable(enabled=True):
+    """Switches macro expansion caching on or off.
+    """
+    cache.enabled = enabled
@@ -38,6 +38,34 @@ class Namespace(ModuleType):
         """
 
 
+# namespace name -> LazyNamespace loading it, see clojure.lang.lazynamespace
+lazyNamespaces = {}
+
+
+def realizeItem(ns, sym):
+    """Loads the definition of a Symbol from a lazily loaded namespace, if
+    it has not been loaded yet.
+
+    A namespace that doesn't define the Symbol gets the public Var a lazy
+    namespace defines for it, the way it would have been referred if the
+    lazy namespace had been loaded when it was created.
+    """
+    if sym.ns is not None and sym.ns != ns.__name__:
+        ns = findNS(sym.ns, fromns=ns)
+        if ns is None:
+            return
+    lazy = lazyNamespaces.get(ns.__name__)
+    if lazy is not None:
+        lazy.ensureDefined(sym.name)
+    elif sym.ns is None and not hasattr(ns, sym.name):
+        for nsname, lazy in lazyNamespaces.items():
+            lazy.ensureDefined(sym.name)
+            v = getattr(sys.modules.get(nsname), sym.name, None)
+            if isinstance(v, Var) and v.ns.__name__ == nsname and v.isPublic():
+                setattr(ns, sym.name, v)
+                return
+
+
 def findNS(name, fromns=None):
     """Finds a namespace, possibly as an defined as an alias in another one.
     """
@@ -81,6 +109,8 @@ def findItem(ns, sym):
 
     None is returned if the Symbol cannot be resolved.
     """
+    if lazyNamespaces:
+        realizeItem(ns, sym)
     if sym.ns == ns.__name__:
         return getattr(ns, sym.name, None)
     if sym.ns is not None:
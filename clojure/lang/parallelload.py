@@ -0,0 +1,278 @@
+"""Loading a tree of clj namespaces with several processes.
+
+Importing a namespace loads the namespaces it requires one after the other,
+depth-first, as its ns form is executed. preload instead reads the ns forms
+of the files up front to build the require graph, and compiles the
+namespaces whose compiled-namespace cache is stale in a pool of processes,
+each one as soon as the caches of the namespaces it requires are built.
+Namespaces that don't depend on each other are compiled concurrently, so
+the time spent compiling follows the longest chain of requires rather than
+the number of files. The namespaces are then imported in topological order
+in this process, from their caches.
+"""
+
+from contextlib import closing
+import multiprocessing
+from multiprocessing.queues import SimpleQueue
+import os
+import sys
+import traceback
+
+import clojure.main
+from clojure.main import cacheFresh
+from clojure.lang.cljexceptions import ReaderException, IllegalStateException
+from clojure.lang.cljkeyword import Keyword
+from clojure.lang.compiler import Compiler
+from clojure.lang.fileseq import openReader
+from clojure.lang.globals import currentCompiler
+from clojure.lang.ipersistentvector import IPersistentVector
+from clojure.lang.iseq import ISeq
+import clojure.lang.lispreader as lispreader
+from clojure.lang.symbol import Symbol
+from clojure.lang.var import threadBindings
+
+
+NS_SYMBOLS = (Symbol("ns"), Symbol("clojure.core", "ns"))
+REQUIRE_KEYWORDS = (Keyword("require"), Keyword("use"))
+
+
+def findSource(name):
+    """Returns the clj file the MetaImporter would load for the namespace
+    name, or None.
+    """
+    parts = name.split(".")
+    for d in sys.path:
+        base = os.path.join(d, *parts)
+        if os.path.exists(os.path.join(base, "__init__.py")):
+            return None
+        if os.path.isfile(base + ".clj"):
+            return base + ".clj"
+    return None
+
+
+def readNsForm(filename):
+    """Returns the first form of a clj file if it is an ns form, else None.
+    """
+    EOF = object()
+    r = openReader(filename)
+    with closing(r), threadBindings({currentCompiler: Compiler()}):
+        try:
+            form = lispreader.read(r, False, EOF, False)
+        except (ReaderException, IllegalStateException):
+            return None
+    if isinstance(form, ISeq) and form.first() in NS_SYMBOLS:
+        return form
+    return None
+
+
+def _libNames(spec, prefix=None):
+    """Yields the names of the libs of a libspec or prefix list, as load-libs
+    in core.clj interprets them.
+    """
+    if isinstance(spec, Symbol):
+        yield spec.name if prefix is None else prefix + "." + spec.name
+        return
+    if not isinstance(spec, (ISeq, IPersistentVector)):
+        return
+    items = list(spec)
+    if not items or not isinstance(items[0], Symbol):
+        return
+    if isinstance(spec, IPersistentVector) and (
+            len(items) < 2 or items[1] is None
+            or isinstance(items[1], Keyword)):
+        for name in _libNames(items[0], prefix):
+            yield name
+    elif prefix is None:
+        for sub in items[1:]:
+            for name in _libNames(sub, items[0].name):
+                yield name
+
+
+def requiredLibs(nsform):
+    """Returns the names of the libs an ns form requires or uses, in order.
+    """
+    libs = []
+    if nsform is None:
+        return libs
+    for ref in list(nsform)[2:]:
+        if isinstance(ref, ISeq) and ref.first() in REQUIRE_KEYWORDS:
+            for spec in list(ref)[1:]:
+                for name in _libNames(spec):
+                    if name not in libs:
+                        libs.append(name)
+    return libs
+
+
+def dependencyGraph(names):
+    """Returns the require graph of the namespaces names, as a dict of
+    namespace name -> (filename, names of the namespaces it requires).
+
+    The graph holds names and, transitively, the namespaces they require
+    that are clj files and aren't loaded yet.
+    """
+    found = {}
+    todo = list(names)
+    while todo:
+        name = todo.pop()
+        if name in found or name in sys.modules:
+            continue
+        filename = findSource(name)
+        if filename is None:
+            continue
+        found[name] = (filename, requiredLibs(readNsForm(filename)))
+        todo.extend(found[name][1])
+    return dict((name, (filename, [dep for dep in deps if dep in found]))
+                for name, (filename, deps) in found.items())
+
+
+def topologicalOrder(graph):
+    """Returns the names of graph with every namespace after the ones it
+    requires. Cycles are broken where they are found.
+    """
+    order = []
+    visited = set()
+
+    def visit(name):
+        if name in visited:
+            return
+        visited.add(name)
+        for dep in graph[name][1]:
+            visit(dep)
+        order.append(name)
+    for name in sorted(graph):
+        visit(name)
+    return order
+
+
+# in a pool process, the queue it tells the tasks it starts on, see
+# buildCaches
+_started = None
+
+# seconds between two looks at the tasks running, see buildCaches
+POLL_INTERVAL = 0.1
+
+
+def _initWorker(started):
+    global _started
+    _started = started
+
+
+def compileNamespace(filename):
+    """Loads a clj file in a pool process to build its cache.
+
+    Returns None, or the traceback of the exception loading it raised. Any
+    exception is caught, SystemExit and KeyboardInterrupt included: the
+    pool would otherwise never return a result for the file.
+    """
+    if _started is not None:
+        _started.put((os.getpid(), filename))
+    try:
+        clojure.main.requireClj(filename, useCache=True)
+    except BaseException:
+        return traceback.format_exc()
+    return None
+
+
+def _isAlive(pid):
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+
+def buildCaches(graph, names, processes=None):
+    """Builds the caches of the namespaces names of graph in a pool of
+    processes, each one once the caches of those it requires in names are.
+
+    Returns the names whose cache wasn't built: the ones that failed to
+    compile or couldn't be cached, those whose process died compiling them,
+    and those requiring one that failed.
+    """
+    names = set(names)
+    waiting = dict((name, set(graph[name][1]) & names) for name in names)
+    # name -> AsyncResult of the task compiling it
+    running = {}
+    # pid of a pool process -> the file of the last task it started
+    current = {}
+    started = SimpleQueue()
+    failed = set()
+    pool = multiprocessing.Pool(processes, _initWorker, (started,))
+
+    def submitReady():
+        ready = [name for name, deps in waiting.items() if not deps]
+        for name in ready:
+            del waiting[name]
+            running[name] = pool.apply_async(compileNamespace,
+                                              (graph[name][0],))
+
+    def readStarted():
+        while not started.empty():
+            pid, filename = started.get()
+            current[pid] = filename
+
+    def isLost(filename):
+        # the pool replaces a process that dies, but the task it was
+        # running never completes
+        for pid, last in current.items():
+            if last == filename and not _isAlive(pid):
+                # it may have started another task since, and died in that
+                readStarted()
+                return current[pid] == filename
+        return False
+
+    try:
+        submitReady()
+        while running:
+            readStarted()
+            for name, result in running.items():
+                filename = graph[name][0]
+                if result.ready():
+                    try:
+                        err = result.get()
+                    except Exception:
+                        err = traceback.format_exc()
+                elif isLost(filename):
+                    err = "the process compiling {0} died".format(filename)
+                else:
+                    continue
+                del running[name]
+                if err is not None or not cacheFresh(filename):
+                    # if it just couldn't be cached, those requiring it load
+                    # it again in their process
+                    failed.add(name)
+                if err is None:
+                    for deps in waiting.values():
+                        deps.discard(name)
+            submitReady()
+            if running:
+                running.values()[0].wait(POLL_INTERVAL)
+    finally:
+        # no task is left running, or they are abandoned: close and join
+        # would wait for the results of the tasks that were lost
+        pool.terminate()
+        pool.join()
+    return failed | set(waiting)
+
+
+def preload(names, processes=None):
+    """Imports the clj namespaces names and those they require, after
+    building their stale caches in parallel. processes is the size of the
+    pool, the number of CPUs by default.
+    """
+    graph = dependencyGraph(names)
+    order = topologicalOrder(graph)
+    stale = [name for name in order
+             if name not in clojure.main.lazyNamespaces
+             and not cacheFresh(graph[name][0])]
+    if clojure.main.cacheEnabled and len(stale) > 1 and processes != 1:
+        buildCaches(graph, stale, processes)
+    for name in order:
+        if name not in sys.modules:
+            __import__(name)
+
+
+def preloadRequires(filename, processes=None):
+    """Preloads the namespaces the ns form of a clj file requires.
+    """
+    preload(requiredLibs(readNsForm(filename)), processes)
@@ -0,0 +1,189 @@
+"""Peephole optimizations over the byteplay code emitted by the compiler.
+
+optimize() is run by the compiler on the code of every fn and top-level
+form, after the MetaBytecodes are expanded and before the code is
+assembled. It runs the enabled passes until none of them changes the code.
+Passes can be switched off with enablePass; the number of instructions they
+saved is kept per namespace, see report.
+"""
+
+import sys
+
+from clojure.util.byteplay import *
+
+
+# unconditional jumps that can be retargeted, and ops after which the next
+# instruction is only reachable through a label
+JUMPS = frozenset([JUMP_FORWARD, JUMP_ABSOLUTE])
+THREADABLE = frozenset([JUMP_FORWARD, JUMP_ABSOLUTE, POP_JUMP_IF_FALSE,
+                        POP_JUMP_IF_TRUE, JUMP_IF_FALSE_OR_POP,
+                        JUMP_IF_TRUE_OR_POP])
+TERMINATORS = frozenset([JUMP_FORWARD, JUMP_ABSOLUTE, RETURN_VALUE,
+                         RAISE_VARARGS, BREAK_LOOP, CONTINUE_LOOP])
+
+# namespace name -> instructions removed
+saved = {}
+
+
+def isLabel(op):
+    return isinstance(op, Label)
+
+
+def countInstructions(code):
+    return sum(1 for x in code if isopcode(x[0]))
+
+
+def removeConstPops(code):
+    """Removes constants that are loaded only to be popped, as left by
+    non-final forms of a do.
+    """
+    out = []
+    for x in code:
+        if x[0] == POP_TOP and out and out[-1][0] == LOAD_CONST:
+            out.pop()
+            continue
+        out.append(x)
+    return out
+
+
+def threadJumps(code):
+    """Retargets jumps that land on an unconditional jump to the final
+    target, replaces unconditional jumps to a RETURN_VALUE by the return and
+    removes unconditional jumps to the next instruction.
+
+    JUMP_FORWARD becomes JUMP_ABSOLUTE when retargeted, the new target may
+    be behind it.
+    """
+    positions = {}
+    for i, x in enumerate(code):
+        if isLabel(x[0]):
+            positions[x[0]] = i
+
+    def nextInstruction(i):
+        while i < len(code) and (isLabel(code[i][0])
+                                 or code[i][0] is SetLineno):
+            i += 1
+        return code[i] if i < len(code) else None
+
+    def resolve(label):
+        seen = set()
+        while label not in seen:
+            seen.add(label)
+            x = nextInstruction(positions[label] + 1)
+            if x is None or x[0] not in JUMPS:
+                break
+            label = x[1]
+        return label
+
+    def jumpsToNext(i, label):
+        i += 1
+        while i < len(code) and (isLabel(code[i][0])
+                                 or code[i][0] is SetLineno):
+            if code[i][0] is label:
+                return True
+            i += 1
+        return False
+
+    out = []
+    for i, x in enumerate(code):
+        op = x[0]
+        if op in THREADABLE:
+            target = resolve(x[1])
+            if target is not x[1]:
+                x = (JUMP_ABSOLUTE if op == JUMP_FORWARD else op, target)
+            if op in JUMPS:
+                if jumpsToNext(i, target):
+                    continue
+                landing = nextInstruction(positions[target] + 1)
+                if landing is not None and landing[0] == RETURN_VALUE:
+                    x = (RETURN_VALUE, None)
+        out.append(x)
+    return out
+
+
+def removeDeadCode(code):
+    """Removes the instructions following an unconditional transfer up to
+    the next label something jumps to, and the labels nothing jumps to.
+    """
+    targets = set(x[1] for x in code if isLabel(x[1]))
+    out = []
+    dead = False
+    for x in code:
+        if isLabel(x[0]):
+            if x[0] not in targets:
+                continue
+            dead = False
+        elif dead:
+            continue
+        out.append(x)
+        if x[0] in TERMINATORS:
+            dead = True
+    return out
+
+
+def collapseLinenos(code):
+    """Keeps only the last of consecutive SetLinenos, and drops the ones
+    that don't change the line number.
+    """
+    out = []
+    last = None
+    pending = None
+    for x in code:
+        if x[0] is SetLineno:
+            pending = x
+            continue
+        if pending is not None and not isLabel(x[0]):
+            if pending[1] != last:
+                out.append(pending)
+                last = pending[1]
+            pending = None
+        out.append(x)
+    return out
+
+
+# (name, pass), in the order they are run
+passes = [("const-pop", removeConstPops),
+          ("jump-threading", threadJumps),
+          ("dead-code", removeDeadCode),
+          ("lineno", collapseLinenos)]
+
+enabled = dict((name, True) for name, fn in passes)
+
+
+def enablePass(name, enable=True):
+    """Switches a pass on or off, by name.
+    """
+    if name not in enabled:
+        raise KeyError("unknown peephole pass {0}".format(name))
+    enabled[name] = enable
+
+
+def optimize(code, nsname=None):
+    """Returns code with the enabled passes applied.
+
+    code is a list of byteplay (op, arg) entries without MetaBytecodes. The
+    instructions removed are counted for nsname.
+    """
+    before = countInstructions(code)
+    changed = True
+    while changed:
+        changed = False
+        for name, fn in passes:
+            if not enabled[name]:
+                continue
+            newcode = fn(code)
+            if len(newcode) != len(code) or any(
+                    a is not b for a, b in zip(newcode, code)):
+                changed = True
+            code = newcode
+    if nsname is not None:
+        saved[nsname] = saved.get(nsname, 0) + before - countInstructions(code)
+    return code
+
+
+def report(out=None):
+    """Writes the number of instructions saved per namespace.
+    """
+    out = out or sys.stdout
+    for nsname in sorted(saved):
+        out.write("{0}: {1} instructions saved\n".format(nsname, saved[nsname]))
@@ -151,7 +151,11 @@ class TransientArrayMap(ATransientMap):
             self.array[i + 1] = val
         else:
             if len(self.array) > HASHTABLE_THRESHOLD:
-                return create(self.array).asTransient().assoc(key, val)
+                from clojure.lang.persistenthashmap import EMPTY
+                t = EMPTY.asTransient()
+                for x in range(0, len(self.array), 2):
+                    t.assoc(self.array[x], self.array[x + 1])
+                return t.assoc(key, val)
             self.array.append(key)
             self.array.append(val)
 
@@ -163,7 +167,7 @@ class TransientArrayMap(ATransientMap):
             newlen = len(self.array) - 2
             if not newlen:
                 self.array = []
-                return self.empty()
+                return self
             newarr = self.array[:i]
             newarr.extend(self.array[i+2:])
             self.array = newarr
@@ -187,7 +191,7 @@ class TransientArrayMap(ATransientMap):
         if self.owner is currentThread():
             return
         if self.owner is None:
-            raise IllegalAccessError("Transient used by non-owner thread")
-        raise IllegalAccessError("Transient used after persistent! call")
+            raise IllegalAccessError("Transient used after persistent! call")
+        raise IllegalAccessError("Transient used by non-owner thread")
 
 EMPTY = PersistentArrayMap()
@@ -1,5 +1,11 @@
+from threading import currentThread
+
 from clojure.lang.apersistentmap import APersistentMap
-from clojure.lang.cljexceptions import ArityException, AbstractMethodCall
+from clojure.lang.arraychunk import ArrayChunk
+from clojure.lang.atransientmap import ATransientMap
+from clojure.lang.cljexceptions import (ArityException, AbstractMethodCall,
+                                        IllegalAccessError)
+from clojure.lang.ichunkedseq import IChunkedSeq
 from clojure.lang.ieditablecollection import IEditableCollection
 from clojure.lang.iobj import IObj
 from clojure.lang.aseq import ASeq
@@ -7,7 +13,6 @@ from clojure.lang.util import bitCount, arrayCopy
 from clojure.lang.box import Box
 from clojure.lang.atomicreference import AtomicReference
 from clojure.lang.mapentry import MapEntry
-from clojure.lang.cons import Cons
 
 def mask(h, shift):
     return (h >> shift) & 0x01f
@@ -72,14 +77,19 @@ class PersistentHashMap(APersistentMap, IEditableCollection, IObj):
         else:
             raise ArityException()
 
+    def meta(self):
+        return self._meta
+
     def withMeta(self, meta):
         if self._meta is meta:
             return self
-        return PersistentHashMap(meta,
-                                 self.count,
-                                 self.root,
-                                 self.hasNull,
-                                 self.noneValue)
+        ret = PersistentHashMap(meta,
+                                self.count,
+                                self.root,
+                                self.hasNull,
+                                self.noneValue)
+        ret._hash = self._hash
+        return ret
 
     def assoc(self, key, val):
         if key is None:
@@ -117,8 +127,12 @@ class PersistentHashMap(APersistentMap, IEditableCollection, IObj):
         return MapEntry(key, val) if val is not None else None
 
     def seq(self):
-        s =  self.root.nodeSeq() if self.root is not None else None
-        return Cons(MapEntry(None, self.noneValue), s) if self.hasNull else s
+        nodes = ((self.root, 0), None) if self.root is not None else None
+        if self.hasNull:
+            entries, nodes = nextChunk(nodes)
+            entries = [MapEntry(None, self.noneValue)] + (entries or [])
+            return ChunkedSeq(None, entries, 0, nodes)
+        return createChunkedSeq(nodes)
 
     def __len__(self):
         return self.count
@@ -139,11 +153,150 @@ class PersistentHashMap(APersistentMap, IEditableCollection, IObj):
             s.append(repr(self[x]))
         return "{" + " ".join(s) + "}"
 
+    def asTransient(self):
+        return TransientHashMap(self)
+
+class TransientHashMap(ATransientMap):
+    """A map updated in place, to build a PersistentHashMap without
+    copying a path of nodes on every change.
+
+    The nodes the transient creates or copies carry its edit token, an
+    AtomicReference holding the owner thread, and are mutated in place by
+    the assocEd/withoutEd methods; the nodes of the map it was made from
+    are copied on their first change. persistent() returns the map and
+    clears the token, the transient can't be used any more."""
+    def __init__(self, m):
+        self.edit = AtomicReference(currentThread())
+        self.root = m.root
+        self.count = m.count
+        self.hasNull = m.hasNull
+        self.noneValue = m.noneValue
+        self.leafFlag = Box(None)
+
+    def doAssoc(self, key, val):
+        if key is None:
+            self.noneValue = val
+            if not self.hasNull:
+                self.count += 1
+                self.hasNull = True
+            return self
+        self.leafFlag.val = None
+        root = EMPTY_BITMAP_NODE if self.root is None else self.root
+        self.root = root.assocEd(self.edit, 0, hash(key), key, val,
+                                 self.leafFlag)
+        if self.leafFlag.val is not None:
+            self.count += 1
+        return self
+
+    def doWithout(self, key):
+        if key is None:
+            if self.hasNull:
+                self.hasNull = False
+                self.noneValue = None
+                self.count -= 1
+            return self
+        if self.root is None:
+            return self
+        removedLeaf = Box(None)
+        self.root = self.root.withoutEd(self.edit, 0, hash(key), key,
+                                        removedLeaf)
+        if removedLeaf.val is not None:
+            self.count -= 1
+        return self
+
+    def doPersistent(self):
+        self.edit.set(None)
+        return PersistentHashMap(self.count, self.root, self.hasNull,
+                                 self.noneValue)
+
+    def doValAt(self, key, notFound = None):
+        if key is None:
+            return self.noneValue if self.hasNull else notFound
+        if self.root is None:
+            return notFound
+        return self.root.find(0, hash(key), key, notFound)
+
+    def doCount(self):
+        return self.count
+
+    def ensureEditable(self):
+        if self.edit.get() is None:
+            raise IllegalAccessError("Transient used after persistent! call")
+
 def fromDict(d):
-    m = EMPTY
-    for v in d:
-        m = m.assoc(v, d[v])
-    return m
+    return fromItems(d.iteritems())
+
+def fromItems(items):
+    """Return a PersistentHashMap of the (key, value) pairs of items, any
+    iterable. A later pair replaces an earlier one with an equal key.
+
+    The keys are hashed once and grouped by hash, then the trie is built
+    bottom-up from the groups, see _buildNode, instead of assoc'ing the
+    pairs one at a time."""
+    hasNull = False
+    noneValue = None
+    buckets = {}
+    count = 0
+    for key, val in items:
+        if key is None:
+            hasNull = True
+            noneValue = val
+            continue
+        hsh = hash(key)
+        bucket = buckets.get(hsh)
+        if bucket is None:
+            buckets[hsh] = [key, val]
+            count += 1
+            continue
+        for i in range(0, len(bucket), 2):
+            if bucket[i] == key:
+                bucket[i + 1] = val
+                break
+        else:
+            bucket.append(key)
+            bucket.append(val)
+            count += 1
+    if hasNull:
+        count += 1
+    if not count:
+        return EMPTY
+    root = _buildNode(0, buckets.items()) if buckets else None
+    return PersistentHashMap(count, root, hasNull, noneValue)
+
+def _buildNode(shift, buckets):
+    """Return the node at shift holding buckets, a non-empty list of (hash,
+    [key1, val1, key2, val2...]) whose hashes agree below shift.
+
+    The buckets are split on the 5 bits of their hashes at shift: a
+    bucket alone in its slot with a single pair is stored in place, the
+    others in a child node at shift + 5. Over 16 slots make an ArrayNode,
+    as BitmapIndexedNode.assoc would, and the pairs of keys with the same
+    hash a HashCollisionNode."""
+    if len(buckets) == 1:
+        hsh, pairs = buckets[0]
+        if len(pairs) == 2:
+            return BitmapIndexedNode(None, bitpos(hsh, shift), pairs)
+        return BitmapIndexedNode(None, bitpos(hsh, shift), [None,
+                   HashCollisionNode(None, hsh, len(pairs) / 2, pairs)])
+    slots = {}
+    for bucket in buckets:
+        slots.setdefault(mask(bucket[0], shift), []).append(bucket)
+    if len(slots) > 16:
+        array = [None] * 32
+        for idx, slot in slots.iteritems():
+            array[idx] = _buildNode(shift + 5, slot)
+        return ArrayNode(None, len(slots), array)
+    bitmap = 0
+    array = []
+    for idx in sorted(slots):
+        slot = slots[idx]
+        bitmap |= 1 << idx
+        if len(slot) == 1 and len(slot[0][1]) == 2:
+            array.extend(slot[0][1])
+        else:
+            array.append(None)
+            array.append(_buildNode(shift + 5, slot))
+    return BitmapIndexedNode(None, bitmap, array)
 
 
 class INode(object):
@@ -189,9 +342,9 @@ class ArrayNode(INode):
         if node is None:
             return self
         n = node.without(shift + 5, hsh, key)
-        if n is None:
+        if n is node:
             return self
-        if node is None:
+        if n is None:
             if self.count <= 8:
                 return self.pack(None, idx)
             return ArrayNode(None, self.count - 1, cloneAndSet(self.array, idx, n))
@@ -206,7 +359,7 @@ class ArrayNode(INode):
         return node.find(shift + 5, hsh, key, notFound)
 
     def ensureEditable(self, edit):
-        if self.edit == edit:
+        if self.edit is edit:
             return self
         return ArrayNode(edit, self.count, self.array[:])
 
@@ -220,14 +373,14 @@ class ArrayNode(INode):
         j = 1
         bitmap = 0
         for i in range(0, idx):
-            if self.array[i] is None:
+            if self.array[i] is not None:
                 newArray[j] = self.array[i]
                 bitmap |= 1 << i
                 j += 2
         for i in range(idx + 1, len(self.array)):
-            if self.array[i] is None:
+            if self.array[i] is not None:
                 newArray[j] = self.array[i]
-                bitmap != 1 << i
+                bitmap |= 1 << i
                 j += 2
         return BitmapIndexedNode(edit, bitmap, newArray)
 
@@ -239,7 +392,7 @@ class ArrayNode(INode):
             editable = self.editAndSet(edit, idx, nnode)
             editable.count += 1
             return editable
-        n = node.assoc(edit, shift + 5, hsh, key, val, addedLeaf)
+        n = node.assocEd(edit, shift + 5, hsh, key, val, addedLeaf)
         if n is node:
             return self
         return self.editAndSet(edit, idx, n)
@@ -249,7 +402,7 @@ class ArrayNode(INode):
         node = self.array[idx]
         if node is None:
             return self
-        n = node.without(edit, shift + 5, hsh, key, removedLeaf)
+        n = node.withoutEd(edit, shift + 5, hsh, key, removedLeaf)
         if n is node:
             return self
         if n is None:
@@ -261,38 +414,7 @@ class ArrayNode(INode):
         return self.editAndSet(edit, idx, n)
 
     def nodeSeq(self):
-        return createSeq(self.array)
-
-class Seq(ASeq):
-    def __init__(self, meta, nodes, i, s):
-        self._meta = meta
-        self.nodes = nodes
-        self.i = i
-        self.s = s
-
-    def withMeta(self, meta):
-        return createSeq(meta, self.nodes, self.i, self.s)
-
-    def first(self):
-        return self.s.first()
-
-    def next(self):
-        return createSeq(None, self.nodes, self.i, self.s.next())
-
-def createSeq(*args):
-    if len(args) == 1:
-        return createSeq(None, args[0], 0, None)
-    if len(args) != 4:
-        raise ArityException()
-    meta, nodes, i, s = args
-    if s is not None:
-        return Seq(meta, nodes, i, s)
-    for j in range(i, len(nodes)):
-        if nodes[j] is not None:
-            ns = nodes[j].nodeSeq()
-            if ns is not None:
-                return Seq(meta, nodes, j + 1, ns)
-    return None
+        return createChunkedSeq(((self, 0), None))
 
 class BitmapIndexedNode(INode):
     def __init__(self, edit, bitmap, array):
@@ -301,7 +423,7 @@ class BitmapIndexedNode(INode):
         self.array = array
 
     def nodeSeq(self):
-        return createNodeSeq(self.array)
+        return createChunkedSeq(((self, 0), None))
 
     def index(self, bit):
         return bitCount(self.bitmap & (bit - 1))
@@ -392,7 +514,7 @@ class BitmapIndexedNode(INode):
         n = bitCount(self.bitmap)
         newArray = [None] * (2*(n+1) if n >= 0 else 4) # make room for next assoc
         arrayCopy(self.array, 0, newArray, 0, 2*n)
-        return BitmapIndexedNode(self.edit, self.bitmap, newArray)
+        return BitmapIndexedNode(edit, self.bitmap, newArray)
 
     def editAndSet(self, edit, i, a, j = None, b = None):
         editable = self.ensureEditable(edit)
@@ -418,13 +540,13 @@ class BitmapIndexedNode(INode):
             keyOrNull = self.array[2*idx]
             valOrNode = self.array[2*idx+1]
             if keyOrNull is None:
-                n = valOrNode.assoc(edit, shift + 5, hsh, key, val, addedLeaf)
-                if n == valOrNode:
+                n = valOrNode.assocEd(edit, shift + 5, hsh, key, val, addedLeaf)
+                if n is valOrNode:
                     return self
                 return self.editAndSet(edit, 2*idx+1, n)
 
             if key == keyOrNull:
-                if val == valOrNode:
+                if val is valOrNode:
                     return self
                 return self.editAndSet(edit, 2*idx+1, val)
             addedLeaf.val = addedLeaf
@@ -478,7 +600,7 @@ class BitmapIndexedNode(INode):
         keyOrNull = self.array[2*idx]
         valOrNode = self.array[2*idx+1]
         if keyOrNull is None:
-            n = valOrNode.without(edit, shift + 5, hsh, key, removedLeaf)
+            n = valOrNode.withoutEd(edit, shift + 5, hsh, key, removedLeaf)
             if n is valOrNode:
                 return self
             if n is not None:
@@ -489,7 +611,7 @@ class BitmapIndexedNode(INode):
 
         if key == keyOrNull:
             removedLeaf.val = removedLeaf
-            return self.editAndRemovePair(self.edit, bit, idx)
+            return self.editAndRemovePair(edit, bit, idx)
         return self
 
 class HashCollisionNode(INode):
@@ -506,10 +628,9 @@ class HashCollisionNode(INode):
                 if self.array[idx + 1] == val:
                     return self
                 return HashCollisionNode(None, hsh, self.count, cloneAndSet(self.array, idx + 1, val))
-            newArray = [None] * (len(self.array) + 2)
-            arrayCopy(self.array, 0, newArray, 0, len(self.array))
-            newArray[len(self.array)] = key
-            newArray[len(self.array) + 1] = val
+            newArray = self.array[:2 * self.count]
+            newArray.append(key)
+            newArray.append(val)
             addedLeaf.val = addedLeaf
             return HashCollisionNode(self.edit, hsh, self.count + 1, newArray)
 
@@ -524,7 +645,7 @@ class HashCollisionNode(INode):
         if self.count == 1:
             return None
 
-        return HashCollisionNode(None, hash, self.count - 1, removePair(self.array, idx/2))
+        return HashCollisionNode(None, self.hsh, self.count - 1, removePair(self.array, idx/2))
 
     def findIndex(self, key):
         for x in range(0, self.count * 2, 2):
@@ -539,7 +660,7 @@ class HashCollisionNode(INode):
         return self.array[idx + 1]
 
     def nodeSeq(self):
-        return createNodeSeq(self.array)
+        return createChunkedSeq(((self, 0), None))
 
     def ensureEditable(self, edit, i = None, array = None):
         if self.edit is edit:
@@ -598,50 +719,82 @@ class HashCollisionNode(INode):
         editable.count -= 1
         return editable
 
-class NodeSeq(ASeq):
-    def __init__(self, *args):
-        if len(args) == 3:
-            self.array, self.i, self.s = args
-        elif len(args) == 4:
-            self._meta, self.array, self.i, self.s = args
-        else:
-            raise ArityException()
+class ChunkedSeq(ASeq, IChunkedSeq):
+    """A seq on the entries of a hash map, chunked by nodes: a chunk holds
+    the MapEntries of the key/value pairs stored in the arrays of the next
+    nodes walked, about 32 of them.
+
+    entries -- list of the MapEntries of the current chunk
+    i -- index in entries of the first entry of this seq
+    nodes -- the nodes left to walk, see nextChunk"""
+    def __init__(self, meta, entries, i, nodes):
+        self._meta = meta
+        self.entries = entries
+        self.i = i
+        self.nodes = nodes
 
     def withMeta(self, meta):
-        return NodeSeq(meta, self.array, self.i, self.s)
+        return ChunkedSeq(meta, self.entries, self.i, self.nodes)
 
     def first(self):
-        if self.s is not None:
-            return self.s.first()
-        return MapEntry(self.array[self.i], self.array[self.i + 1])
+        return self.entries[self.i]
 
     def next(self):
-        if self.s is not None:
-            return createNodeSeq(self.array, self.i, self.s.next())
-        return createNodeSeq(self.array, self.i + 2, None)
-
-def createNodeSeq(*args):
-    if len(args) == 1:
-        if len(args[0]) == 0:
-            return None
-        return createNodeSeq(args[0], 0, None)
-    if len(args) != 3:
-        raise ArityException()
-
-    array, i, s = args
-    if s is not None:
-        return NodeSeq(None, array, i, s)
-
-    for j in range(i, len(array), 2):
-        if array[j] is not None:
-            return NodeSeq(None, array, j, None)
-        node = array[j+1]
-        if node is not None:
-            nodeSeq = node.nodeSeq()
-            if nodeSeq is not None:
-                return NodeSeq(None, array, j + 2, nodeSeq)
-
-    return None
+        if self.i + 1 < len(self.entries):
+            return ChunkedSeq(None, self.entries, self.i + 1, self.nodes)
+        return self.chunkedNext()
+
+    def chunkedFirst(self):
+        return ArrayChunk(self.entries, self.i)
+
+    def chunkedNext(self):
+        return createChunkedSeq(self.nodes)
+
+    def chunkedMore(self):
+        s = self.chunkedNext()
+        if s is None:
+            from clojure.lang.persistentlist import EMPTY
+            return EMPTY
+        return s
+
+def nextChunk(nodes):
+    """Return (entries, nodes): the MapEntries of the next nodes walked,
+    at least 32 of them unless the walk ends, and the nodes left to walk
+    after them. Return (None, None) once all the nodes are walked.
+
+    The entries come in the order of the arrays of the nodes, those of a
+    sub-node at its place in the array of its parent.
+
+    nodes -- a stack of (node, i) pairs, the node to walk from index i of
+    its array on, as nested ((node, i), rest) tuples, or None"""
+    entries = []
+    while nodes is not None and len(entries) < 32:
+        (node, i), nodes = nodes
+        array = node.array
+        if isinstance(node, ArrayNode):
+            for sub in reversed(array):
+                if sub is not None:
+                    nodes = ((sub, 0), nodes)
+            continue
+        while i < len(array):
+            if array[i] is not None:
+                entries.append(MapEntry(array[i], array[i + 1]))
+            elif array[i + 1] is not None:
+                # the rest of the array comes after the sub-node
+                if i + 2 < len(array):
+                    nodes = ((node, i + 2), nodes)
+                nodes = ((array[i + 1], 0), nodes)
+                break
+            i += 2
+    if entries:
+        return entries, nodes
+    return None, None
+
+def createChunkedSeq(nodes):
+    entries, nodes = nextChunk(nodes)
+    if entries is None:
+        return None
+    return ChunkedSeq(None, entries, 0, nodes)
 
 EMPTY = PersistentHashMap(0, None, False, None)
 EMPTY_BITMAP_NODE = BitmapIndexedNode(-1, 0, [])
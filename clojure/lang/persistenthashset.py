@@ -3,12 +3,15 @@ March 25, 2012 -- Documented
 """
 
 from clojure.lang.iobj import IObj
+from clojure.lang.ifn import IFn
 from clojure.lang.apersistentset import APersistentSet
+from clojure.lang.ieditablecollection import IEditableCollection
+from clojure.lang.itransientset import ITransientSet
 from clojure.lang.persistenthashmap import EMPTY as EMPTY_MAP
 from clojure.lang.cljexceptions import IllegalArgumentException
 
 
-class PersistentHashSet(APersistentSet, IObj):
+class PersistentHashSet(APersistentSet, IEditableCollection, IObj):
     def __init__(self, meta, impl):
         """Use create or createWithCheck to instantiate."""
         APersistentSet.__init__(self, impl)
@@ -20,10 +23,14 @@ class PersistentHashSet(APersistentSet, IObj):
         o -- any object
 
         The new set will have this set's meta data attached. If o is already
-        in this set, return this set."""
+        in this set, return this set. If the hash of this set is computed,
+        the hash of the new set is derived from it."""
         if o in self:
             return self
-        return PersistentHashSet(self._meta, self.impl.assoc(o, o))
+        ret = PersistentHashSet(self._meta, self.impl.assoc(o, o))
+        if self._hash != -1:
+            ret._hash = self._hash + hash(o)
+        return ret
 
     def meta(self):
         """Return this PersistentHashSet's meta data'"""
@@ -34,8 +41,10 @@ class PersistentHashSet(APersistentSet, IObj):
 
         meta -- the meta data to attach to the returned set
 
-        The set will share this set's content.'"""
-        return PersistentHashSet(meta, self.impl)
+        The set will share this set's content and hash.'"""
+        ret = PersistentHashSet(meta, self.impl)
+        ret._hash = self._hash
+        return ret
 
     def empty(self):
         """Return an empty PersistentHashSet.
@@ -48,10 +57,61 @@ class PersistentHashSet(APersistentSet, IObj):
 
         key -- any object
 
-        If the key is not in this set, return this set."""
+        If the key is not in this set, return this set. If the hash of this
+        set is computed, the hash of the new set is derived from it."""
         if key not in self:
             return self
-        return PersistentHashSet(self._meta, self.impl.without(key))
+        ret = PersistentHashSet(self._meta, self.impl.without(key))
+        if self._hash != -1:
+            ret._hash = self._hash - hash(key)
+        return ret
+
+    def asTransient(self):
+        """Return a TransientHashSet of the items of this set."""
+        return TransientHashSet(self.impl.asTransient())
+
+
+class TransientHashSet(ITransientSet, IFn):
+    def __init__(self, impl):
+        """Use PersistentHashSet.asTransient to instantiate.
+
+        impl -- a TransientHashMap mapping each item to itself"""
+        self.impl = impl
+
+    def conj(self, o):
+        """Add o to this set in place and return this set.
+
+        o -- any object"""
+        self.impl = self.impl.assoc(o, o)
+        return self
+
+    def disjoin(self, key):
+        """Remove key from this set in place and return this set.
+
+        key -- any object"""
+        self.impl = self.impl.without(key)
+        return self
+
+    def __contains__(self, item):
+        """Return True if item is found in this set, else False"""
+        return item in self.impl
+
+    def get(self, key):
+        """Return key if found in this set, else None."""
+        return self.impl.valAt(key)
+
+    def __call__(self, key, notFound=None):
+        return self.impl.valAt(key, notFound)
+
+    def __len__(self):
+        """Return the number of items in this set."""
+        return len(self.impl)
+
+    def persistent(self):
+        """Return a PersistentHashSet of the items of this set.
+
+        The transient can't be used after this call."""
+        return PersistentHashSet(None, self.impl.persistent())
 
 
 def create(*args):
@@ -69,15 +129,11 @@ def create(*args):
     if not len(args):
         return EMPTY
     if len(args) == 1 and hasattr(args[0], "__iter__"):
-        m = EMPTY
-        s = args[0]
-        for x in s:
-            m = m.cons(x)
-        return m
-    m = EMPTY
+        args = args[0]
+    m = EMPTY.asTransient()
     for x in args:
-        m = m.cons(x)
-    return m
+        m.conj(x)
+    return m.persistent()
 
 
 def createWithCheck(iterable):
@@ -86,12 +142,12 @@ def createWithCheck(iterable):
     iterable -- any iterable sequence of objects
 
     Raise IllegalArgumentException if a duplicate is found in iterable."""
-    ret = EMPTY
+    ret = EMPTY.asTransient()
     for i, key in enumerate(iterable):
-        ret = ret.cons(key)
+        ret.conj(key)
         if len(ret) != i + 1:
             raise IllegalArgumentException("Duplicate key: {0}".format(key))
-    return ret;
+    return ret.persistent()
 
 
 EMPTY = PersistentHashSet(None, EMPTY_MAP)
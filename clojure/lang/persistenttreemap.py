@@ -1,4 +1,5 @@
 from clojure.lang.apersistentmap import APersistentMap
+from clojure.lang.arraychunk import ArrayChunk
 from clojure.lang.aseq import ASeq
 from clojure.lang.box import Box
 from clojure.lang.cljexceptions import (ArityException,
@@ -6,10 +7,13 @@ from clojure.lang.cljexceptions import (ArityException,
                                         IllegalArgumentException,
                                         UnsupportedOperationException)
 from clojure.lang.comparator import Comparator
+from clojure.lang.ichunkedseq import IChunkedSeq
 from clojure.lang.iobj import IObj
 from clojure.lang.ipersistentmap import IPersistentMap
 from clojure.lang.iseq import ISeq
+from clojure.lang.protocol import extendForType
 from clojure.lang.reversible import Reversible
+from clojure.lang.seqable import Seqable
 import clojure.lang.rt as RT
 
 
@@ -383,7 +387,9 @@ class Node(object):
 
     def val(self):
         return None
-    getValue = val
+
+    def getValue(self):
+        return self.val()
 
     def left(self):
         return None
@@ -563,7 +569,12 @@ class RedBranchVal(RedBranch):
         return BlackBranchVal(self._key, self._val, self._left, self._right)
 
 
-class Seq(ASeq):
+class Seq(ASeq, IChunkedSeq):
+    """A seq on the nodes of a tree, in order, whose chunks are the next 32
+    nodes of the walk, collected when a chunk is first asked for."""
+    # (nodes, stack) of the first chunk once walked, see walkChunk
+    _chunk = None
+
     def __init__(self, *args):
         if len(args) == 2:
             self.stack = args[0]
@@ -597,6 +608,37 @@ class Seq(ASeq):
     def withMeta(self, meta):
         return Seq(meta, self.stack, self.asc, self.cnt)
 
+    def walkChunk(self):
+        """Return (nodes, stack): the list of the first 32 nodes of this
+        seq, or fewer if it ends, and the stack to walk the rest from."""
+        if self._chunk is None:
+            nodes = []
+            stack = self.stack
+            while stack is not None and len(nodes) < 32:
+                t = stack.first()
+                nodes.append(t)
+                stack = pushSeq(t.right() if self.asc else t.left(),
+                                stack.next(), self.asc)
+            self._chunk = nodes, stack
+        return self._chunk
+
+    def chunkedFirst(self):
+        return ArrayChunk(self.walkChunk()[0])
+
+    def chunkedNext(self):
+        nodes, stack = self.walkChunk()
+        if stack is None:
+            return None
+        cnt = self.cnt - len(nodes) if self.cnt >= 0 else -1
+        return Seq(stack, self.asc, cnt)
+
+    def chunkedMore(self):
+        s = self.chunkedNext()
+        if s is None:
+            from clojure.lang.persistentlist import EMPTY
+            return EMPTY
+        return s
+
 def createSeq(t, asc, cnt):
     return Seq(pushSeq(t, None, asc), asc, cnt)
 
@@ -656,3 +698,9 @@ class ValIterator(object):
 
     def remove(self):
         raise UnsupportedOperationException()
+
+
+# This module is loaded after the protocols were extended to the subclasses
+# of Seqable and ISeq, whose fns would dispatch to the methods of the bases.
+extendForType(Seqable, PersistentTreeMap)
+extendForType(ISeq, Seq)
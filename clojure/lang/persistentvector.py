@@ -1,9 +1,17 @@
 import clojure.lang.rt as RT
 from clojure.lang.atomicreference import AtomicReference
 from clojure.lang.apersistentvector import APersistentVector
+from clojure.lang.arraychunk import ArrayChunk
+from clojure.lang.aseq import ASeq
 from clojure.lang.cljexceptions import (ArityException,
+                                        IllegalAccessError,
                                         IllegalStateException,
                                         IndexOutOfBoundsException)
+from clojure.lang.counted import Counted
+from clojure.lang.ichunkedseq import IChunkedSeq
+from clojure.lang.ieditablecollection import IEditableCollection
+from clojure.lang.itransientvector import ITransientVector
+from clojure.lang.threadutil import currentThread
 
 
 # Acts sort-of-like supplied-p in Common Lisp.
@@ -12,7 +20,7 @@ from clojure.lang.cljexceptions import (ArityException,
 _notSupplied = object()
 
 
-class PersistentVector(APersistentVector):
+class PersistentVector(APersistentVector, IEditableCollection):
     """An indexable array where each operation such as cons and assocN return
     a *new* PersistentVector. The two vectors share old state, but the new
     state is only present in the newly returned vector. This preserves the
@@ -87,6 +95,12 @@ class PersistentVector(APersistentVector):
         """Return this vector's meta data as an IPersistentHashMap."""
         return self._meta
 
+    def seq(self):
+        """Return a ChunkedSeq on this vector or None if empty."""
+        if not self._cnt:
+            return None
+        return ChunkedSeq(self, 0, 0)
+
     def assocN(self, i, val):
         """Return a PersistentVector with the item at index i set to val.
 
@@ -126,10 +140,12 @@ class PersistentVector(APersistentVector):
 
         meta -- an IPersistentMap
 
-        The returned vector will contain this vectors contents and have meta
-        attached."""
-        return PersistentVector(meta, self._cnt, self._shift, self._root,
-                                self._tail)
+        The returned vector will contain this vectors contents and hash, and
+        have meta attached."""
+        ret = PersistentVector(meta, self._cnt, self._shift, self._root,
+                               self._tail)
+        ret._hash = self._hash
+        return ret
 
     def _tailoff(self):
         """Return the beginning index of the tail.
@@ -169,6 +185,10 @@ class PersistentVector(APersistentVector):
         return PersistentVector(self.meta(), self._cnt + 1, newshift, newroot,
                                 [val])
 
+    def asTransient(self):
+        """Return a TransientVector holding the items of this vector."""
+        return TransientVector(self)
+
     def _pushTail(self, level, parent, tailnode):
         """Add tailnode to the tree at the given level.
 
@@ -253,6 +273,253 @@ class PersistentVector(APersistentVector):
             ret._array[subidx] = None
             return ret
 
+# ======================================================================
+# ChunkedSeq
+# ======================================================================
+
+class ChunkedSeq(ASeq, IChunkedSeq, Counted):
+    """A seq on a PersistentVector whose chunks are the lists of 32 items
+    of its leaf Nodes, and its _tail.
+
+    _vec -- PersistentVector
+    _i -- integer, the index in _vec of the first item of _node
+    _offset -- integer, the index in _node of the first item of this seq
+    _node -- list, the leaf Node._array or _tail holding this seq's first
+             item"""
+    def __init__(self, vec, i, offset, node=None, meta=None):
+        """Instantiate a ChunkedSeq on the items of vec from index
+        i + offset, where i is a multiple of 32."""
+        self._meta = meta
+        self._vec = vec
+        self._i = i
+        self._offset = offset
+        self._node = node if node is not None else vec._arrayFor(i)
+
+    def first(self):
+        return self._node[self._offset]
+
+    def next(self):
+        if self._offset + 1 < len(self._node):
+            return ChunkedSeq(self._vec, self._i, self._offset + 1,
+                              self._node)
+        return self.chunkedNext()
+
+    def chunkedFirst(self):
+        """Return an ArrayChunk on the rest of _node, not copied."""
+        return ArrayChunk(self._node, self._offset, len(self._node))
+
+    def chunkedNext(self):
+        if self._i + len(self._node) < len(self._vec):
+            return ChunkedSeq(self._vec, self._i + len(self._node), 0)
+        return None
+
+    def chunkedMore(self):
+        s = self.chunkedNext()
+        if s is None:
+            from clojure.lang.persistentlist import EMPTY
+            return EMPTY
+        return s
+
+    def withMeta(self, meta):
+        if meta is self.meta():
+            return self
+        return ChunkedSeq(self._vec, self._i, self._offset, self._node, meta)
+
+    def __len__(self):
+        return len(self._vec) - (self._i + self._offset)
+
+# ======================================================================
+# TransientVector
+# ======================================================================
+
+class TransientVector(ITransientVector):
+    """A vector updated in place, to build a PersistentVector without
+    copying its tail and nodes on every change.
+
+    The Nodes the transient has created or copied carry its edit token, an
+    AtomicReference shared with its root, and are mutated in place; the
+    Nodes of the vector it was made from are copied on their first change.
+    persistent() returns the vector and clears the token: the transient
+    can't be used any more and its Nodes are shared by the vector.
+
+    _cnt, _shift, _root and _tail are as in PersistentVector."""
+    def __init__(self, v):
+        """Instantiate a TransientVector holding the items of the
+        PersistentVector v."""
+        self._cnt = v._cnt
+        self._shift = v._shift
+        self._root = Node(AtomicReference(currentThread()),
+                          v._root._array[:])
+        self._tail = v._tail[:]
+
+    def _ensureEditable(self):
+        if self._root._edit.get() is None:
+            raise IllegalAccessError(
+                "Transient used after persistent! call")
+
+    def _ensureEditableNode(self, node):
+        """Return node if this transient owns it, else a copy it owns."""
+        if node._edit is self._root._edit:
+            return node
+        return Node(self._root._edit, node._array[:])
+
+    def _tailoff(self):
+        if self._cnt < 32:
+            return 0
+        return ((self._cnt - 1) >> 5) << 5
+
+    def __len__(self):
+        self._ensureEditable()
+        return self._cnt
+
+    def _arrayFor(self, i):
+        if 0 <= i < self._cnt:
+            if i >= self._tailoff():
+                return self._tail
+            node = self._root
+            for level in range(self._shift, 0, -5):
+                node = node._array[(i >> level) & 0x01f]
+            return node._array
+        raise IndexOutOfBoundsException()
+
+    def nth(self, i, notFound=_notSupplied):
+        """Return the item at index i, as PersistentVector.nth."""
+        self._ensureEditable()
+        if 0 <= i < self._cnt:
+            return self._arrayFor(i)[i & 0x01f]
+        elif notFound is _notSupplied:
+            raise IndexOutOfBoundsException()
+        else:
+            return notFound
+
+    def __getitem__(self, i):
+        return self.nth(i)
+
+    def valAt(self, key, notFound=None):
+        self._ensureEditable()
+        if isinstance(key, int) and 0 <= key < self._cnt:
+            return self._arrayFor(key)[key & 0x01f]
+        return notFound
+
+    def __call__(self, i):
+        return self.nth(i)
+
+    def conj(self, val):
+        """Append val to this vector, return this vector."""
+        self._ensureEditable()
+        # there's room in the _tail for val
+        if self._cnt - self._tailoff() < 32:
+            self._tail.append(val)
+            self._cnt += 1
+            return self
+        # _tail is full, push it into the tree
+        tailnode = Node(self._root._edit, self._tail)
+        self._tail = [val]
+        # no room at this level for the Node, add a new level
+        if (self._cnt >> 5) > (1 << self._shift):
+            newroot = Node(self._root._edit)
+            newroot._array[0] = self._root
+            newroot._array[1] = _newPath(self._root._edit, self._shift,
+                                         tailnode)
+            self._shift += 5
+        else:
+            newroot = self._pushTail(self._shift, self._root, tailnode)
+        self._root = newroot
+        self._cnt += 1
+        return self
+
+    def _pushTail(self, level, parent, tailnode):
+        """Add tailnode to the tree at the given level, in place where this
+        transient owns the Nodes. Return the root Node."""
+        parent = self._ensureEditableNode(parent)
+        subidx = ((self._cnt - 1) >> level) & 0x01f
+        if level == 5:
+            nodeToInsert = tailnode
+        else:
+            child = parent._array[subidx]
+            nodeToInsert = (self._pushTail(level - 5, child, tailnode)
+                            if child is not None
+                            else _newPath(self._root._edit, level - 5,
+                                          tailnode))
+        parent._array[subidx] = nodeToInsert
+        return parent
+
+    def persistent(self):
+        """Return a PersistentVector of the items of this transient, which
+        can't be used afterwards."""
+        self._ensureEditable()
+        self._root._edit.set(None)
+        return PersistentVector(self._cnt, self._shift, self._root,
+                                self._tail)
+
+    def assocN(self, i, val):
+        """Set the item at index i to val, return this vector. i may be the
+        length of the vector to append val."""
+        self._ensureEditable()
+        if 0 <= i < self._cnt:
+            if i >= self._tailoff():
+                self._tail[i & 0x01f] = val
+            else:
+                self._root = self._doAssoc(self._shift, self._root, i, val)
+            return self
+        if i == self._cnt:
+            return self.conj(val)
+        raise IndexOutOfBoundsException()
+
+    def assoc(self, i, val):
+        return self.assocN(i, val)
+
+    def _doAssoc(self, level, node, i, val):
+        node = self._ensureEditableNode(node)
+        if not level:
+            node._array[i & 0x01f] = val
+        else:
+            subidx = (i >> level) & 0x01f
+            node._array[subidx] = self._doAssoc(level - 5,
+                                                node._array[subidx], i, val)
+        return node
+
+    def pop(self):
+        """Remove the last item, return this vector.
+
+        Will raise IllegalStateException if this vector is empty."""
+        self._ensureEditable()
+        if not self._cnt:
+            raise IllegalStateException("Can't pop empty vector")
+        # pop from the _tail, done
+        if self._cnt == 1 or self._cnt - self._tailoff() > 1:
+            self._tail.pop()
+            self._cnt -= 1
+            return self
+        # the last sublist, post-pop, becomes the _tail
+        newtail = self._arrayFor(self._cnt - 2)[:]
+        newroot = self._popTail(self._shift, self._root)
+        newshift = self._shift
+        if newroot is None:
+            newroot = Node(self._root._edit)
+        if self._shift > 5 and newroot._array[1] is None:
+            newroot = self._ensureEditableNode(newroot._array[0])
+            newshift -= 5
+        self._root = newroot
+        self._shift = newshift
+        self._cnt -= 1
+        self._tail = newtail
+        return self
+
+    def _popTail(self, level, node):
+        node = self._ensureEditableNode(node)
+        subidx = ((self._cnt - 2) >> level) & 0x01f
+        if level > 5:
+            newchild = self._popTail(level - 5, node._array[subidx])
+            if newchild is None and not subidx:
+                return None
+            node._array[subidx] = newchild
+            return node
+        elif not subidx:
+            return None
+        node._array[subidx] = None
+        return node
+
 # ======================================================================
 # PersistentVector Helpers
 # ======================================================================
@@ -260,7 +527,7 @@ class PersistentVector(APersistentVector):
 def _newPath(edit, level, node):
     """Return a Node.
 
-    edit -- currently unused (for Clojure's transient data structures)
+    edit -- AtomicReference, the edit token of the new Nodes
     level -- integer, multiple of 5, >= 5, stop recurring when 0
     node -- Node, the new path will lead *to* this node
 
@@ -298,7 +565,9 @@ class Node(object):
     def __init__(self, edit, array=None):
         """Instantiate a Node.
 
-        edit -- currently unused (for Clojure's transient data structures)
+        edit -- AtomicReference, the edit token of the TransientVector
+                owning this Node. A Node whose token holds None belongs to
+                persistent vectors only.
         array -- An optional list of size 32. It will be initialized to [None]
                  * 32 if not supplied."""
         self._edit = edit
@@ -317,12 +586,14 @@ def vec(seq):
     contain the items in seq."""
     if isinstance(seq, APersistentVector):
         return seq
+    if isinstance(seq, (list, tuple)):
+        return fromList(seq)
     s = RT.seq(seq)
-    v = EMPTY
+    v = EMPTY.asTransient()
     while s is not None:
-        v = v.cons(RT.first(s))
+        v.conj(RT.first(s))
         s = RT.next(s)
-    return v
+    return v.persistent()
 
 
 def create(*args):
@@ -331,16 +602,42 @@ def create(*args):
     args -- zero or more objects
 
     The returned vector will contain all objects found in args."""
-    x = EMPTY
-    for z in args:
-        x = x.cons(z)
-    return x
+    return fromList(args)
+
+
+def fromList(items):
+    """Return a PersistentVector of the items of a Python list or tuple.
+
+    items -- list or tuple, it isn't kept by the vector
+
+    The tree is built bottom-up from 32-item slices of items: the leaves,
+    then a level of Nodes for every 32 Nodes of the level below, until
+    the root fits 32 Nodes."""
+    cnt = len(items)
+    if not cnt:
+        return EMPTY
+    tailoff = ((cnt - 1) >> 5) << 5
+    nodes = [Node(NOEDIT, list(items[i:i + 32]))
+             for i in range(0, tailoff, 32)]
+    shift = 5
+    while len(nodes) > 32:
+        nodes = [Node(NOEDIT, _padded(nodes[i:i + 32]))
+                 for i in range(0, len(nodes), 32)]
+        shift += 5
+    root = Node(NOEDIT, _padded(nodes)) if nodes else EMPTY_NODE
+    return PersistentVector(cnt, shift, root, list(items[tailoff:]))
+
+
+def _padded(nodes):
+    """Return nodes, a list of 1 to 32 Nodes, padded to 32 with None."""
+    nodes.extend([None] * (32 - len(nodes)))
+    return nodes
 
 # ======================================================================
 # Pseudo-Singletons
 # ======================================================================
 
-# currently unused (for Clojure's transient data structures)
+# the edit token of the Nodes no TransientVector owns
 NOEDIT = AtomicReference()
 # A Node holding no children or vector values
 EMPTY_NODE = Node(NOEDIT)
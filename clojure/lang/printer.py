@@ -0,0 +1,244 @@
+"""Printing of whole values to a string in one go.
+
+The IPrintable protocol writes a collection element by element, with one
+protocol dispatch and one writer.write call per element and separator.
+prStr and printStr instead walk the persistent maps, vectors, lists and
+sets directly, with a writer per concrete type appending to a list of
+parts that is joined once at the end. Their output is the same as
+writeAsReplString and writeAsString. Values of other types, including
+subclasses of the collections, are written through the protocol.
+"""
+
+from clojure.lang.cljkeyword import Keyword
+from clojure.lang.persistentarraymap import PersistentArrayMap
+from clojure.lang.persistenthashmap import (PersistentHashMap, ArrayNode,
+                                            BitmapIndexedNode)
+from clojure.lang.persistenthashset import PersistentHashSet
+from clojure.lang.persistentlist import PersistentList, EmptyList
+from clojure.lang.persistentvector import PersistentVector
+from clojure.lang.pytypes import (pyNoneType, pyBoolType, pyIntType,
+                                  pyLongType, pyFloatType, pyStrType,
+                                  pyUnicodeType)
+import clojure.lang.rt as RT
+from clojure.lang.symbol import Symbol
+
+
+class PartsWriter(object):
+    """A writer appending what is written to a list, for the protocol
+    fallback.
+    """
+    def __init__(self, parts):
+        self.write = parts.append
+
+
+def writeNodeEntries(node, parts, writers):
+    """Writes the entries of a PersistentHashMap node, in seq order,
+    each followed by ", ".
+    """
+    if type(node) is ArrayNode:
+        for child in node.array:
+            if child is not None:
+                writeNodeEntries(child, parts, writers)
+        return
+    array = node.array
+    for i in range(0, len(array), 2):
+        key = array[i]
+        if key is not None:
+            write(key, parts, writers)
+            parts.append(" ")
+            write(array[i + 1], parts, writers)
+            parts.append(", ")
+        elif type(node) is BitmapIndexedNode and array[i + 1] is not None:
+            writeNodeEntries(array[i + 1], parts, writers)
+
+
+def writeHashMap(m, parts, writers):
+    parts.append("{")
+    if m.hasNull:
+        parts.append("nil ")
+        write(m.noneValue, parts, writers)
+        parts.append(", ")
+    if m.root is not None:
+        writeNodeEntries(m.root, parts, writers)
+    if parts[-1] == ", ":
+        parts[-1] = "}"
+    else:
+        parts.append("}")
+
+
+def writeArrayMap(m, parts, writers):
+    parts.append("{")
+    array = m.array
+    for i in range(0, len(array), 2):
+        if i:
+            parts.append(", ")
+        write(array[i], parts, writers)
+        parts.append(" ")
+        write(array[i + 1], parts, writers)
+    parts.append("}")
+
+
+def writeItems(items, parts, writers, start, end):
+    parts.append(start)
+    for x in items:
+        write(x, parts, writers)
+        parts.append(" ")
+    if parts[-1] == " ":
+        parts[-1] = end
+    else:
+        parts.append(end)
+
+
+def vectorItems(v):
+    for i in range(0, v._cnt, 32):
+        for x in v._arrayFor(i):
+            yield x
+
+
+def listItems(lst):
+    s = lst
+    for i in range(lst._count):
+        yield s._first
+        s = s._rest
+
+
+def setItems(st):
+    impl = st.impl
+    if type(impl) is PersistentHashMap:
+        # the keys of a set's map are its items
+        if impl.hasNull:
+            yield None
+        if impl.root is not None:
+            for key in nodeKeys(impl.root):
+                yield key
+    else:
+        s = impl.seq()
+        while s is not None:
+            yield s.first().getKey()
+            s = s.next()
+
+
+def nodeKeys(node):
+    if type(node) is ArrayNode:
+        for child in node.array:
+            if child is not None:
+                for key in nodeKeys(child):
+                    yield key
+        return
+    array = node.array
+    for i in range(0, len(array), 2):
+        if array[i] is not None:
+            yield array[i]
+        elif type(node) is BitmapIndexedNode and array[i + 1] is not None:
+            for key in nodeKeys(array[i + 1]):
+                yield key
+
+
+def writeVector(v, parts, writers):
+    writeItems(vectorItems(v), parts, writers, "[", "]")
+
+
+def writeList(lst, parts, writers):
+    writeItems(listItems(lst), parts, writers, "(", ")")
+
+
+def writeSet(st, parts, writers):
+    writeItems(setItems(st), parts, writers, "#{", "}")
+
+
+def write(obj, parts, writers):
+    writer = writers.get(type(obj))
+    if writer is not None:
+        writer(obj, parts, writers)
+    else:
+        writers[None](obj, PartsWriter(parts))
+
+
+def writeReplStr(s, parts, writers):
+    parts.append('"')
+    parts.append(RT.stringEscape(s))
+    parts.append('"')
+
+
+def writeReplUnicode(s, parts, writers):
+    parts.append(u'"{0}"'.format(RT.stringEscape(s)).encode("utf-8"))
+
+
+def writeStr(s, parts, writers):
+    parts.append(s)
+
+
+def writeUnicode(s, parts, writers):
+    parts.append(s.encode("utf-8"))
+
+
+def writeNil(obj, parts, writers):
+    parts.append("nil")
+
+
+def writeBool(obj, parts, writers):
+    parts.append("true" if obj else "false")
+
+
+def writeNumber(obj, parts, writers):
+    parts.append(str(obj))
+
+
+def writeRepr(obj, parts, writers):
+    parts.append(repr(obj))
+
+
+def writeEmptyList(obj, parts, writers):
+    parts.append("()")
+
+
+_commonWriters = {pyNoneType: writeNil,
+                  pyBoolType: writeBool,
+                  pyIntType: writeNumber,
+                  pyLongType: writeNumber,
+                  pyFloatType: writeNumber,
+                  Keyword: writeRepr,
+                  Symbol: writeRepr,
+                  PersistentHashMap: writeHashMap,
+                  PersistentArrayMap: writeArrayMap,
+                  PersistentVector: writeVector,
+                  PersistentList: writeList,
+                  EmptyList: writeEmptyList,
+                  PersistentHashSet: writeSet,
+                  }
+
+# type -> writer, the writer under None is the protocol fn for the rest
+replWriters = dict(_commonWriters)
+replWriters.update({pyStrType: writeReplStr,
+                    pyUnicodeType: writeReplUnicode,
+                    None: RT.protocols.writeAsReplString,
+                    })
+
+strWriters = dict(_commonWriters)
+strWriters.update({pyStrType: writeStr,
+                   pyUnicodeType: writeUnicode,
+                   None: RT.protocols.writeAsString,
+                   })
+
+
+def _writeAll(objs, writers):
+    parts = []
+    for i, obj in enumerate(objs):
+        if i:
+            parts.append(" ")
+        write(obj, parts, writers)
+    return "".join(parts)
+
+
+def prStr(*objs):
+    """Returns the readable strings of objs, as pr prints them, separated
+    by a space.
+    """
+    return _writeAll(objs, replWriters)
+
+
+def printStr(*objs):
+    """Returns the strings of objs, as print prints them, separated by a
+    space.
+    """
+    return _writeAll(objs, strWriters)
@@ -1,3 +1,4 @@
+import itertools
 import re
 import sys
 
@@ -121,33 +122,23 @@ def list(*args):
 
 
 def vector(*args):
-    from clojure.lang.persistentvector import EMPTY
-    c = EMPTY
-    for x in args:
-        c = c.cons(x)
-    return c
+    from clojure.lang.persistentvector import create
+    return create(*args)
 
 
 def map(*args):
-    from clojure.lang.persistenthashmap import EMPTY
+    from clojure.lang.persistenthashmap import EMPTY, fromItems
     if len(args) == 0:
         return EMPTY
     if len(args) == 1:
         if isinstance(args[0], dict):
-            m = EMPTY
-            for x in args[0]:
-                if x in m:
-                    raise InvalidArgumentException("Duplicate key")
-                m = m.assoc(x, args[0][x])
-            return m
+            return fromItems(args[0].iteritems())
         if fulfillsIndexable(args[0]):
             args = args[0]
-    m = EMPTY
-    for x in range(0, len(args), 2):
-        key = args[x]
-        value = args[x + 1]
-        m = m.assoc(key, value)
-    return m
+    if len(args) % 2:
+        raise InvalidArgumentException("Even number of args required to map")
+    it = iter(args)
+    return fromItems(itertools.izip(it, it))
 
 def set(*args):
     from clojure.lang.persistenthashset import EMPTY
@@ -312,6 +303,16 @@ def _extendIPrintableForManuals():
                          .format(type(obj).__module__, type(obj).__name__,
                                  id(obj))))
 
+def prStr(*objs):
+    """Return what pr prints for objs, see clojure.lang.printer."""
+    import clojure.lang.printer as printer
+    return printer.prStr(*objs)
+
+def printStr(*objs):
+    """Return what print prints for objs, see clojure.lang.printer."""
+    import clojure.lang.printer as printer
+    return printer.printStr(*objs)
+
 # this is only for the current Python-coded repl
 def printTo(obj, writer=sys.stdout):
     protocols.writeAsReplString(obj, writer)
@@ -319,10 +320,11 @@ def printTo(obj, writer=sys.stdout):
     writer.flush()
 
 def _extendSeqableForManuals():
+    from clojure.lang.arraychunk import ArrayChunk
     from clojure.lang.indexableseq import create as createIndexableSeq
     
     protocols.seq.extendForTypes(
-        [pyTupleType, pyListType, pyStrType, pyUnicodeType],
+        [pyTupleType, pyListType, pyStrType, pyUnicodeType, ArrayChunk],
         lambda obj: createIndexableSeq(obj))
     protocols.seq.extend(type(None), lambda x: None)
     
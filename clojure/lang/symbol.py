@@ -1,3 +1,5 @@
+import weakref
+
 from clojure.lang.iprintable import IPrintable
 from clojure.lang.iobj import IObj
 from clojure.lang.cljexceptions import ArityException
@@ -32,6 +34,8 @@ class Symbol(IObj, IPrintable, Named):
             self._meta, self.ns, self.name = args
         else:
             raise ArityException()
+        # symbols are dict keys everywhere in the compiler, and immutable
+        self._hash = hash(self.name) ^ hash(self.ns)
 
     def getNamespace(self):
         return self.ns
@@ -42,6 +46,8 @@ class Symbol(IObj, IPrintable, Named):
     def withMeta(self, meta):
         if meta is self.meta():
             return self
+        if meta is None:
+            return intern(self.ns, self.name)
         return Symbol(meta, self.ns, self.name)
 
     def meta(self):
@@ -58,7 +64,11 @@ class Symbol(IObj, IPrintable, Named):
         return not self == other
 
     def __hash__(self):
-        return hash(self.name) ^ hash(self.ns)
+        return self._hash
+
+    def __reduce__(self):
+        # the hash is recomputed by the process unpickling
+        return Symbol, (self._meta, self.ns, self.name)
 
     def writeAsString(self, writer):
         writer.write(repr(self))
@@ -71,3 +81,21 @@ class Symbol(IObj, IPrintable, Named):
             return self.name
         else:
             return self.ns + "/" + self.name
+
+
+# (ns, name) -> the Symbol without metadata interned for it, as long as it
+# is in use
+_interned = weakref.WeakValueDictionary()
+
+
+def intern(ns, name):
+    """Returns the one Symbol without metadata for ns and name. The reader
+    interns the symbols it reads, so that the same symbol read many times
+    is one object, compared by identity in dict lookups.
+    """
+    key = (ns, name)
+    sym = _interned.get(key)
+    if sym is None:
+        sym = Symbol(None, ns, name)
+        sym = _interned.setdefault(key, sym)
+    return sym
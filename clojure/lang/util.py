@@ -46,8 +46,8 @@ def conjToAssoc(self, o):
 def bitCount(i):
     i -= ((i >> 1) & 0x55555555)
     i = (i & 0x33333333) + ((i >> 2) & 0x33333333)
-    return (((i + (i >> 4)) & 0x0F0F0F0F) * 0x01010101) >> 24
+    return ((((i + (i >> 4)) & 0x0F0F0F0F) * 0x01010101) & 0xFFFFFFFF) >> 24
 
 
 def arrayCopy(src, srcPos, dest, destPos, length):
-    dest[destPos:length] = src[srcPos:length]
+    dest[destPos:destPos + length] = src[srcPos:srcPos + length]
@@ -1,4 +1,6 @@
 import contextlib
+from types import CodeType
+import weakref
 
 from clojure.lang.aref import ARef
 from clojure.lang.atomicreference import AtomicReference
@@ -19,6 +21,8 @@ STATIC_KEY = Keyword("static")
 dvals = ThreadLocal()
 privateMeta = create([privateKey, True])
 UNKNOWN = Symbol("UNKNOWN")
+# attribute of a fn holding the Vars it is a dependent of, see link
+LINKED_VARS_ATTR = "_linked-vars"
 
 
 class Var(ARef, Settable, IFn, IPrintable):
@@ -39,6 +43,7 @@ class Var(ARef, Settable, IFn, IPrintable):
         self._meta = EMPTY
         self.dynamic = False
         self.public = True
+        self.dependents = None
 
     def setDynamic(self, val=True):
         self.dynamic = val
@@ -72,16 +77,39 @@ class Var(ARef, Settable, IFn, IPrintable):
             format(self.sym))
         
     def alterRoot(self, fn, args):
-        return self.root.mutate(lambda old: fn(old, *(args if args else ())))
+        old = self.root.get()
+        ret = self.root.mutate(lambda old: fn(old, *(args if args else ())))
+        self.relink(old)
+        return ret
 
     def hasRoot(self):
         return not isinstance(self.root.get(), Unbound)
 
     def bindRoot(self, root):
         self.validate(self.getValidator(), root)
+        old = self.root.get()
         self.root.set(root)
+        self.relink(old)
         return self
 
+    def addDependent(self, fn):
+        """Registers a fn whose code holds the root of this Var as a
+        constant. The fn is only weakly referenced.
+        """
+        if self.dependents is None:
+            self.dependents = weakref.WeakSet()
+        self.dependents.add(fn)
+
+    def relink(self, old):
+        """Replaces the old root by the current one in the code of the
+        dependents of this Var.
+        """
+        root = self.root.get()
+        if self.dependents is None or root is old:
+            return
+        for fn in list(self.dependents):
+            fn.func_code = replaceConst(fn.func_code, old, root)
+
     def __call__(self, *args, **kw):
         """Exists for Python interop, don't use in clojure code"""
         return self.deref()(*args, **kw)
@@ -120,6 +148,36 @@ class Var(ARef, Settable, IFn, IPrintable):
         return "#<Var: {0}>".format(self.sym or "--unnamed--")
 
 
+def link(fn, vars):
+    """Makes fn a dependent of vars, whose roots its code holds as constants.
+    """
+    setattr(fn, LINKED_VARS_ATTR, tuple(vars))
+    for v in vars:
+        v.addDependent(fn)
+
+
+def replaceConst(code, old, new):
+    """Returns code with the constant old replaced by new, by identity,
+    including in the code objects nested in it.
+    """
+    consts = []
+    changed = False
+    for c in code.co_consts:
+        if c is old:
+            c = new
+        elif isinstance(c, CodeType):
+            c = replaceConst(c, old, new)
+        changed = changed or c is not code.co_consts[len(consts)]
+        consts.append(c)
+    if not changed:
+        return code
+    return CodeType(code.co_argcount, code.co_nlocals, code.co_stacksize,
+                    code.co_flags, code.co_code, tuple(consts),
+                    code.co_names, code.co_varnames, code.co_filename,
+                    code.co_name, code.co_firstlineno, code.co_lnotab,
+                    code.co_freevars, code.co_cellvars)
+
+
 class TBox(object):
     def __init__(self, thread, val):
         self.thread = thread
@@ -0,0 +1,121 @@
+"""A pool of worker processes forked from a warm clojure-py process.
+
+Starting a clojure-py process loads clojure.core, and every namespace the
+work needs, all over again. A WorkerPool loads the namespaces once in this
+process and then forks its workers from it: they start in milliseconds,
+with clojure.core and those namespaces already loaded, and share the pages
+of the loaded heap with this process until they write to them. Workers
+that die, or have run maxtasks tasks, are replaced by new forks.
+
+Work is dispatched as a function Var and arguments. The Var is sent by
+name and resolved in the worker, the arguments and the result are pickled,
+so they can be numbers, strings, keywords, symbols and persistent
+collections of those, or any other picklable value.
+"""
+
+import importlib
+import multiprocessing
+import sys
+
+from clojure.lang.cljexceptions import IllegalArgumentException
+from clojure.lang.namespace import findItem
+from clojure.lang.symbol import Symbol
+from clojure.lang.var import Var
+
+
+def varName(var):
+    """Returns the (namespace name, name) of a Var, or of the Var a
+    namespace-qualified Symbol names.
+    """
+    if isinstance(var, Var) and var.ns is not None:
+        return var.ns.__name__, var.sym.name
+    if isinstance(var, Symbol) and var.ns is not None:
+        return var.ns, var.name
+    raise IllegalArgumentException(
+        "Expected a namespace Var or a qualified Symbol, got {0}".format(var))
+
+
+def resolveVar(nsname, name):
+    """Returns the Var named name in the namespace nsname, loading it if it
+    isn't yet.
+    """
+    ns = sys.modules.get(nsname)
+    if ns is None:
+        ns = importlib.import_module(nsname)
+    var = findItem(ns, Symbol(name))
+    if var is None:
+        raise IllegalArgumentException(
+            "No Var {0}/{1} in the worker".format(nsname, name))
+    return var
+
+
+def callVar(nsname, name, args):
+    """Runs in a worker: calls the Var named name in nsname with args.
+    """
+    return resolveVar(nsname, name).deref()(*args)
+
+
+def _callVarStar(task):
+    return callVar(*task)
+
+
+class WorkerPool(object):
+    """A pool of processes forked from this one, once the namespaces the
+    work needs are loaded.
+
+    processes is the number of workers, the number of CPUs by default.
+    namespaces are the names of the namespaces to load before forking; the
+    namespaces of the Vars dispatched that aren't loaded by then are loaded
+    by each worker on its first use. A worker is replaced after maxtasks
+    tasks, if given.
+    """
+
+    def __init__(self, processes=None, namespaces=(), maxtasks=None):
+        for nsname in namespaces:
+            if nsname not in sys.modules:
+                importlib.import_module(nsname)
+        self.pool = multiprocessing.Pool(processes, maxtasksperchild=maxtasks)
+
+    def apply(self, var, *args):
+        """Calls var with args in a worker, returns the result.
+        """
+        return self.applyAsync(var, args).get()
+
+    def applyAsync(self, var, args=(), callback=None):
+        """Calls var with args in a worker, returns the AsyncResult of the
+        call. callback, if given, is called with the result in this
+        process.
+        """
+        nsname, name = varName(var)
+        return self.pool.apply_async(callVar, (nsname, name, tuple(args)),
+                                     callback=callback)
+
+    def map(self, var, coll, chunksize=None):
+        """Calls var with each item of coll in the workers, returns the
+        list of the results in the order of coll.
+        """
+        nsname, name = varName(var)
+        return self.pool.map(_callVarStar,
+                             [(nsname, name, (item,)) for item in coll],
+                             chunksize)
+
+    def close(self):
+        """Lets the workers exit once the work dispatched is done.
+        """
+        self.pool.close()
+        self.pool.join()
+
+    def terminate(self):
+        """Stops the workers right away.
+        """
+        self.pool.terminate()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
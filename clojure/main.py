@@ -3,22 +3,30 @@
 define main().
 """
 
+import atexit
+from contextlib import closing
 import cPickle
+import cStringIO
+import dis
 import imp
 from optparse import OptionParser
+import os
 import os.path
 import sys
 import traceback
 
 from clojure.lang.cljexceptions import NoNamespaceException
 from clojure.lang.compiler import Compiler
-from clojure.lang.fileseq import StringReader
+from clojure.lang.fileseq import openReader
 from clojure.lang.globals import currentCompiler
-from clojure.lang.lispreader import read
+from clojure.lang.lazynamespace import loadLazy
+from clojure.lang.lispreader import read, LINE_KEY
+import clojure.lang.loadprofile as loadprofile
 from clojure.lang.namespace import Namespace, findItem
 import clojure.lang.rt as RT
 from clojure.lang.symbol import Symbol
 from clojure.lang.var import threadBindings
+import clojure.util.freeze as freeze
 
 
 VERSION = "0.2.4"
@@ -52,15 +60,20 @@ class MetaImporter(object):
         """
         if name not in sys.modules:
             sys.modules[name] = None # avoids circular imports
+            path = self.path
+            sourceFiles[name] = (os.path.abspath(path), fileStamp(path))
             try:
-                requireClj(self.path)
+                if name in lazyNamespaces:
+                    loadLazy(path)
+                else:
+                    requireClj(path, useCache=cacheEnabled)
             except Exception as exc:
                 del sys.modules[name]
                 traceback.print_exc()
                 raise ImportError("requireClj raised an exception.")
             if sys.modules[name] == None:
                 del sys.modules[name]
-                raise NoNamespaceException(self.path, name)
+                raise NoNamespaceException(path, name)
             sys.modules[name].__loader__ = self
         return sys.modules[name]
 
@@ -74,37 +87,269 @@ sys.meta_path.append(MetaImporter())
 sys.path.insert(0, "")
 
 
-def requireClj(filename, stopafter=None):
+# namespaces imported lazily, see clojure.lang.lazynamespace. They are not
+# cached.
+lazyNamespaces = set(filter(None,
+                            os.environ.get("CLOJURE_PY_LAZY", "").split(",")))
+
+# load profiling from startup on, see clojure.lang.loadprofile
+if os.environ.get("CLOJURE_PY_PROFILE_LOAD"):
+    loadprofile.enable()
+    atexit.register(loadprofile.report)
+
+# compiled namespaces are cached in __pycache__/<name>.cljc next to the
+# source, see requireClj
+cacheEnabled = True
+CACHE_MAGIC = "CLJC"
+# bumped when the layout of cache files changes
+CACHE_VERSION = 2
+
+# namespace name -> (absolute path, fileStamp) of the clj file MetaImporter
+# loaded it from
+sourceFiles = {}
+# absolute path of a clj file loaded from or into its cache -> the
+# (path, fileStamp) of the clj files that cache depends on
+fileDeps = {}
+
+
+def cachePath(filename):
+    """Returns the path of the compiled-namespace cache of a clj file.
+    """
+    head, tail = os.path.split(filename)
+    return os.path.join(head, "__pycache__", tail + "c")
+
+
+def fileStamp(filename):
+    """Returns the mtime and size of a file.
+    """
+    st = os.stat(filename)
+    return repr(st.st_mtime), st.st_size
+
+
+def cacheKey(filename):
+    """Returns what a cache file must have been built from to be fresh: the
+    clojure-py, cache and freeze format versions, the Python bytecode magic
+    and the mtime and size of the source.
+
+    The files of the namespaces the source requires must not have changed
+    either, see CacheWriter.dependencies.
+    """
+    return (VERSION, CACHE_VERSION, freeze.FORMAT_VERSION,
+            imp.get_magic()) + fileStamp(filename)
+
+
+class CacheWriter(object):
+    """Writes the code objects of the top-level forms of a clj file, in
+    execution order, along with the namespace each one ran in.
+
+    Set as the cacheWriter of the Compiler loading the file, which the
+    namespaces it requires are reported to. Output is kept in memory and only
+    replaces the cache, through a temporary file, once the whole file has
+    been loaded and its dependencies are known. If a form holds a constant
+    that can't be frozen, the cache is abandoned and the file is simply
+    loaded uncached.
+    """
+
+    def __init__(self, filename):
+        self.filename = os.path.abspath(filename)
+        self.path = cachePath(filename)
+        self.tmppath = "{0}.{1}.tmp".format(self.path, os.getpid())
+        self.key = cacheKey(filename)
+        # every namespace refers clojure.core
+        self.required = set(["clojure.core"])
+        self.state = freeze.WriterState()
+        dirname = os.path.dirname(self.path)
+        if not os.path.isdir(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                # created concurrently
+                pass
+        self.strm = cStringIO.StringIO()
+
+    def require(self, name):
+        """Notes that the file required the namespace name.
+        """
+        self.required.add(name)
+
+    def dependencies(self):
+        """Returns the sorted (path, fileStamp) of the files the required
+        namespaces were loaded from, and of those their caches depend on:
+        macros of theirs the file used may have been expanded in its cache.
+        """
+        deps = set()
+        for name in self.required:
+            source = sourceFiles.get(name)
+            if source is not None and source[0] != self.filename:
+                deps.add(source)
+                deps.update(fileDeps.get(source[0], ()))
+        return tuple(sorted(deps))
+
+    def record(self, ns, code):
+        if self.strm is None:
+            return
+        try:
+            freeze.write(ns.__name__, self.strm, self.state)
+            freeze.write(code, self.strm, self.state)
+        except freeze.FreezeException:
+            self.abandon()
+
+    def abandon(self):
+        if self.strm is not None:
+            self.strm.close()
+            self.strm = None
+
+    def commit(self):
+        if self.strm is None:
+            return
+        freeze.write(None, self.strm, self.state)
+        body = self.strm.getvalue()
+        self.strm.close()
+        self.strm = None
+        deps = self.dependencies()
+        fileDeps[self.filename] = deps
+        try:
+            with open(self.tmppath, "wb") as fl:
+                fl.write(CACHE_MAGIC)
+                # the header has its own freeze state, read before the body
+                state = freeze.WriterState()
+                freeze.write(self.key, fl, state)
+                freeze.write(deps, fl, state)
+                fl.write(body)
+            os.rename(self.tmppath, self.path)
+        except (IOError, OSError):
+            # left uncached
+            if os.path.exists(self.tmppath):
+                os.remove(self.tmppath)
+
+
+def openCache(filename):
+    """Opens the cache of a clj file if it is fresh: built from the current
+    source, and none of the files it depends on changed since.
+
+    Returns the open cache file, positioned after its header, the
+    freeze.ReaderState to read the rest of it with and the dependencies of
+    the cache, or None.
+    """
+    try:
+        fl = open(cachePath(filename), "rb")
+    except IOError:
+        return None
+    state = freeze.ReaderState()
+    try:
+        if (fl.read(len(CACHE_MAGIC)) == CACHE_MAGIC
+            and freeze.read(fl, state) == cacheKey(filename)):
+            deps = freeze.read(fl, state)
+            if all(fileStamp(path) == stamp for path, stamp in deps):
+                return fl, freeze.ReaderState(), deps
+    except (freeze.FreezeException, OSError):
+        pass
+    fl.close()
+    return None
+
+
+def cacheFresh(filename):
+    """Returns True if the cache of a clj file is fresh.
+    """
+    cache = openCache(filename)
+    if cache is None:
+        return False
+    cache[0].close()
+    return True
+
+
+def loadCached(filename):
+    """Replays the cached code of a clj file, if the cache is fresh.
+
+    Returns True if the file was loaded from its cache. A cache that can't
+    be replayed is removed, the caller then has to compile the file.
+    """
+    cache = openCache(filename)
+    if cache is None:
+        return False
+    path = cachePath(filename)
+    fl, state, deps = cache
+    fileDeps[os.path.abspath(filename)] = deps
+    with fl:
+        RT.init()
+        comp = Compiler()
+        comp.setFile(filename)
+        with threadBindings({currentCompiler: comp}):
+            try:
+                while True:
+                    with loadprofile.form(filename) as timing:
+                        with loadprofile.phase("read"):
+                            nsname = freeze.read(fl, state)
+                            if nsname is None:
+                                break
+                            code = freeze.read(fl, state)
+                        timing.line = next(dis.findlinestarts(code),
+                                           (0, None))[1] or None
+                        comp.executeCompiled(code, Namespace(nsname))
+                        timing.ns = nsname
+            except Exception:
+                fl.close()
+                os.remove(path)
+                return False
+    return True
+
+
+def requireClj(filename, stopafter=None, useCache=False):
     """Compiles and executes the code in a clj file.
     
     If `stopafter` is given, then stop execution as soon as the `stopafter`
     name is defined in the current namespace of the compiler.
+
+    If `useCache` is true, the file is loaded from its compiled-namespace
+    cache when that one is fresh, and the cache is rebuilt otherwise.
     """
-    with open(filename) as fl:
-        r = StringReader(fl.read())
+    useCache = useCache and stopafter is None
+    if useCache and loadCached(filename):
+        return
+
+    r = openReader(filename)
 
     RT.init()
     comp = Compiler()
     comp.setFile(filename)
+    if useCache:
+        try:
+            comp.cacheWriter = CacheWriter(filename)
+        except (IOError, OSError):
+            pass
 
-    with threadBindings({currentCompiler: comp}): #, open(filename + ".cljc", "w") as o:
+    with closing(r), threadBindings({currentCompiler: comp}):
         try:
             while True:
                 EOF = object()
-                s = read(r, False, EOF, True)
-                if s is EOF:
-                    break
-                #cPickle.dump(s, o)
-                try:
-                    res = comp.compile(s)
-                    comp.executeCode(res)
-                    if stopafter is not None and hasattr(comp.getNS(), stopafter):
+                with loadprofile.form(filename) as timing:
+                    with loadprofile.phase("read"):
+                        s = read(r, False, EOF, True)
+                    if s is EOF:
                         break
-                except Exception as exp:
-                    print s, filename
-                    raise
+                    m = getattr(s, "meta", lambda: None)()
+                    timing.line = m[LINE_KEY] if m is not None else None
+                    try:
+                        with loadprofile.phase("compile"):
+                            res = comp.compile(s)
+                        comp.executeCode(res)
+                        timing.ns = comp.getNS().__name__
+                        if stopafter is not None and hasattr(comp.getNS(), stopafter):
+                            break
+                    except Exception as exp:
+                        print s, filename
+                        raise
         except IOError as e:
-            pass
+            if comp.cacheWriter is not None:
+                comp.cacheWriter.abandon()
+        except:
+            if comp.cacheWriter is not None:
+                comp.cacheWriter.abandon()
+            raise
+        else:
+            if comp.cacheWriter is not None:
+                comp.cacheWriter.commit()
+        comp.cacheWriter = None
 
 
 def main():
@@ -127,6 +372,12 @@ def main():
         help="inspect interactively after running script")
     parser.add_option("-q", action="store_true", dest="quiet",
         help="don't print version message on interactive startup")
+    parser.add_option("--profile-load", action="store_true",
+        dest="profile_load",
+        help="time the loading of namespaces and report it on exit")
+    parser.add_option("-j", "--jobs", type="int", dest="jobs",
+        help="compile the namespaces the script requires with JOBS "
+             "processes before running it")
     # fooling OptionParser
     parser.add_option("--\b\bfile", action="store_true",
         help="    program read from script file")
@@ -145,6 +396,10 @@ def main():
     command_line_args.extend(dash_and_post)
     opts.command_line_args = command_line_args
 
+    if opts.profile_load and not loadprofile.enabled:
+        loadprofile.enable()
+        atexit.register(loadprofile.report)
+
     RT.init()
     comp = Compiler()
 
@@ -153,6 +408,9 @@ def main():
     with threadBindings({currentCompiler: comp,
                          command_line_args_sym: command_line_args}):
         if source:
+            if opts.jobs and opts.jobs > 1:
+                import clojure.lang.parallelload as parallelload
+                parallelload.preloadRequires(source, opts.jobs)
             requireClj(source)
         if opts.interactive or not source and not opts.cmd:
             import clojure.repl
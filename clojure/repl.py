@@ -43,6 +43,16 @@ def enable_readline():
     return True
 
 
+def enter_user_ns(comp):
+    """Sets the namespace of comp to user, referring clojure.core in it.
+    """
+    comp.setNS(Symbol("user"))
+    core = sys.modules["clojure.core"]
+    for i in dir(core):
+        if not i.startswith("_"):
+            setattr(comp.getNS(), i, getattr(core, i))
+
+
 def run_repl(opts, comp=None):
     """Initializes and runs the REPL. Assumes that RT.init has been called.
 
@@ -60,11 +70,7 @@ def run_repl(opts, comp=None):
             currentCompiler.set(comp)
         else:
             comp = curr
-    comp.setNS(Symbol("user"))
-    core = sys.modules["clojure.core"]
-    for i in dir(core):
-        if not i.startswith("_"):
-            setattr(comp.getNS(), i, getattr(core, i))
+    enter_user_ns(comp)
 
     line = opts.cmd
     last3 = [None, None, None]
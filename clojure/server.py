@@ -0,0 +1,209 @@
+"""A long-lived evaluation server, so that running clj code doesn't pay for
+starting clojure-py and loading clojure.core every time.
+
+The server listens on a TCP or a Unix socket. Every message exchanged is a
+frame: a 4-byte big-endian length followed by that many bytes of UTF-8. A
+client sends the source of one or more forms in a frame, the server reads
+and evaluates them in order and replies with four frames:
+
+  tag - "ret", or "err" if reading or evaluating raised an exception
+  ns  - the name of the namespace of the connection after evaluating
+  out - what the forms wrote to *out*
+  val - the readable string of the last value for "ret", the traceback
+        for "err"
+
+Each connection is evaluated in its own thread, with its own compiler and
+thread bindings of *ns*, *out* and *1 to *3, starting in the user
+namespace. The namespaces loaded are shared by all connections.
+
+clojure_client.py, next to the package, is a client that doesn't need to
+load clojure-py.
+"""
+
+import collections
+from optparse import OptionParser
+import os
+import signal
+import socket
+import SocketServer
+from StringIO import StringIO
+import struct
+import sys
+import traceback
+
+from clojure.lang.compiler import Compiler
+from clojure.lang.fileseq import StringReader
+from clojure.lang.globals import currentCompiler
+from clojure.lang.lispreader import read
+from clojure.lang.namespace import Namespace, findItem
+import clojure.lang.rt as RT
+from clojure.lang.symbol import Symbol
+from clojure.lang.var import threadBindings
+from clojure.repl import enter_user_ns
+
+
+FRAME_HEADER = struct.Struct(">I")
+
+_core = Namespace("clojure.core")
+NS_VAR = findItem(_core, Symbol("*ns*"))
+OUT_VAR = findItem(_core, Symbol("*out*"))
+RESULT_VARS = [findItem(_core, Symbol("*{0}".format(i))) for i in (1, 2, 3)]
+
+Reply = collections.namedtuple("Reply", "tag ns out val")
+
+
+def readFrame(fl):
+    """Returns the payload of the next frame of the file object fl, or None
+    at the end of the file.
+    """
+    header = fl.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    size, = FRAME_HEADER.unpack(header)
+    payload = fl.read(size)
+    if len(payload) < size:
+        return None
+    return payload
+
+
+def writeFrame(fl, payload):
+    """Writes payload, a str or unicode, to the file object fl as a frame.
+    """
+    if isinstance(payload, unicode):
+        payload = payload.encode("utf-8")
+    fl.write(FRAME_HEADER.pack(len(payload)))
+    fl.write(payload)
+
+
+def evaluate(comp, source):
+    """Reads and evaluates the forms of source with the compiler comp,
+    returns the Reply.
+
+    Has to run within the thread bindings of a connection, see
+    EvalHandler.
+    """
+    out = StringIO()
+    with threadBindings({OUT_VAR: out}):
+        try:
+            EOF = object()
+            r = StringReader(source)
+            value = EOF
+            while True:
+                form = read(r, False, EOF, True)
+                if form is EOF:
+                    break
+                value = comp.executeCode(comp.compile(form))
+            if value is EOF:
+                tag, val = "ret", "nil"
+            else:
+                tag, val = "ret", RT.prStr(value)
+                results = [value] + [var.deref() for var in RESULT_VARS[:2]]
+                for var, result in zip(RESULT_VARS, results):
+                    var.set(result)
+        except Exception:
+            tag, val = "err", traceback.format_exc()
+    return Reply(tag, comp.getNS().__name__, out.getvalue(), val)
+
+
+class EvalHandler(SocketServer.StreamRequestHandler):
+    """Evaluates the frames of a connection until the client closes it.
+    """
+
+    def handle(self):
+        comp = Compiler()
+        enter_user_ns(comp)
+        bindings = {currentCompiler: comp, NS_VAR: comp.getNS()}
+        bindings.update((var, None) for var in RESULT_VARS)
+        with threadBindings(bindings):
+            while True:
+                source = readFrame(self.rfile)
+                if source is None:
+                    break
+                for part in evaluate(comp, source):
+                    writeFrame(self.wfile, part)
+                self.wfile.flush()
+
+
+class TCPEvalServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class UnixEvalServer(SocketServer.ThreadingMixIn,
+                     SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+
+def makeServer(address):
+    """Returns a server bound to address: a (host, port) tuple for TCP, or
+    the path of a Unix socket.
+    """
+    if isinstance(address, basestring):
+        return UnixEvalServer(address, EvalHandler)
+    return TCPEvalServer(address, EvalHandler)
+
+
+def serve(address):
+    """Serves on address until interrupted or terminated.
+    """
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server = makeServer(address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if isinstance(address, basestring):
+            os.remove(address)
+
+
+class Client(object):
+    """A connection to an evaluation server. The namespace and *1 to *3 of
+    the connection carry over from one eval to the next.
+    """
+
+    def __init__(self, address):
+        if isinstance(address, basestring):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address)
+        else:
+            self.sock = socket.create_connection(address)
+        self.rfile = self.sock.makefile("rb")
+        self.wfile = self.sock.makefile("wb")
+
+    def eval(self, source):
+        """Evaluates the forms of source on the server, returns the Reply.
+        """
+        writeFrame(self.wfile, source)
+        self.wfile.flush()
+        parts = [readFrame(self.rfile) for field in Reply._fields]
+        if None in parts:
+            raise IOError("connection closed by the server")
+        return Reply(*parts)
+
+    def close(self):
+        self.rfile.close()
+        self.wfile.close()
+        self.sock.close()
+
+
+def main():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option("--host", default="127.0.0.1",
+        help="the interface to listen on, 127.0.0.1 by default")
+    parser.add_option("-p", "--port", type="int",
+        help="listen on this TCP port")
+    parser.add_option("-s", "--socket",
+        help="listen on a Unix socket at this path")
+    opts, args = parser.parse_args()
+    if opts.socket:
+        serve(opts.socket)
+    elif opts.port is not None:
+        serve((opts.host, opts.port))
+    else:
+        parser.error("one of --port or --socket is required")
+
+
+if __name__ == "__main__":
+    main()
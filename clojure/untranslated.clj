@@ -77,42 +77,6 @@
      (binding [*in* s#]
        ~@body)))
 
-(defn pr-str
-  "pr to a string, returning it"
-  {:tag String
-   :added "1.0"
-   :static true}
-  [& xs]
-    (with-out-str
-     (apply pr xs)))
-
-(defn prn-str
-  "prn to a string, returning it"
-  {:tag String
-   :added "1.0"
-   :static true}
-  [& xs]
-  (with-out-str
-   (apply prn xs)))
-
-(defn print-str
-  "print to a string, returning it"
-  {:tag String
-   :added "1.0"
-   :static true}
-  [& xs]
-    (with-out-str
-     (apply print xs)))
-
-(defn println-str
-  "println to a string, returning it"
-  {:tag String
-   :added "1.0"
-   :static true}
-  [& xs]
-    (with-out-str
-     (apply println xs)))
-
 (import clojure.lang.ExceptionInfo)
 (defn ex-info
   "Alpha - subject to change.
@@ -280,18 +244,6 @@
    :static true}
   [x] (. clojure.lang.Util (hasheq x)))
 
-(defmacro definline
-  "Experimental - like defmacro, except defines a named function whose
-  body is the expansion, calls to which may be expanded inline as if
-  it were a macro. Cannot be used with variadic (&) args."
-  {:added "1.0"}
-  [name & decl]
-  (let [[pre-args [args expr]] (split-with (comp not vector?) decl)]
-    `(do
-       (defn ~name ~@pre-args ~args ~(apply (eval (list `fn args expr)) args))
-       (alter-meta! (var ~name) assoc :inline (fn ~name ~args ~expr))
-       (var ~name))))
-
 (defn empty
   "Returns an empty collection of the same category as coll, or nil"
   {:added "1.0"
@@ -1178,34 +1130,6 @@
      (let [s (seq coll)]
        (clojure.core.protocols/internal-reduce s f val))))
 
-(defn into
-  "Returns a new coll consisting of to-coll with all of the items of
-  from-coll conjoined."
-  {:added "1.0"
-   :static true}
-  [to from]
-  (if (instance? clojure.lang.IEditableCollection to)
-    (persistent! (reduce conj! (transient to) from))
-    (reduce conj to from)))
-
-(defn mapv
-  "Returns a vector consisting of the result of applying f to the
-  set of first items of each coll, followed by applying f to the set
-  of second items in each coll, until any one of the colls is
-  exhausted.  Any remaining items in other colls are ignored. Function
-  f should accept number-of-colls arguments."
-  {:added "1.4"
-   :static true}
-  ([f coll]
-     (-> (reduce (fn [v o] (conj! v (f o))) (transient []) coll)
-         persistent!))
-  ([f c1 c2]
-     (into [] (map f c1 c2)))
-  ([f c1 c2 c3]
-     (into [] (map f c1 c2 c3)))
-  ([f c1 c2 c3 & colls]
-     (into [] (apply map f c1 c2 c3 colls))))
-
 (defn filterv
   "Returns a vector of the items in coll for which
   (pred item) returns true. pred must be free of side-effects."
@@ -1434,20 +1358,6 @@
   (filter (complement sequential?)
           (rest (tree-seq sequential? seq x))))
 
-(defn group-by 
-  "Returns a map of the elements of coll keyed by the result of
-  f on each element. The value at each key will be a vector of the
-  corresponding elements, in the order they appeared in coll."
-  {:added "1.2"
-   :static true}
-  [f coll]  
-  (persistent!
-   (reduce
-    (fn [ret x]
-      (let [k (f x)]
-        (assoc! ret k (conj (get ret k []) x))))
-    (transient {}) coll)))
-
 (defn partition-by
   "Applies f to each value in coll, splitting it each time f returns
    a new value.  Returns a lazy seq of partitions."
@@ -1461,17 +1371,6 @@
            run (cons fst (take-while #(= fv (f %)) (next s)))]
        (cons run (partition-by f (seq (drop (count run) s))))))))
 
-(defn frequencies
-  "Returns a map from distinct items in coll to the number of times
-  they appear."
-  {:added "1.2"
-   :static true}
-  [coll]
-  (persistent!
-   (reduce (fn [counts x]
-             (assoc! counts x (inc (get counts x 0))))
-           (transient {}) coll)))
-
 (defn partition-all
   "Returns a lazy sequence of lists like partition, but may include
   partitions with fewer than n items at the end."
@@ -1,66 +1,689 @@
 ## A clojure-py implementation of deep-freeze. Used by the compiler
 ## for saving code modules
+##
+## Every object is written as a one byte type ID followed by a type specific
+## payload. Objects that may be shared (code objects, fns, Symbols, Keywords,
+## persistent collections) are remembered by both the writer and the reader
+## once they are complete, later occurrences are written as a back-reference
+## (seenID + index).
+import fractions
+import struct
+import sys
+from types import FunctionType, ModuleType
+
 from clojure.lang.protocol import ProtocolFn
-from clojure.lang.multimethod import MultiMethod
 from clojure.lang.pytypes import *
 
+# bump this whenever the layout of an existing type changes
+FORMAT_VERSION = 2
+
 topID = 0
 seenID = topID
-codeFreezeID = 1
+
+_readers = {}
+
+
+class FreezeException(Exception):
+    pass
+
 
 def registerType(name):
+    """Allocates a new type ID, available as the module global name + "ID".
+
+    Returns a decorator registering the reader for that ID. IDs are
+    allocated in definition order, so new types must be registered at the
+    end of this module (and FORMAT_VERSION bumped).
+    """
     global topID
     topID += 1
-    name = name + "ID"
-    globals()["name"] = topID
-    
-    def identity(fn):
-        return fn
-        
-    return identity
-    
-writeDispatcher = ProtocolFn("freeze-write")
-read = MultiMethod(lambda id, *args: id)
+    ID = topID
+    globals()[name + "ID"] = ID
 
+    def register(fn):
+        _readers[ID] = fn
+        return fn
 
-_codeAttrs = filter(lambda x: not x.startswith("_"), dir(pyTypeCode))
+    return register
 
-def writeCode(code, strm, state):
-    strm.write(codeFreezeID)
-    
-    for attr in _codeAttrs:
-        write(getattr(code, attr), strm, state) 
-        
-writeDispatcher.extend(pyTypeCode, writeCode)
 
+writeDispatcher = ProtocolFn("freeze-write")
 
-def write(obj, strm, state = None):
-    if state is None:
-        state = WriterState()
-    
-    if state.hasSeen(obj):
-        strm.write(seenID)
-        strm.write(state.getID(obj))
-    
-    writeDispatcher(obj, strm, state)
-    
-        
 
 class WriterState(object):
     def __init__(self):
         self.seen = {}
         self.nextIDX = -1
-        
+        # keeps the seen objects alive, ids could be reused otherwise
+        self.objects = []
+
     def hasSeen(self, obj):
-        return obj in self.seen
-        
+        return id(obj) in self.seen
+
     def getID(self, obj):
-        return self.seen[obj]
-        
+        return self.seen[id(obj)]
+
     def markSeen(self, obj):
         self.nextIDX += 1
-        self.seen[obj] = self.nextIDX
-        
+        self.seen[id(obj)] = self.nextIDX
+        self.objects.append(obj)
+
+
+class ReaderState(object):
+    def __init__(self):
+        self.objects = []
+
+    def markSeen(self, obj):
+        self.objects.append(obj)
+        return obj
+
+
+def write(obj, strm, state=None):
+    if state is None:
+        state = WriterState()
+
+    if state.hasSeen(obj):
+        writeID(seenID, strm)
+        writeInt(state.getID(obj), strm)
+        return
+
+    writeDispatcher(obj, strm, state)
+
+
+def read(strm, state=None):
+    if state is None:
+        state = ReaderState()
+
+    ID = ord(readBytes(1, strm))
+    if ID == seenID:
+        return state.objects[readInt(strm)]
+    try:
+        reader = _readers[ID]
+    except KeyError:
+        raise FreezeException("Unknown type ID {0}".format(ID))
+    return reader(strm, state)
+
+
+## Low level helpers
+
+_int = struct.Struct("<q")
+_float = struct.Struct("<d")
+
+
+def writeID(ID, strm):
+    strm.write(chr(ID))
+
+
+def writeInt(i, strm):
+    strm.write(_int.pack(i))
+
+
+def writeBytes(s, strm):
+    writeInt(len(s), strm)
+    strm.write(s)
+
+
+def readBytes(n, strm):
+    s = strm.read(n)
+    if len(s) != n:
+        raise FreezeException("Unexpected end of stream")
+    return s
+
+
+def readInt(strm):
+    return _int.unpack(readBytes(_int.size, strm))[0]
+
+
+def readString(strm):
+    return readBytes(readInt(strm), strm)
+
+
+def _writeSeq(itms, strm, state):
+    writeInt(len(itms), strm)
+    for x in itms:
+        write(x, strm, state)
+
+
+def _readSeq(strm, state):
+    return [read(strm, state) for x in range(readInt(strm))]
+
+
+## Python scalars
+
+@registerType("none")
+def readNone(strm, state):
+    return None
+
+writeDispatcher.extend(pyNoneType,
+                       lambda obj, strm, state: writeID(noneID, strm))
+
+
+@registerType("true")
+def readTrue(strm, state):
+    return True
+
+
+@registerType("false")
+def readFalse(strm, state):
+    return False
+
+writeDispatcher.extend(pyBoolType,
+    lambda obj, strm, state: writeID(trueID if obj else falseID, strm))
+
+
+@registerType("int")
+def readInteger(strm, state):
+    return readInt(strm)
+
+
+def writeInteger(obj, strm, state):
+    writeID(intID, strm)
+    writeInt(obj, strm)
+
+writeDispatcher.extend(pyIntType, writeInteger)
+
+
+@registerType("long")
+def readLong(strm, state):
+    return long(readString(strm))
+
+
+def writeLong(obj, strm, state):
+    writeID(longID, strm)
+    writeBytes(str(obj), strm)
+
+writeDispatcher.extend(pyLongType, writeLong)
+
+
+@registerType("float")
+def readFloat(strm, state):
+    return _float.unpack(readBytes(_float.size, strm))[0]
+
+
+def writeFloat(obj, strm, state):
+    writeID(floatID, strm)
+    strm.write(_float.pack(obj))
+
+writeDispatcher.extend(pyFloatType, writeFloat)
+
+
+@registerType("str")
+def readStr(strm, state):
+    return readString(strm)
+
+
+def writeStr(obj, strm, state):
+    writeID(strID, strm)
+    writeBytes(obj, strm)
+
+writeDispatcher.extend(pyStrType, writeStr)
+
+
+@registerType("unicode")
+def readUnicode(strm, state):
+    return readString(strm).decode("utf-8")
+
+
+def writeUnicode(obj, strm, state):
+    writeID(unicodeID, strm)
+    writeBytes(obj.encode("utf-8"), strm)
+
+writeDispatcher.extend(pyUnicodeType, writeUnicode)
+
+
+@registerType("tuple")
+def readTuple(strm, state):
+    return tuple(_readSeq(strm, state))
+
+
+def writeTuple(obj, strm, state):
+    writeID(tupleID, strm)
+    _writeSeq(obj, strm, state)
+
+writeDispatcher.extend(pyTupleType, writeTuple)
+
+
+## Code objects
+
+_codeAttrs = ["co_argcount", "co_nlocals", "co_stacksize", "co_flags",
+              "co_code", "co_consts", "co_names", "co_varnames",
+              "co_filename", "co_name", "co_firstlineno", "co_lnotab",
+              "co_freevars", "co_cellvars"]
+
+
+@registerType("codeFreeze")
+def readCode(strm, state):
+    return state.markSeen(pyTypeCode(*[read(strm, state)
+                                       for attr in _codeAttrs]))
+
+
+def writeCode(code, strm, state):
+    writeID(codeFreezeID, strm)
+
+    for attr in _codeAttrs:
+        write(getattr(code, attr), strm, state)
+    state.markSeen(code)
+
+writeDispatcher.extend(pyTypeCode, writeCode)
+
+
+## References to the running environment
+##
+## These are not copied but looked up again when read: namespaces and
+## modules by name, Vars by namespace and name, and anything else reachable
+## as a module attribute (functions, types, builtins) by module and name.
+
+def findModule(name):
+    if name not in sys.modules:
+        __import__(name)
+    return sys.modules[name]
+
+
+def realize(mod, name):
+    """Loads name in mod first if mod is loaded lazily.
+    """
+    from clojure.lang.namespace import lazyNamespaces, realizeItem
+    if lazyNamespaces and getattr(mod, "__name__", None) in lazyNamespaces:
+        from clojure.lang.symbol import Symbol
+        realizeItem(mod, Symbol(name))
+
+
+@registerType("namespace")
+def readNamespace(strm, state):
+    from clojure.lang.namespace import Namespace
+    return Namespace(readString(strm))
+
+
+@registerType("module")
+def readModule(strm, state):
+    return findModule(readString(strm))
+
+
+def writeModule(obj, strm, state):
+    from clojure.lang.namespace import Namespace
+    writeID(namespaceID if isinstance(obj, Namespace) else moduleID, strm)
+    writeBytes(obj.__name__, strm)
+
+writeDispatcher.extend(ModuleType, writeModule)
+
+
+@registerType("var")
+def readVar(strm, state):
+    from clojure.lang.namespace import intern
+    ns = read(strm, state)
+    name = readString(strm)
+    realize(ns, name)
+    v = intern(ns, name)
+    v.setDynamic(read(strm, state))
+    v.setPublic(read(strm, state))
+    v.setMeta(read(strm, state))
+    return v
+
+
+def writeVar(obj, strm, state):
+    if obj.ns is None:
+        raise FreezeException("Can't freeze anonymous Var")
+    writeID(varID, strm)
+    write(obj.ns, strm, state)
+    writeBytes(str(obj.sym), strm)
+    write(obj.dynamic, strm, state)
+    write(obj.public, strm, state)
+    write(obj.meta(), strm, state)
+
+
+@registerType("compiler")
+def readCompiler(strm, state):
+    from clojure.lang.globals import currentCompiler
+    return currentCompiler.deref()
+
+
+@registerType("varRoot")
+def readVarRoot(strm, state):
+    mod = findModule(readString(strm))
+    name = readString(strm)
+    realize(mod, name)
+    return getattr(mod, name).root.get()
+
+
+@registerType("global")
+def readGlobal(strm, state):
+    mod = findModule(readString(strm))
+    name = readString(strm)
+    realize(mod, name)
+    return getattr(mod, name)
+
+
+def findGlobal(obj):
+    """Returns the type ID and the module and attribute names under which obj
+    can be found again, or None.
+
+    Values bound to the root of a Var (such as compiled fns) are referenced
+    through that Var.
+    """
+    from clojure.lang.var import Var
+    modname = getattr(obj, "__module__", None)
+    name = getattr(obj, "__name__", None)
+    if not isinstance(modname, str) or not isinstance(name, str):
+        return None
+    mod = sys.modules.get(modname)
+    itm = getattr(mod, name, None)
+    if itm is obj:
+        return globalID, modname, name
+    if name.endswith("_auto_"):
+        # unnamed fns are named after the def they're in, see compileFNStar
+        name = name[:-len("_auto_")]
+        itm = getattr(mod, name, None)
+    if isinstance(itm, Var) and itm.root.get() is obj:
+        return varRootID, modname, name
+    return None
+
+
+def writeReference(ref, strm):
+    ID, modname, name = ref
+    writeID(ID, strm)
+    writeBytes(modname, strm)
+    writeBytes(name, strm)
+
+
+def writeGlobal(obj, strm, state):
+    from clojure.lang.apersistentvector import APersistentVector
+    from clojure.lang.iseq import ISeq
+    ref = findGlobal(obj)
+    # other seqs (IndexableSeq, LazySeq...) are read back as lists, and
+    # other vectors (SubVec...) as PersistentVectors
+    if ref is None and isinstance(obj, ISeq):
+        _writeColl(listID, obj, _seqItems(obj), strm, state)
+        return
+    if ref is None and isinstance(obj, APersistentVector):
+        _writeColl(vectorID, obj, list(obj), strm, state)
+        return
+    if ref is None:
+        raise FreezeException("Can't freeze {0} of type {1}"
+                              .format(repr(obj), type(obj)))
+    writeReference(ref, strm)
+
+writeDispatcher.setDefault(writeGlobal)
+
+
+## Python values
+
+@registerType("fraction")
+def readFraction(strm, state):
+    return fractions.Fraction(read(strm, state), read(strm, state))
+
+
+def writeFraction(obj, strm, state):
+    writeID(fractionID, strm)
+    write(obj.numerator, strm, state)
+    write(obj.denominator, strm, state)
+
+writeDispatcher.extend(fractions.Fraction, writeFraction)
+
+
+@registerType("regex")
+def readRegex(strm, state):
+    import re
+    return re.compile(read(strm, state), readInt(strm))
+
+
+def writeRegex(obj, strm, state):
+    writeID(regexID, strm)
+    write(obj.pattern, strm, state)
+    writeInt(obj.flags, strm)
+
+writeDispatcher.extend(pyRegexType, writeRegex)
+
+
+def _makeCell(val):
+    return (lambda: val).func_closure[0]
+
+
+@registerType("function")
+def readFunction(strm, state):
+    code = read(strm, state)
+    glbls = findModule(readString(strm)).__dict__
+    name = readString(strm)
+    defaults = read(strm, state)
+    closure = read(strm, state)
+    if closure is not None:
+        closure = tuple(map(_makeCell, closure))
+    fn = FunctionType(code, glbls, name, defaults, closure)
+    fn.__doc__ = read(strm, state)
+    for k, v in read(strm, state):
+        setattr(fn, k, v)
+    from clojure.lang.var import LINKED_VARS_ATTR, link
+    linked = fn.__dict__.get(LINKED_VARS_ATTR)
+    if linked:
+        link(fn, linked)
+    return state.markSeen(fn)
+
+
+def writeFunction(obj, strm, state):
+    """Functions are referenced when they can be found as a global or a Var
+    root, and written with their code and closure otherwise (fns created by
+    the compiler).
+    """
+    ref = findGlobal(obj)
+    if ref is not None:
+        writeReference(ref, strm)
+        return
+    modname = obj.func_globals.get("__name__")
+    if sys.modules.get(modname).__dict__ is not obj.func_globals:
+        raise FreezeException("Can't freeze {0}: its globals are not a "
+                              "module".format(obj))
+    writeID(functionID, strm)
+    write(obj.func_code, strm, state)
+    writeBytes(modname, strm)
+    writeBytes(obj.__name__, strm)
+    write(obj.func_defaults, strm, state)
+    closure = obj.func_closure
+    if closure is not None:
+        try:
+            closure = tuple(cell.cell_contents for cell in closure)
+        except ValueError:
+            raise FreezeException("Can't freeze {0}: empty closure cell"
+                                  .format(obj))
+    write(closure, strm, state)
+    write(obj.__doc__, strm, state)
+    write(tuple(obj.__dict__.items()), strm, state)
+    state.markSeen(obj)
+
+writeDispatcher.extend(FunctionType, writeFunction)
+
+
+## Clojure values
+
+def _meta(obj):
+    return getattr(obj, "_meta", None)
+
+
+@registerType("symbol")
+def readSymbol(strm, state):
+    from clojure.lang.symbol import Symbol
+    meta = read(strm, state)
+    return state.markSeen(Symbol(meta, read(strm, state), read(strm, state)))
+
+
+def writeSymbol(obj, strm, state):
+    writeID(symbolID, strm)
+    write(obj.meta(), strm, state)
+    write(obj.ns, strm, state)
+    write(obj.name, strm, state)
+    state.markSeen(obj)
+
+
+@registerType("keyword")
+def readKeyword(strm, state):
+    from clojure.lang.cljkeyword import Keyword
+    return state.markSeen(Keyword(read(strm, state), read(strm, state)))
+
+
+def writeKeyword(obj, strm, state):
+    writeID(keywordID, strm)
+    write(obj.sym.ns, strm, state)
+    write(obj.sym.name, strm, state)
+    state.markSeen(obj)
+
+
+def _withMeta(coll, meta):
+    return coll if meta is None else coll.withMeta(meta)
+
+
+def _writeColl(ID, obj, itms, strm, state):
+    writeID(ID, strm)
+    write(_meta(obj), strm, state)
+    _writeSeq(itms, strm, state)
+    state.markSeen(obj)
+
+
+@registerType("list")
+def readList(strm, state):
+    from clojure.lang.persistentlist import creator
+    meta = read(strm, state)
+    return state.markSeen(_withMeta(creator(*_readSeq(strm, state)), meta))
+
+
+@registerType("emptyList")
+def readEmptyList(strm, state):
+    from clojure.lang.persistentlist import EMPTY
+    return state.markSeen(_withMeta(EMPTY, read(strm, state)))
+
+
+def writeEmptyList(obj, strm, state):
+    writeID(emptyListID, strm)
+    write(_meta(obj), strm, state)
+    state.markSeen(obj)
+
+
+@registerType("cons")
+def readCons(strm, state):
+    from clojure.lang.cons import Cons
+    from clojure.lang.persistentlist import creator
+    meta = read(strm, state)
+    itms = _readSeq(strm, state)
+    return state.markSeen(Cons(meta, itms[0], creator(*itms[1:])))
+
+
+@registerType("vector")
+def readVector(strm, state):
+    from clojure.lang.persistentvector import vec
+    meta = read(strm, state)
+    return state.markSeen(_withMeta(vec(_readSeq(strm, state)), meta))
+
+
+@registerType("mapEntry")
+def readMapEntry(strm, state):
+    from clojure.lang.mapentry import MapEntry
+    return state.markSeen(MapEntry(read(strm, state), read(strm, state)))
+
+
+def writeMapEntry(obj, strm, state):
+    writeID(mapEntryID, strm)
+    write(obj.getKey(), strm, state)
+    write(obj.getValue(), strm, state)
+    state.markSeen(obj)
+
+
+def _seqItems(coll):
+    itms = []
+    s = coll.seq()
+    while s is not None:
+        itms.append(s.first())
+        s = s.next()
+    return itms
+
+
+def _mapItems(m):
+    itms = []
+    for e in _seqItems(m):
+        itms.append(e.getKey())
+        itms.append(e.getValue())
+    return itms
+
+
+@registerType("hashMap")
+def readHashMap(strm, state):
+    import clojure.lang.rt as RT
+    meta = read(strm, state)
+    return state.markSeen(_withMeta(RT.map(*_readSeq(strm, state)), meta))
+
+
+@registerType("arrayMap")
+def readArrayMap(strm, state):
+    from clojure.lang.persistentarraymap import PersistentArrayMap
+    meta = read(strm, state)
+    return state.markSeen(PersistentArrayMap(meta, _readSeq(strm, state)))
+
+
+@registerType("hashSet")
+def readHashSet(strm, state):
+    from clojure.lang.persistenthashset import create
+    meta = read(strm, state)
+    return state.markSeen(_withMeta(create(*_readSeq(strm, state)), meta))
+
+
+def writeProtocolFn(obj, strm, state):
+    """ProtocolFns live in the namespace they were registered in, under their
+    __name__ (see clojure.lang.protocol.registerFns).
+    """
+    name = getattr(obj, "__name__", None)
+    if name is not None and obj.name.endswith(name):
+        modname = obj.name[:-len(name)]
+        if getattr(sys.modules.get(modname), name, None) is obj:
+            writeReference((globalID, modname, name), strm)
+            return
+    writeGlobal(obj, strm, state)
+
+
+def writeProtocol(obj, strm, state):
+    if getattr(sys.modules.get(obj.ns), obj.name, None) is not obj:
+        raise FreezeException("Can't freeze {0}".format(obj))
+    writeReference((globalID, obj.ns, obj.name), strm)
+
 
+def _extendForRuntime():
+    # these types import the compiler, which imports this module through
+    # clojure.main
+    from clojure.lang.compiler import Compiler
+    from clojure.lang.cljkeyword import Keyword
+    from clojure.lang.cons import Cons
+    from clojure.lang.mapentry import MapEntry
+    from clojure.lang.namespace import Namespace
+    from clojure.lang.persistentarraymap import PersistentArrayMap
+    from clojure.lang.persistenthashmap import PersistentHashMap
+    from clojure.lang.persistenthashset import PersistentHashSet
+    from clojure.lang.persistentlist import PersistentList, EmptyList
+    from clojure.lang.persistentvector import PersistentVector
+    from clojure.lang.protocol import Protocol
+    from clojure.lang.symbol import Symbol
+    from clojure.lang.var import Var
 
+    writeDispatcher.extend(Namespace, writeModule)
+    writeDispatcher.extend(Var, writeVar)
+    writeDispatcher.extend(Compiler,
+                           lambda obj, strm, state: writeID(compilerID, strm))
+    writeDispatcher.extend(Symbol, writeSymbol)
+    writeDispatcher.extend(Keyword, writeKeyword)
+    writeDispatcher.extend(PersistentList,
+        lambda obj, strm, state: _writeColl(listID, obj, list(obj),
+                                            strm, state))
+    writeDispatcher.extend(EmptyList, writeEmptyList)
+    writeDispatcher.extend(Cons,
+        lambda obj, strm, state: _writeColl(consID, obj, list(obj),
+                                            strm, state))
+    writeDispatcher.extend(PersistentVector,
+        lambda obj, strm, state: _writeColl(vectorID, obj, list(obj),
+                                            strm, state))
+    writeDispatcher.extend(MapEntry, writeMapEntry)
+    writeDispatcher.extend(PersistentHashMap,
+        lambda obj, strm, state: _writeColl(hashMapID, obj, _mapItems(obj),
+                                            strm, state))
+    writeDispatcher.extend(PersistentArrayMap,
+        lambda obj, strm, state: _writeColl(arrayMapID, obj, obj.array,
+                                            strm, state))
+    writeDispatcher.extend(PersistentHashSet,
+        lambda obj, strm, state: _writeColl(hashSetID, obj, _seqItems(obj),
+                                            strm, state))
+    writeDispatcher.extend(ProtocolFn, writeProtocolFn)
+    writeDispatcher.extend(Protocol, writeProtocol)
 
+_extendForRuntime()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""Evaluates clj code on a running clojure.server, see its docstring for
+the protocol.
+
+Only uses the standard library, so that it starts in milliseconds: it does
+not import clojure-py, which loads clojure.core.
+
+  python clojure_client.py (-p PORT | -s SOCKET) [-e CODE | FILE | -]
+
+Prints what the code wrote to *out*, then the value of the last form, or
+the traceback on stderr and exits with 1 if evaluating it raised.
+"""
+
+from optparse import OptionParser
+import socket
+import struct
+import sys
+
+
+FRAME_HEADER = struct.Struct(">I")
+REPLY_FIELDS = ("tag", "ns", "out", "val")
+
+
+def readFrame(fl):
+    header = fl.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        return None
+    size, = FRAME_HEADER.unpack(header)
+    payload = fl.read(size)
+    if len(payload) < size:
+        return None
+    return payload
+
+
+def writeFrame(fl, payload):
+    fl.write(FRAME_HEADER.pack(len(payload)))
+    fl.write(payload)
+
+
+def evaluate(address, source):
+    """Evaluates source on the server at address, returns the reply as a
+    dict of REPLY_FIELDS.
+    """
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(address)
+    else:
+        sock = socket.create_connection(address)
+    try:
+        fl = sock.makefile("rwb")
+        writeFrame(fl, source)
+        fl.flush()
+        parts = [readFrame(fl) for field in REPLY_FIELDS]
+        fl.close()
+    finally:
+        sock.close()
+    if None in parts:
+        raise IOError("connection closed by the server")
+    return dict(zip(REPLY_FIELDS, parts))
+
+
+def main():
+    parser = OptionParser(
+        usage="%prog (-p PORT | -s SOCKET) [-e CODE | FILE | -]")
+    parser.add_option("--host", default="127.0.0.1",
+        help="the host of the server, 127.0.0.1 by default")
+    parser.add_option("-p", "--port", type="int",
+        help="the TCP port of the server")
+    parser.add_option("-s", "--socket",
+        help="the path of the Unix socket of the server")
+    parser.add_option("-e", dest="code",
+        help="the code to evaluate")
+    opts, args = parser.parse_args()
+    if opts.socket:
+        address = opts.socket
+    elif opts.port is not None:
+        address = (opts.host, opts.port)
+    else:
+        parser.error("one of --port or --socket is required")
+    if opts.code is not None:
+        source = opts.code
+    elif args and args[0] != "-":
+        with open(args[0]) as fl:
+            source = fl.read()
+    else:
+        source = sys.stdin.read()
+
+    reply = evaluate(address, source)
+    sys.stdout.write(reply["out"])
+    if reply["tag"] == "err":
+        sys.stderr.write(reply["val"])
+        sys.exit(1)
+    print reply["val"]
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,7 @@ setup(name='clojure_py',
       author_email='tbaldridge@gmail.com',
       packages=['clojure', 'clojure/lang', 'clojure/util'],
       package_data={'clojure': ['core.clj', 'core-deftype.clj', 'core-multimethod.clj']},
-      scripts=[],
+      scripts=['clojure_client.py'],
       url='https://github.com/halgari/clojure-py',
       license='Eclipse 1.0',
       description='Clojure implemented on top of Python',
@@ -957,3 +957,183 @@
 (deftest randnth-tests
     (a/assert-true (< (rand-nth (range 5)) 5))
     (a/assert-true (= (rand-nth '(2 2 2 2)) 2)))
+
+(deftest inline-arithmetic-tests
+    (let [x 6 y 4]
+        (a/assert-equal 15 (+ x y 5))
+        (a/assert-equal -2 (- 1 x -3))
+        (a/assert-equal -6 (- x))
+        (a/assert-equal 0.5 (/ 12.0 x 4))
+        (a/assert-equal 48 (* x y 2))
+        (a/assert-equal 7 (inc x))
+        (a/assert-equal 3 (dec y))
+        (a/assert-true (< y x))
+        (a/assert-false (>= y x))
+        (a/assert-true (== 6 x))
+        (a/assert-true (< 1 y x 7))
+        (a/assert-equal 10 (apply + [1 2 3 4]))
+        (a/assert-equal [2 3] (map inc [1 2])))
+    (a/assert-equal 7 (+ 1 (* 2 3)))
+    (a/assert-true (<= 1 (- 3 1)))
+    (a/assert-equal "ZeroDivisionError"
+                    (try (/ 1 0)
+                         (catch py/ZeroDivisionError e "ZeroDivisionError"))))
+
+(definline twice-inline [x] `(+ ~x ~x))
+
+(deftest definline-tests
+    (a/assert-equal 6 (twice-inline 3))
+    (a/assert-equal [2 4] (map twice-inline [1 2])))
+
+(deftest type-hint-tests
+    (let [s "abc" v [1 2 3] d (py/dict)]
+        (a/assert-equal 3 (count s))
+        (a/assert-equal 3 (count v))
+        (a/assert-equal 2 (nth v 1))
+        (a/assert-equal "b" (nth s 1))
+        (a/assert-equal "abc" (str s))
+        (a/assert-equal :nf (get d :x :nf))
+        (a/assert-equal nil (get d :x)))
+    (a/assert-equal 2 ((fn [^py/dict d] (get d 1)) (py/dict [[1 2]])))
+    (a/assert-equal 1 ((fn [^clojure.lang.persistenthashmap/PersistentHashMap m]
+                           (get m :a 0))
+                       {:a 1}))
+    (a/assert-equal 3 ((fn [^str s] ((fn [] (count s)))) "abc"))
+    (a/assert-true ((fn [^int x ^float y] (= x y)) 1 1.0))
+    (a/assert-equal 2 (loop [^int i 0] (if (= i 2) i (recur (inc i)))))
+    ; a hint doesn't rule out nil
+    (a/assert-equal 0 ((fn [^str s] (count s)) nil))
+    (a/assert-nil ((fn [^py/dict d] (get d :k)) nil))
+    (a/assert-equal :nf ((fn [^py/dict d] (get d :k :nf)) nil))
+    (a/assert-nil ((fn [^str s] (nth s 0)) nil))
+    (a/assert-equal "" ((fn [^str s] (str s)) nil)))
+
+(defn- loop-sum [coll]
+    (loop [s (seq coll) acc 0]
+        (if s (recur (next s) (+ acc (first s))) acc)))
+
+(defn- loop-rest-count [coll]
+    (loop [s (seq coll) n 0]
+        (if s (if (> n 5) n (recur (rest s) (inc n))) n)))
+
+(defn- loop-rest-sum [coll]
+    (loop [s (seq coll) acc 0]
+        (if (seq s) (recur (rest s) (+ acc (first s))) acc)))
+
+(defn- loop-sum-list [^list coll]
+    (loop [s (seq coll) acc 0]
+        (if s (recur (next s) (+ acc (first s))) acc)))
+
+(defn- loop-pairs [xs ys]
+    (loop [s (seq xs) acc []]
+        (if s
+            (recur (next s)
+                   (loop [t (seq ys) acc acc]
+                       (if t (recur (next t) (conj acc [(first s) (first t)])) acc)))
+            acc)))
+
+(deftest indexed-loop-tests
+    (a/assert-equal 6 (loop-sum [1 2 3]))
+    (a/assert-equal 6 (loop-sum (py/list [1 2 3])))
+    (a/assert-equal 3 (loop-sum (py/tuple [1 2])))
+    (a/assert-equal 6 (loop-sum '(1 2 3)))
+    (a/assert-equal 0 (loop-sum []))
+    (a/assert-equal 0 (loop-sum nil))
+    (a/assert-equal [3 2 1]
+                    (loop [acc () s (seq [1 2 3])]
+                        (let [x (first s)]
+                            (if (seq s) (recur (conj acc x) (rest s)) (vec acc)))))
+    (a/assert-equal [[1 2] [2]]
+                    (loop [s (seq [1 2]) acc []]
+                        (if s (recur (next s) (conj acc (vec s))) acc)))
+    ; an empty (rest s) is still true
+    (a/assert-equal 6 (loop-rest-count [1 2 3]))
+    (a/assert-equal 6 (loop-rest-count '(1 2 3)))
+    (a/assert-equal 6 (loop-rest-sum [1 2 3]))
+    (a/assert-equal 6 (loop-rest-sum (py/tuple [1 2 3])))
+    (a/assert-equal 6 (loop-rest-sum (range 4)))
+    (a/assert-equal 6 (loop-sum-list (py/list [1 2 3])))
+    (a/assert-equal [[1 :a] [1 :b] [2 :a] [2 :b]] (loop-pairs [1 2] [:a :b]))
+    (a/assert-equal [[1 :a] [2 :a]] (loop-pairs '(1 2) (py/list [:a])))
+    ; ArrayChunks are walked by index, from their offset on
+    (let [b (chunk-buffer 4)]
+        (doseq [x [1 2 3 4]] (chunk-append b x))
+        (let [c (.dropFirst (chunk b))]
+            (a/assert-equal (reduce + (seq c)) (loop-sum c))
+            (a/assert-equal 9 (loop-rest-sum c))
+            (a/assert-equal [[2 :a] [3 :a] [4 :a]] (loop-pairs c [:a])))))
+
+(deftest pr-str-tests
+    (a/assert-equal "" (pr-str))
+    (a/assert-equal "nil true 1 1.5 :a b" (pr-str nil true 1 1.5 :a 'b))
+    (a/assert-equal "\"a\\\"b\\n\" x" (pr-str "a\"b\n" (symbol "x")))
+    (a/assert-equal "x y\n" (println-str "x" 'y))
+    (a/assert-equal "\"x\"\n" (prn-str "x"))
+    (a/assert-equal "[1 (2 3) #{4} {:a [()]}]" (pr-str [1 '(2 3) #{4} {:a ['()]}]))
+    (a/assert-equal "[a {:b c}]" (print-str ["a" {:b "c"}]))
+    (a/assert-equal "{nil 1}" (pr-str {nil 1}))
+    ; hash collections print in seq order, 0 32 64 share their low bits
+    (let [m (hash-map 0 :a 32 :b 1 :c 64 :d 2 :e)
+          s (hash-set 0 32 1 64 2)]
+        (a/assert-equal (str "{" (apply str (interpose ", " (map #(str (key %) " " (val %)) m))) "}")
+                        (pr-str m))
+        (a/assert-equal (str "#{" (apply str (interpose " " s)) "}") (pr-str s)))
+    (let [m (zipmap (range 100) (range 100))
+          sio (cStringIO/StringIO)]
+        (clojure.protocols/writeAsReplString m sio)
+        (a/assert-equal (.getvalue sio) (pr-str m)))
+    (let [l (py/list)]
+        (a/assert-equal (str "[#<__builtin__.list object at 0x"
+                             (py/format (py/id l) "x") ">]")
+                        (pr-str [l]))))
+
+(deftest transient-vector-tests
+    (a/assert-equal [1 2 3 4] (persistent! (conj! (conj! (transient [1 2]) 3) 4)))
+    (a/assert-equal [:a :b] (persistent! (pop! (assoc! (transient [1 2 3]) 0 :a 1 :b))))
+    (let [t (transient [5 6])]
+        (a/assert-equal 2 (count t))
+        (a/assert-equal 6 (nth t 1)))
+    (a/assert-equal 4950 (reduce + (into [] (range 100))))
+    (a/assert-equal {:a 1} (meta (into (with-meta [] {:a 1}) [1])))
+    (a/assert-equal #{1 2} (into #{} [1 1 2]))
+    (a/assert-equal [2 3 4] (mapv inc [1 2 3]))
+    (a/assert-equal [11 22] (mapv + [1 2] [10 20 30])))
+
+(deftest transient-map-tests
+    (a/assert-equal {:a 1 :c 3} (persistent! (dissoc! (assoc! (transient {:a 1 :b 2}) :c 3) :b)))
+    (a/assert-equal #{1 3} (persistent! (disj! (conj! (transient #{1 2}) 3) 2)))
+    (let [t (transient {:a 1})]
+        (a/assert-equal 1 (get t :a))
+        (a/assert-equal 2 (count (conj! t [:b 2]))))
+    (a/assert-equal {:a 1 :b 2 :c 3} (zipmap [:a :b :c :d] [1 2 3]))
+    (a/assert-equal 1000 (count (zipmap (range 1000) (range 1000))))
+    (a/assert-equal {:a 3 :b 2} (merge {:a 1} nil {:b 2} {:a 3}))
+    (a/assert-equal {:m 1} (meta (merge (with-meta {:a 1} {:m 1}) {:b 2})))
+    (a/assert-nil (merge nil nil))
+    (a/assert-equal {:a 1 :b 2} (hash-map :a 1 :b 2))
+    (a/assert-equal {:a 2 :b 1 nil 1} (frequencies [:a :b :a nil]))
+    (a/assert-equal {true [1 3] false [2]} (group-by odd? [1 2 3]))
+    (a/assert-equal {:a 1 :b 2} (into {:a 1} {:b 2})))
+
+(deftest composite-key-tests
+    (a/assert-equal :a (get {'(1 2) :a} (list 1 2)))
+    (a/assert-equal :v (get {[1 2] :v} (list 1 2)))
+    (a/assert-equal :v (get {(map inc [0 1]) :v} [1 2]))
+    (a/assert-equal :m (get {{:a [1]} :m} {:a '(1)}))
+    (a/assert-equal :s (get {#{1 2} :s} (conj #{1} 2)))
+    (a/assert-equal 1 (count (into #{} [[1 2] '(1 2) (map inc [0 1])]))))
+
+(deftest chunked-collection-tests
+    (a/assert-true (chunked-seq? (seq [1 2 3])))
+    (a/assert-true (chunked-seq? (seq {:a 1 :b 2})))
+    (a/assert-true (chunked-seq? (seq (hash-map nil 1 :b 2))))
+    (a/assert-equal 32 (count (chunk-first (seq (vec (range 100))))))
+    (a/assert-equal (range 1 101) (map inc (vec (range 100))))
+    (a/assert-equal [0 2 4] (filter even? [0 1 2 3 4 5]))
+    (a/assert-equal 4950 (reduce1 + (vec (range 100))))
+    (a/assert-equal 40 (count (vec (range 40))))
+    (a/assert-equal 499500 (reduce1 + (map val (zipmap (range 1000) (range 1000)))))
+    (a/assert-equal (set (range 1000)) (set (keys (zipmap (range 1000) (range 1000)))))
+    (a/assert-equal [1 2 3] (let [acc (atom [])]
+                              (doseq [x [1 2 3]] (swap! acc conj x))
+                              @acc)))
@@ -0,0 +1,95 @@
+"""ednreader_tests.py
+
+Sunday, October 18 2026
+"""
+
+import datetime
+import decimal
+import unittest
+import uuid
+from cStringIO import StringIO
+from fractions import Fraction
+
+from clojure.lang.cljexceptions import ReaderException
+from clojure.lang.cljkeyword import Keyword
+from clojure.lang.fileseq import BufferedReader
+from clojure.lang.ednreader import readString, readAll
+from clojure.lang.persistenthashset import createWithCheck
+import clojure.lang.rt as RT
+from clojure.lang.symbol import Symbol
+
+
+class TestEdnReader(unittest.TestCase):
+    def testValues_PASS(self):
+        for s, v in values_PASS.items():
+            self.assertEqual(readString(s), v)
+
+    def testNoMeta_PASS(self):
+        self.assertEqual(readString("\n(a (b))").meta(), None)
+
+    def testTaggedLiterals_PASS(self):
+        self.assertEqual(readString('#inst "2012-03-16T12:30:00.5-04:00"'),
+                         datetime.datetime(2012, 3, 16, 16, 30, 0, 500000))
+        self.assertEqual(readString('#inst "2012-03-16"'),
+                         datetime.datetime(2012, 3, 16))
+        u = "f81d4fae-7dec-11d0-a765-00a0c91e6bf6"
+        self.assertEqual(readString('#uuid "{0}"'.format(u)), uuid.UUID(u))
+        readers = RT.map(Symbol("my", "point"), lambda v: tuple(v))
+        self.assertEqual(readString("[#my/point [1 2]]", readers),
+                         RT.vector((1, 2)))
+        self.assertEqual(readString("#foo 1", None, lambda t, v: (t, v)),
+                         (Symbol("foo"), 1))
+
+    def testEof_PASS(self):
+        self.assertEqual(readString(" ; c\n", None, None, Keyword("eof")),
+                         Keyword("eof"))
+        self.assertEqual(readString("1", None, None, Keyword("eof")), 1)
+
+    def testValues_FAIL(self):
+        for s in values_FAIL:
+            self.assertRaises(ReaderException, readString, s)
+
+    def testReadAll_PASS(self):
+        text = "".join("{{:id {0} :name \"n{0}\"}} ; row\n".format(i)
+                       for i in range(500))
+        for blocksize in (1, 7, 65536):
+            values = list(readAll(BufferedReader(StringIO(text), blocksize)))
+            self.assertEqual(len(values), 500)
+            self.assertEqual(values[-1],
+                             RT.map(Keyword("id"), 499, Keyword("name"),
+                                    "n499"))
+        self.assertEqual(list(readAll(StringIO(" 1 2\n"))), [1, 2])
+        self.assertEqual(list(readAll(StringIO(""))), [])
+
+
+values_PASS = {
+    "" : None,
+    "nil" : None,
+    "true" : True,
+    "42" : 42,
+    "-42" : -42,
+    "42N" : 42L,
+    "1.5" : 1.5,
+    "1.5M" : decimal.Decimal("1.5"),
+    "1/2" : Fraction(1, 2),
+    '"a\\nb"' : "a\nb",
+    "\\a" : "a",
+    ":a/b" : Keyword("a", "b"),
+    "a/b" : Symbol("a", "b"),
+    "(1 #_ 2 3 ; c\n)" : RT.list(1, 3),
+    "[1 [2]]" : RT.vector(1, RT.vector(2)),
+    "{:a 1, :b [2]}" : RT.map(Keyword("a"), 1, Keyword("b"), RT.vector(2)),
+    "#{1 2}" : createWithCheck([1, 2]),
+    }
+
+values_FAIL = [
+    "::a",
+    "(1 2",
+    "{:a}",
+    "#{1 1}",
+    ")",
+    "#foo 1",
+    "#inst 1",
+    '#uuid "nope"',
+    "1x",
+    ]
@@ -0,0 +1,152 @@
+"""freeze_tests.py
+
+Sunday, October 18 2026
+"""
+
+import fractions
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+from cStringIO import StringIO
+
+import clojure.main
+from clojure.lang.cljkeyword import Keyword, LINE_KEY
+from clojure.lang.lispreader import readString
+from clojure.lang.namespace import Namespace, findItem
+import clojure.lang.rt as RT
+from clojure.lang.symbol import Symbol
+import clojure.util.freeze as freeze
+
+
+def roundTrip(obj):
+    strm = StringIO()
+    freeze.write(obj, strm)
+    strm.seek(0)
+    return freeze.read(strm)
+
+
+class TestFreeze(unittest.TestCase):
+    def testScalars_PASS(self):
+        for x in [None, True, False, 0, -42, 2 ** 70, 1.5, "abc", u"\xe9t\xe9",
+                  (1, ("a",)), fractions.Fraction(1, 3)]:
+            y = roundTrip(x)
+            self.assertEqual(x, y)
+            self.assertEqual(type(x), type(y))
+
+    def testRegex_PASS(self):
+        r = roundTrip(re.compile("a+b", re.I))
+        self.assertEqual(r.pattern, "a+b")
+        self.assertEqual(r.flags & re.I, re.I)
+
+    def testSymbolsAndKeywords_PASS(self):
+        sym = Symbol(RT.map(LINE_KEY, 3), "ns", "name")
+        thawed = roundTrip(sym)
+        self.assertEqual(thawed, sym)
+        self.assertEqual(thawed.meta(), sym.meta())
+        self.assertTrue(roundTrip(Keyword("foo")) is Keyword("foo"))
+
+    def testCollections_PASS(self):
+        for s in ["(1 (2 3) ())", "[1 [2] :a]", "{:a 1 \"b\" [2]}", "#{1 :a}"]:
+            form = readString(s)
+            thawed = roundTrip(form)
+            self.assertEqual(thawed, form)
+            self.assertEqual(type(thawed), type(form))
+        form = readString("(a b)")
+        self.assertEqual(roundTrip(form).meta(), form.meta())
+
+    def testBackReferences_PASS(self):
+        shared = readString("[1 2 3]")
+        thawed = roundTrip((shared, shared))
+        self.assertTrue(thawed[0] is thawed[1])
+
+    def testGlobals_PASS(self):
+        self.assertTrue(roundTrip(len) is len)
+        self.assertTrue(roundTrip(RT.cons) is RT.cons)
+        self.assertTrue(roundTrip(Symbol) is Symbol)
+        self.assertTrue(roundTrip(RT) is RT)
+        v = findItem(Namespace("clojure.core"), Symbol("map"))
+        self.assertTrue(roundTrip(v) is v)
+        self.assertTrue(roundTrip(v.deref()) is v.deref())
+
+    def testCode_PASS(self):
+        code = compile("x + 1", "<test>", "eval")
+        self.assertEqual(eval(roundTrip(code), {"x": 1}), 2)
+
+    def testFunction_PASS(self):
+        def adder(y):
+            return lambda x: x + y
+        fn = roundTrip(adder(3))
+        self.assertEqual(fn(1), 4)
+
+    def testUnfreezable_FAIL(self):
+        self.assertRaises(freeze.FreezeException, roundTrip, object())
+
+
+class TestNamespaceCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.clj = os.path.join(self.dir, "cachetest.clj")
+        with open(self.clj, "w") as fl:
+            fl.write("(ns tests.cachetest)\n"
+                     "(defmacro twice [x] `(+ ~x ~x))\n"
+                     "(def ^:dynamic *v* {:a [1 2] :b #{\"c\"}})\n"
+                     "(defn f [y] (twice y))\n"
+                     "(defn ^:static g [y] (f y))\n"
+                     "(defn h [y] (g y))\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testReplay_PASS(self):
+        clojure.main.requireClj(self.clj, useCache=True)
+        self.assertTrue(os.path.exists(clojure.main.cachePath(self.clj)))
+        ns = Namespace("tests.cachetest")
+        ns.f.bindRoot(None)
+        self.assertTrue(clojure.main.loadCached(self.clj))
+        self.assertEqual(ns.f.deref()(2), 4)
+        self.assertEqual(ns.__dict__["*v*"].deref(),
+                         readString("{:a [1 2] :b #{\"c\"}}"))
+        self.assertTrue(ns.__dict__["*v*"].isDynamic())
+        self.assertTrue(ns.twice.deref().__dict__["macro?"])
+
+    def testStale_PASS(self):
+        clojure.main.requireClj(self.clj, useCache=True)
+        st = os.stat(self.clj)
+        os.utime(self.clj, (st.st_atime, st.st_mtime + 10))
+        self.assertFalse(clojure.main.loadCached(self.clj))
+
+    # the cache of a namespace is stale once a namespace it requires changed
+    def testStaleRequire_PASS(self):
+        mac = os.path.join(self.dir, "cachetestmac.clj")
+        use = os.path.join(self.dir, "cachetestuse.clj")
+        with open(mac, "w") as fl:
+            fl.write("(ns cachetestmac)\n"
+                     "(defmacro k [] 1)\n")
+        with open(use, "w") as fl:
+            fl.write("(ns cachetestuse (:require cachetestmac))\n"
+                     "(defn v [] (cachetestmac/k))\n")
+        sys.path.insert(0, self.dir)
+        try:
+            clojure.main.requireClj(use, useCache=True)
+            self.assertTrue(clojure.main.cacheFresh(use))
+            self.assertTrue(clojure.main.loadCached(use))
+            st = os.stat(mac)
+            os.utime(mac, (st.st_atime, st.st_mtime + 10))
+            self.assertFalse(clojure.main.cacheFresh(use))
+        finally:
+            sys.path.remove(self.dir)
+            for name in ["cachetestmac", "cachetestuse"]:
+                sys.modules.pop(name, None)
+                clojure.main.sourceFiles.pop(name, None)
+
+    def testRelinks_PASS(self):
+        clojure.main.requireClj(self.clj, useCache=True)
+        ns = Namespace("tests.cachetest")
+        self.assertTrue(clojure.main.loadCached(self.clj))
+        h = ns.h.deref()
+        self.assertTrue(h in ns.g.dependents)
+        ns.g.bindRoot(lambda y: -y)
+        self.assertEqual(h(2), -2)
@@ -0,0 +1,76 @@
+"""lazynamespace_tests.py
+
+Sunday, October 18 2026
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import clojure.main
+from clojure.lang.lazynamespace import loadLazy, skim
+from clojure.lang.namespace import findItem, lazyNamespaces
+from clojure.lang.symbol import Symbol
+
+
+class TestSkim(unittest.TestCase):
+    def testSpans_PASS(self):
+        text = ('; comment (\n'
+                '(a "b)" \\) [c])\n'
+                '^:x (d)  #_(e) f\n'
+                "'g #{h}")
+        spans = skim(text)
+        self.assertEqual([text[s:e] for s, e, l in spans],
+                         ['(a "b)" \\) [c])', '^:x (d)', '#_(e) f', "'g",
+                          '#{h}'])
+        self.assertEqual([l for s, e, l in spans], [2, 3, 3, 4, 4])
+
+
+class TestLazyNamespace(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.clj = os.path.join(self.dir, "lazytest.clj")
+        with open(self.clj, "w") as fl:
+            fl.write("(ns tests.lazytest)\n"
+                     "(defn f [] 1)\n"
+                     "(defn g [] (f))\n"
+                     "(def x 1)\n"
+                     "(alter-var-root (var x) inc)\n"
+                     "(def seen x)\n"
+                     "(def x 10)\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        lazyNamespaces.pop("tests.lazytest", None)
+        sys.modules.pop("tests.lazytest", None)
+
+    def testDeferred_PASS(self):
+        lazy = loadLazy(self.clj)
+        ns = sys.modules["tests.lazytest"]
+        self.assertTrue(lazyNamespaces["tests.lazytest"] is lazy)
+        self.assertFalse(hasattr(ns, "g"))
+        self.assertEqual(findItem(ns, Symbol("g")).deref()(), 1)
+        self.assertTrue(hasattr(ns, "f"))
+
+    def testPositions_PASS(self):
+        loadLazy(self.clj)
+        ns = sys.modules["tests.lazytest"]
+        self.assertEqual(findItem(ns, Symbol("seen")).deref(), 2)
+        self.assertEqual(findItem(ns, Symbol("x")).deref(), 10)
+
+    def testLoadAll_PASS(self):
+        loadLazy(self.clj).loadAll()
+        ns = sys.modules["tests.lazytest"]
+        self.assertEqual(ns.g.deref()(), 1)
+        self.assertEqual(ns.x.deref(), 10)
+
+    def testFileRewritten_PASS(self):
+        loadLazy(self.clj)
+        with open(self.clj, "r+") as fl:
+            fl.write("(throw (Exception))")
+            fl.truncate()
+        ns = sys.modules["tests.lazytest"]
+        self.assertEqual(findItem(ns, Symbol("g")).deref()(), 1)
+        self.assertEqual(findItem(ns, Symbol("x")).deref(), 10)
@@ -0,0 +1,85 @@
+"""loadprofile_tests.py
+
+Sunday, October 18 2026
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from cStringIO import StringIO
+
+from clojure.main import requireClj
+import clojure.lang.loadprofile as loadprofile
+
+
+class TestLoadProfile(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.clj = os.path.join(self.dir, "profiletest.clj")
+        with open(self.clj, "w") as fl:
+            fl.write("(ns tests.profiletest)\n"
+                     "(defn f [x] (when x (inc x)))\n"
+                     "\n"
+                     "(def y (f 1))\n")
+        loadprofile.reset()
+        loadprofile.enable()
+
+    def tearDown(self):
+        loadprofile.enable(False)
+        loadprofile.reset()
+        shutil.rmtree(self.dir)
+        sys.modules.pop("tests.profiletest", None)
+
+    def testForms_PASS(self):
+        requireClj(self.clj)
+        self.assertEqual([(t.line, t.ns) for t in loadprofile.forms],
+                         [(1, "tests.profiletest"), (2, "tests.profiletest"),
+                          (4, "tests.profiletest")])
+        defn = loadprofile.forms[1]
+        self.assertTrue(defn.times["assemble"] > 0)
+        self.assertTrue(defn.times["compile"] > 0)
+        totals = loadprofile.namespaces["tests.profiletest"]
+        self.assertAlmostEqual(sum(totals.values()),
+                               sum(t.total() for t in loadprofile.forms))
+
+    def testNestedPhases_PASS(self):
+        timing = loadprofile.form("<test>")
+        with timing:
+            with loadprofile.phase("compile"):
+                with loadprofile.phase("macroexpand"):
+                    pass
+            timing.ns = "tests.nested"
+        self.assertTrue(loadprofile.slowest(1)[0] is timing)
+        self.assertEqual(loadprofile.namespaces["tests.nested"]["eval"], 0)
+
+    def testThreads_PASS(self):
+        def other():
+            with loadprofile.phase("eval"):
+                time.sleep(0.05)
+        timing = loadprofile.form("<test>")
+        with timing:
+            with loadprofile.phase("read"):
+                thread = threading.Thread(target=other)
+                thread.start()
+                thread.join()
+            timing.ns = "tests.threads"
+        self.assertEqual(timing.times["eval"], 0)
+        self.assertTrue(timing.times["read"] >= 0.05)
+
+    def testDisabled_PASS(self):
+        loadprofile.enable(False)
+        requireClj(self.clj)
+        self.assertEqual(loadprofile.forms, [])
+
+    def testReport_PASS(self):
+        requireClj(self.clj)
+        out = StringIO()
+        loadprofile.report(out, limit=2)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[1].startswith("tests.profiletest"))
+        self.assertEqual(len(lines), 6)
+        self.assertTrue("profiletest.clj:" in lines[4])
@@ -0,0 +1,89 @@
+"""macrocache_tests.py
+
+Sunday, October 18 2026
+"""
+
+import threading
+import unittest
+
+import clojure.main
+from clojure.lang.compiler import Compiler
+from clojure.lang.fileseq import StringReader
+from clojure.lang.globals import currentCompiler
+import clojure.lang.lispreader as lispreader
+from clojure.lang.macrocache import MacroCache, cache, formKey
+from clojure.lang.var import threadBindings
+
+
+def read(s):
+    return lispreader.read(StringReader(s), True, None, True)
+
+
+class TestFormKey(unittest.TestCase):
+    def testEqualForms_PASS(self):
+        self.assertEqual(formKey(read("(a [b {:c 1}] #{d})")),
+                         formKey(read("(a [b {:c 1}] #{d})")))
+
+    def testDistinctForms_PASS(self):
+        self.assertNotEqual(formKey(read("(a 1)")), formKey(read("(a 1.0)")))
+        self.assertNotEqual(formKey(read("(a 1)")), formKey(read("(a true)")))
+        self.assertNotEqual(formKey(read("(a b)")), formKey(read("(a ^int b)")))
+        self.assertNotEqual(formKey(read("(a b)")), formKey(read("\n(a b)")))
+        self.assertNotEqual(formKey(read("(a b)")), formKey(read("[a b]")))
+
+    def testUnhashable_PASS(self):
+        self.assertEqual(formKey([1]), None)
+
+
+class TestMacroCache(unittest.TestCase):
+    def testLRU_PASS(self):
+        c = MacroCache(maxsize=2)
+        calls = []
+
+        def expander(x):
+            return lambda: calls.append(x) or x
+        c.expand(len, "ns", 1, expander(1))
+        c.expand(len, "ns", 2, expander(2))
+        c.expand(len, "ns", 1, expander(1))
+        c.expand(len, "ns", 3, expander(3))
+        c.expand(len, "ns", 2, expander(2))
+        c.expand(len, "other", 1, expander(1))
+        self.assertEqual(calls, [1, 2, 3, 2, 1])
+        self.assertEqual(c.stats(), {"hits": 1, "misses": 5, "size": 2,
+                                     "maxsize": 2})
+        c.enabled = False
+        c.expand(len, "ns", 1, expander(1))
+        self.assertEqual(c.hits, 1)
+
+    def testThreads_PASS(self):
+        c = MacroCache(maxsize=16)
+        forms = [read("(f {0} [{0}])".format(i)) for i in range(64)]
+        errors = []
+
+        def work():
+            for n in range(2000):
+                i = n * 7 % len(forms)
+                if c.expand(len, "ns", forms[i], lambda: i) != i:
+                    errors.append(i)
+        threads = [threading.Thread(target=work) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertTrue(len(c.entries) <= 16)
+
+    def testRedefinedMacro_PASS(self):
+        comp = Compiler()
+
+        def ev(s):
+            with threadBindings({currentCompiler: comp}):
+                return comp.executeCode(comp.compile(read(s)))
+        ev("(ns tests.macrocache-test)")
+        ev("(defmacro m [x] `(+ ~x 1))")
+        hits = cache.hits
+        self.assertEqual(ev("(m 1)"), 2)
+        self.assertEqual(ev("(m 1)"), 2)
+        self.assertEqual(cache.hits, hits + 1)
+        ev("(defmacro m [x] `(+ ~x 2))")
+        self.assertEqual(ev("(m 1)"), 3)
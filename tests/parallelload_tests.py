@@ -0,0 +1,102 @@
+"""parallelload_tests.py
+
+Sunday, October 18 2026
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import clojure.main
+from clojure.lang.fileseq import StringReader
+from clojure.lang.globals import currentCompiler
+from clojure.lang.compiler import Compiler
+import clojure.lang.lispreader as lispreader
+from clojure.lang.parallelload import (requiredLibs, dependencyGraph,
+                                       topologicalOrder, preload,
+                                       buildCaches)
+from clojure.lang.var import threadBindings
+
+
+def read(s):
+    with threadBindings({currentCompiler: Compiler()}):
+        return lispreader.read(StringReader(s), True, None, False)
+
+
+SOURCES = {
+    "pltest_app": "(ns pltest_app\n"
+                  "  (:require [pltest_left :as l] pltest_right))\n"
+                  "(def total (+ l/x pltest_right/x))\n",
+    "pltest_left": "(ns pltest_left (:use pltest_base))\n"
+                   "(def x (inc base))\n",
+    "pltest_right": "(ns ^{:doc \"right\"} pltest_right\n"
+                    "  (:require [pltest_base :refer [base]]))\n"
+                    "(def x (* 10 base))\n",
+    "pltest_base": "; no requires\n(ns pltest_base)\n(def base 1)\n",
+    }
+
+# files whose compilation gets no result from the pool process
+FAILING = {
+    "pltest_exit": "(ns pltest_exit)\n(throw (py/SystemExit 2))\n",
+    "pltest_crash": "(ns pltest_crash)\n"
+                    "((py/getattr (py/__import__ \"os\") \"_exit\") 3)\n",
+    "pltest_above": "(ns pltest_above (:require pltest_crash))\n",
+    }
+
+
+class TestRequiredLibs(unittest.TestCase):
+    def testLibspecs_PASS(self):
+        form = read("(ns a.b \"doc\" {:m 1}\n"
+                    "  (:refer-clojure :exclude [map])\n"
+                    "  (:require c [d.e :as f] (g h [i :as j]) :reload)\n"
+                    "  (:use [k] (l [m :only [n]]))\n"
+                    "  (:import (os path)))")
+        self.assertEqual(requiredLibs(form),
+                         ["c", "d.e", "g.h", "g.i", "k", "l.m"])
+        self.assertEqual(requiredLibs(None), [])
+
+
+class TestPreload(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for name, source in SOURCES.items():
+            with open(os.path.join(self.dir, name + ".clj"), "w") as fl:
+                fl.write(source)
+        sys.path.insert(0, self.dir)
+
+    def tearDown(self):
+        sys.path.remove(self.dir)
+        shutil.rmtree(self.dir)
+        for name in SOURCES:
+            sys.modules.pop(name, None)
+
+    def testGraph_PASS(self):
+        graph = dependencyGraph(["pltest_app"])
+        self.assertEqual(sorted(graph), sorted(SOURCES))
+        self.assertEqual(graph["pltest_app"][1],
+                         ["pltest_left", "pltest_right"])
+        self.assertEqual(graph["pltest_base"],
+                         (os.path.join(self.dir, "pltest_base.clj"), []))
+        self.assertEqual(topologicalOrder(graph),
+                         ["pltest_base", "pltest_left", "pltest_right",
+                          "pltest_app"])
+
+    def testPreload_PASS(self):
+        preload(["pltest_app"], 2)
+        for name in SOURCES:
+            self.assertTrue(clojure.main.cacheFresh(
+                os.path.join(self.dir, name + ".clj")))
+        self.assertEqual(sys.modules["pltest_app"].total.deref(), 12)
+
+    def testLostTasks_PASS(self):
+        for name, source in FAILING.items():
+            with open(os.path.join(self.dir, name + ".clj"), "w") as fl:
+                fl.write(source)
+        names = ["pltest_base"] + sorted(FAILING)
+        graph = dependencyGraph(names)
+        self.assertEqual(buildCaches(graph, names, 2),
+                         set(["pltest_exit", "pltest_crash",
+                              "pltest_above"]))
+        self.assertTrue(clojure.main.cacheFresh(graph["pltest_base"][0]))
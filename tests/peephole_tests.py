@@ -0,0 +1,83 @@
+"""peephole_tests.py
+
+Sunday, October 18 2026
+"""
+
+import unittest
+from cStringIO import StringIO
+
+import clojure.lang.peephole as peephole
+from clojure.util.byteplay import *
+
+
+class TestPeephole(unittest.TestCase):
+    def testConstPop_PASS(self):
+        code = [(LOAD_CONST, 1), (POP_TOP, None),
+                (LOAD_CONST, 2), (RETURN_VALUE, None)]
+        self.assertEqual(peephole.optimize(code),
+                         [(LOAD_CONST, 2), (RETURN_VALUE, None)])
+
+    def testJumpThreading_PASS(self):
+        first, second, end = Label(), Label(), Label()
+        code = [(LOAD_FAST, "x"), (POP_JUMP_IF_FALSE, first),
+                (LOAD_CONST, 1), (JUMP_FORWARD, end),
+                (first, None), (JUMP_FORWARD, second),
+                (second, None), (LOAD_CONST, 2),
+                (end, None), (STORE_FAST, "y"),
+                (LOAD_FAST, "y"), (RETURN_VALUE, None)]
+        out = peephole.optimize(code)
+        self.assertTrue((POP_JUMP_IF_FALSE, second) in out)
+        self.assertFalse(any(x[0] is first for x in out))
+
+    def testJumpToReturn_PASS(self):
+        end = Label()
+        code = [(LOAD_FAST, "x"), (JUMP_FORWARD, end),
+                (LOAD_CONST, 1), (end, None), (RETURN_VALUE, None)]
+        self.assertEqual(peephole.optimize(code),
+                         [(LOAD_FAST, "x"), (RETURN_VALUE, None)])
+
+    def testDeadCode_PASS(self):
+        target = Label()
+        code = [(LOAD_FAST, "x"), (POP_JUMP_IF_FALSE, target),
+                (LOAD_CONST, 1), (RETURN_VALUE, None),
+                (LOAD_CONST, 2), (POP_TOP, None), (LOAD_CONST, 3),
+                (target, None), (LOAD_CONST, 4), (RETURN_VALUE, None)]
+        out = peephole.optimize(code)
+        self.assertEqual(len(out), 7)
+        self.assertFalse((LOAD_CONST, 3) in out)
+
+    def testLinenos_PASS(self):
+        code = [(SetLineno, 1), (SetLineno, 2), (LOAD_CONST, 1),
+                (SetLineno, 2), (RETURN_VALUE, None)]
+        self.assertEqual(peephole.optimize(code),
+                         [(SetLineno, 2), (LOAD_CONST, 1),
+                          (RETURN_VALUE, None)])
+
+    def testAssembles_PASS(self):
+        first, second = Label(), Label()
+        code = [(SetLineno, 1), (LOAD_FAST, "x"),
+                (POP_JUMP_IF_FALSE, first), (LOAD_CONST, 1),
+                (JUMP_FORWARD, second), (first, None), (LOAD_CONST, 2),
+                (second, None), (RETURN_VALUE, None)]
+        c = Code(peephole.optimize(code), [], ["x"], False, False, True,
+                 "f", "<test>", 0, None).to_code()
+        f = eval(compile("lambda x: None", "<test>", "eval"))
+        f.func_code = c
+        self.assertEqual((f(True), f(False)), (1, 2))
+
+    def testSwitchAndReport_PASS(self):
+        code = [(LOAD_CONST, 1), (POP_TOP, None),
+                (LOAD_CONST, 2), (RETURN_VALUE, None)]
+        peephole.enablePass("const-pop", False)
+        try:
+            self.assertEqual(peephole.optimize(code), code)
+        finally:
+            peephole.enablePass("const-pop")
+        self.assertRaises(KeyError, peephole.enablePass, "nope")
+        peephole.saved.pop("tests.peephole", None)
+        peephole.optimize(code, "tests.peephole")
+        out = StringIO()
+        peephole.report(out)
+        self.assertTrue("tests.peephole: 2 instructions saved"
+                        in out.getvalue())
+        del peephole.saved["tests.peephole"]
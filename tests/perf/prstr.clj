@@ -0,0 +1,33 @@
+(ns tests.perf.prstr)
+
+(require 'time)
+(require 'cStringIO)
+
+; pr-str walks the collections into a list of strings joined once, the
+; IPrintable protocol writes every element and separator to the writer
+
+(defn protocol-pr-str [x]
+    (let [sio (cStringIO/StringIO)]
+        (clojure.protocols/writeAsReplString x sio)
+        (.getvalue sio)))
+
+(def data
+    (loop [v [] i 0]
+        (if (< i 20000)
+            (recur (conj v {:id i
+                            :name (str "name" i)
+                            :tags #{:a :b :c}
+                            :scores [1 2.5 nil true]
+                            :parent (list 'node i)})
+                   (inc i))
+            v)))
+
+(defn bench [name f]
+    (let [t1 (time/time)]
+        (dotimes [x 5]
+            (f data))
+        (println (str name " completed in " (- (time/time) t1) " seconds."))))
+
+(bench "protocol pr-str" protocol-pr-str)
+(bench "pr-str" pr-str)
+(bench "print-str" print-str)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+"""Startup benchmarks for clojure-py, with a baseline to compare against.
+
+Every measurement is taken in fresh processes, repeated --runs times:
+
+  python             the interpreter starting and exiting, for reference
+  boot-cold          clojure.main running an empty script, without the
+                     compiled-namespace caches
+  boot-warm          the same, with the caches built
+  rt-import          importing clojure.lang.rt, without clojure.core
+  main-import        then importing clojure.main: the compiler, the reader
+                     and the rest of the runtime
+  rt-init            RT.init
+  core-cold          loading clojure.core, without its cache
+  core-warm          loading clojure.core from its cache
+  require-cold:<ns>  requiring a namespace once clojure.core is loaded,
+  require-warm:<ns>  without and with its cache
+
+The results are written as JSON: the min, median and max seconds of each
+benchmark, along with the Python and clojure-py versions. Given a baseline,
+a previous output of this script, the medians are compared to it and the
+script exits with status 1 if one of them regressed by more than the
+tolerance. Cold runs remove the caches (__pycache__/*.cljc) of the
+repository.
+
+Run from anywhere, e.g.:
+
+  python tests/perf/startup.py --runs 10 --output baseline.json
+  python tests/perf/startup.py --baseline baseline.json
+"""
+
+import json
+from optparse import OptionParser
+import os
+import platform
+import subprocess
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+DEFAULT_NAMESPACES = ["clojure.string", "clojure.set", "clojure.edn"]
+
+# Runs in the child process: times the phases of loading clojure-py and
+# prints them as JSON. The clojure package is put in sys.modules by hand, as
+# its __init__ loads clojure.core.
+PROBE = """
+import imp, json, os, sys, time
+t = time.time()
+pkg = imp.new_module("clojure")
+pkg.__path__ = [os.path.join({root!r}, "clojure")]
+sys.modules["clojure"] = pkg
+times = {{}}
+import clojure.lang.rt as RT
+times["rt-import"] = time.time() - t
+t = time.time()
+import clojure.main
+times["main-import"] = time.time() - t
+t = time.time()
+RT.init()
+times["rt-init"] = time.time() - t
+t = time.time()
+import clojure.core
+times["core"] = time.time() - t
+for name in {namespaces!r}:
+    t = time.time()
+    __import__(name)
+    times["require:" + name] = time.time() - t
+print json.dumps(times)
+"""
+
+
+def removeCaches(root=ROOT):
+    """Removes the compiled-namespace caches under root.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        if os.path.basename(dirpath) == "__pycache__":
+            for filename in filenames:
+                if filename.endswith(".cljc"):
+                    os.remove(os.path.join(dirpath, filename))
+
+
+def env():
+    e = dict(os.environ)
+    e["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [ROOT, e.get("PYTHONPATH")]))
+    return e
+
+
+def timeCommand(args, cwd=ROOT):
+    """Returns the wall-clock seconds running args took.
+    """
+    with open(os.devnull, "w") as devnull:
+        t = time.time()
+        subprocess.check_call(args, cwd=cwd, env=env(), stdout=devnull)
+        return time.time() - t
+
+
+def probe(namespaces):
+    """Runs PROBE in a fresh process, returns its timings.
+    """
+    source = PROBE.format(root=ROOT, namespaces=list(namespaces))
+    out = subprocess.check_output([sys.executable, "-c", source], cwd=ROOT,
+                                  env=env())
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure(runs, namespaces):
+    """Runs the benchmarks runs times, returns the seconds of each run by
+    benchmark name.
+    """
+    samples = {}
+
+    def add(name, seconds):
+        samples.setdefault(name, []).append(seconds)
+    script = os.path.join(ROOT, "tests", "perf", "empty.clj")
+    open(script, "w").close()
+    try:
+        for i in range(runs):
+            add("python", timeCommand([sys.executable, "-c", "pass"]))
+            removeCaches()
+            add("boot-cold",
+                timeCommand([sys.executable, "-m", "clojure.main", script]))
+            add("boot-warm",
+                timeCommand([sys.executable, "-m", "clojure.main", script]))
+            removeCaches()
+            for temperature in ("cold", "warm"):
+                for name, seconds in probe(namespaces).items():
+                    if name.startswith("require:"):
+                        name = "require-{0}:{1}".format(temperature,
+                                                        name[8:])
+                    elif name == "core":
+                        name = "core-" + temperature
+                    elif temperature == "cold":
+                        # independent of the caches, timed once per run
+                        continue
+                    add(name, seconds)
+    finally:
+        os.remove(script)
+    return samples
+
+
+def summarize(samples):
+    """Returns {name: {"min", "median", "max", "runs"}} for samples.
+    """
+    results = {}
+    for name, values in samples.items():
+        values = sorted(values)
+        n = len(values)
+        median = (values[n // 2] if n % 2
+                  else (values[n // 2 - 1] + values[n // 2]) / 2.0)
+        results[name] = {"min": values[0], "median": median,
+                         "max": values[-1], "runs": n}
+    return results
+
+
+def compare(results, baseline, tolerance, slack):
+    """Returns the (name, baseline median, median) of the benchmarks whose
+    median got slower than the baseline by more than tolerance (a ratio)
+    and slack (seconds).
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        before = baseline[name]["median"]
+        after = result["median"]
+        if after > before * (1 + tolerance) + slack:
+            regressions.append((name, before, after))
+    return regressions
+
+
+def report(results, baseline, out):
+    out.write("{0:<32}{1:>10}{2:>10}{3:>10}{4:>12}\n".format(
+        "benchmark", "min", "median", "max", "baseline"))
+    for name, result in sorted(results.items()):
+        before = baseline.get(name, {}).get("median")
+        out.write("{0:<32}{1:10.3f}{2:10.3f}{3:10.3f}{4:>12}\n".format(
+            name, result["min"], result["median"], result["max"],
+            "" if before is None else "{0:.3f}".format(before)))
+
+
+def main():
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option("-n", "--runs", type="int", default=5,
+        help="the number of runs of each benchmark, 5 by default")
+    parser.add_option("--ns", action="append", dest="namespaces",
+        help="a namespace to time the require of, can be repeated; "
+             "defaults to " + ", ".join(DEFAULT_NAMESPACES))
+    parser.add_option("-o", "--output",
+        help="write the JSON results to this file instead of stdout")
+    parser.add_option("-b", "--baseline",
+        help="compare the medians to those of these JSON results")
+    parser.add_option("--tolerance", type="float", default=0.1,
+        help="the ratio a median may grow by before it is reported as a "
+             "regression, 0.1 by default")
+    parser.add_option("--slack", type="float", default=0.005,
+        help="seconds a median may also grow by, for the noise of the "
+             "shortest benchmarks, 0.005 by default")
+    opts, args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import clojure.main
+    samples = measure(opts.runs, opts.namespaces or DEFAULT_NAMESPACES)
+    document = {"python": sys.version.split()[0],
+                "clojure-py": clojure.main.VERSION,
+                "platform": platform.platform(),
+                "results": summarize(samples)}
+    if opts.output:
+        with open(opts.output, "w") as fl:
+            json.dump(document, fl, indent=2, sort_keys=True)
+    else:
+        json.dump(document, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+
+    baseline = {}
+    if opts.baseline:
+        with open(opts.baseline) as fl:
+            baseline = json.load(fl)["results"]
+    report(document["results"], baseline, sys.stderr)
+    regressions = compare(document["results"], baseline, opts.tolerance,
+                          opts.slack)
+    for name, before, after in regressions:
+        sys.stderr.write("REGRESSION {0}: {1:.3f}s -> {2:.3f}s\n".format(
+            name, before, after))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
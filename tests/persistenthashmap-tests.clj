@@ -22,3 +22,45 @@
     (assertions/assert-false (-> testmap
                                  (.without "a")
                                  (.entryAt "a"))))
+
+(deftest transient-tests
+    (let [t (.asTransient testmap)]
+        (assertions/assert-equal 3 (count (.assoc t "c" 3)))
+        (assertions/assert-equal 3 (.valAt t "c"))
+        (assertions/assert-equal 2 (count (.without t "a")))
+        (assertions/assert-equal {"b" 2 "c" 3} (.persistent t)))
+    (assertions/assert-equal {"a" 1 "b" 2} testmap))
+
+(deftest transient-node-tests
+    (let [keys (concat (range 2000) [nil "a" :b])
+          m (reduce #(.assoc %1 %2 %2) (PersistentHashMap 0 nil false nil) keys)
+          t (reduce #(.assoc %1 %2 %2) (.asTransient m) (range 1000 3000))
+          t (reduce #(.without %1 %2) t (range 0 3000 3))
+          built (.persistent t)]
+        (assertions/assert-equal 2003 (count m))
+        (assertions/assert-equal (- 3003 1000) (count built))
+        (assertions/assert-equal 2999 (get built 2999))
+        (assertions/assert-nil (get built 2997 nil))
+        (assertions/assert-true (.containsKey built nil))
+        (assertions/assert-equal 2003 (count m))
+        (assertions/assert-nil (get m 2999))
+        (assertions/assert-equal 0 (get m 0))))
+
+(deftest fromItems-tests
+    (assertions/assert-equal {:a 3 :b 2 nil 4}
+                             (clojure.lang.persistenthashmap/fromItems
+                                 [[:a 1] [:b 2] [:a 3] [nil 4]]))
+    (assertions/assert-equal {} (clojure.lang.persistenthashmap/fromItems []))
+    (let [m (clojure.lang.persistenthashmap/fromItems
+                (map vector (range 5000) (range 5000)))]
+        (assertions/assert-equal 5000 (count m))
+        (assertions/assert-equal 4999 (get m 4999))
+        (assertions/assert-equal 4999 (count (dissoc m 0)))
+        (assertions/assert-equal 5001 (count (assoc m -1 -1)))))
+
+(deftest hash-tests
+    (assertions/assert-equal (py/hash {:a 1 :b [1 2]})
+                             (py/hash (hash-map :b (list 1 2) :a 1)))
+    (assertions/assert-equal (py/hash {}) (py/hash (dissoc {:a 1} :a)))
+    (assertions/assert-equal :v (get {{:a 1 nil nil} :v} (hash-map nil nil :a 1)))
+    (assertions/assert-false (= {:a 1} [[:a 1]])))
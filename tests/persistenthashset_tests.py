@@ -11,7 +11,9 @@ from clojure.lang.iseq import ISeq
 from clojure.lang.persistenthashset import PersistentHashSet
 from clojure.lang.persistenthashset import create, createWithCheck
 from clojure.lang.persistenthashset import EMPTY_MAP, EMPTY as EMPTY_SET
+from clojure.lang.persistenthashset import TransientHashSet
 from clojure.lang.cljexceptions import (ArityException,
+                                        IllegalAccessError,
                                         IllegalArgumentException)
 
 uobj = object()
@@ -130,6 +132,17 @@ class TestPersistentHashSet(unittest.TestCase):
     def test__hash___PASS(self):
         s = create(1, 2, "foo", 3.3, create(1, 2, "bar"))
         self.assertEqual(s.__hash__(), sethash(s))
+    # the hash of a set made from a hashed set by cons or disjoin is derived
+    def testHashIncremental_PASS(self):
+        s = create(1, 2)
+        hash(s)
+        s3 = s.cons(3)
+        self.assertEqual(s3._hash, sethash(s3))
+        s1 = s3.disjoin(2)
+        self.assertEqual(s1._hash, sethash(s1))
+        self.assertEqual(s1.withMeta(pseudoMetaData)._hash, s1._hash)
+        self.assertEqual(s.cons(4).cons(5).disjoin(4).disjoin(5)._hash,
+                         s._hash)
     # (print s)
     def testWriteAsString_PASS(self):
         csio = StringIO()
@@ -153,3 +166,36 @@ class TestPersistentHashSet(unittest.TestCase):
                 r" object at 0x[a-fA-F0-9]+" \
                 r" (#\{#\{\} 1\}|#\{1 #\{\}\})>$"
         self.assertTrue(re.match(regex, self.printS.__repr__()))
+
+
+class TestTransientHashSet(unittest.TestCase):
+    def setUp(self):
+        self.s2 = create(1, uobj)
+        self.t = self.s2.asTransient()
+    def testAsTransient_PASS(self):
+        self.assertTrue(isinstance(self.t, TransientHashSet))
+        self.assertEqual(len(self.t), 2)
+        self.assertTrue(uobj in self.t)
+    def testConjDisjoin_PASS(self):
+        self.assertTrue(self.t.conj(2) is self.t)
+        self.t.conj(2).conj(3)
+        self.assertTrue(self.t.disjoin(uobj) is self.t)
+        self.assertEqual(len(self.t), 3)
+        self.assertEqual(self.t.get(3), 3)
+        self.assertEqual(self.t(4, "nf"), "nf")
+        s = self.t.persistent()
+        self.assertEqual(s, create(1, 2, 3))
+        self.assertEqual(self.s2, create(1, uobj))
+    def testLarge_PASS(self):
+        for i in range(1000):
+            self.t.conj(i)
+        for i in range(0, 1000, 2):
+            self.t.disjoin(i)
+        s = self.t.persistent()
+        self.assertEqual(len(s), 501)
+        self.assertTrue(999 in s and uobj in s)
+        self.assertFalse(998 in s)
+    def testPersistent_FAIL(self):
+        self.t.persistent()
+        self.assertRaises(IllegalAccessError, self.t.conj, 1)
+        self.assertRaises(IllegalAccessError, self.t.persistent)
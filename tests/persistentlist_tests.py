@@ -157,6 +157,14 @@ class TestPersistentList(unittest.TestCase):
         self.assertEqual(self.l2.hasheq(), seqHash(self.l2))
         self.assertEqual(self.l3.hasheq(), seqHash(self.l3))
         self.assertEqual(self.lR.hasheq(), seqHash(self.lR))
+    # hash(l), computed once, the same as an equal vector's
+    def test__hash___PASS(self):
+        self.assertEqual(hash(self.l3), seqHash(self.l3))
+        self.assertEqual(self.l3._hash, seqHash(self.l3))
+        l = pl.creator(0, 1, uobj)
+        self.assertEqual({self.l3: 1}[l], 1)
+        from clojure.lang.persistentvector import vec
+        self.assertEqual(hash(vec([0, 1, uobj])), hash(l))
     # (print s)
     def testWriteAsString_PASS(self):
         csio = StringIO()
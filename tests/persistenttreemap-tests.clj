@@ -38,3 +38,12 @@
 
 (deftest valat-tests
     (assertions/assert-equal (.valAt testmap "a") 1))
+
+(deftest chunked-seq-tests
+    (let [m (reduce #(.assoc %1 %2 %2) (PersistentTreeMap) (range 100))
+          s (.seq m)]
+        (assertions/assert-true (chunked-seq? s))
+        (assertions/assert-equal 32 (count (chunk-first s)))
+        (assertions/assert-equal (range 100) (map key s))
+        (assertions/assert-equal (range 99 -1 -1) (map key (.rseq m)))
+        (assertions/assert-equal 4950 (reduce1 + (map val s)))))
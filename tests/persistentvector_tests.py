@@ -8,9 +8,9 @@ import unittest
 from cStringIO import StringIO
 
 import clojure.lang.persistentvector as pv
-from clojure.lang.indexableseq import IndexableSeq
 from clojure.lang.cljexceptions import (IndexOutOfBoundsException,
-                                        IllegalStateException)
+                                        IllegalStateException,
+                                        IllegalAccessError)
 
 uobj = object()
 pseudoMetaData = object()
@@ -92,9 +92,23 @@ class TestPersistentVector(unittest.TestCase):
     # seq()
     def testSeq_PASS(self):
         s = self.v3.seq()
-        self.assertTrue(isinstance(s, IndexableSeq))
+        self.assertTrue(isinstance(s, pv.ChunkedSeq))
         self.assertEqual(len(s), 3)
         self.assertEqual(s.first(), "x")
+    # chunks are the 32 items leaf arrays of the vector
+    def testChunkedSeq_PASS(self):
+        v = pv.vec(range(70))
+        s = v.seq().next()
+        self.assertEqual(len(s), 69)
+        c = s.chunkedFirst()
+        self.assertEqual(len(c), 31)
+        self.assertEqual(c.nth(0), 1)
+        self.assertTrue(c.array is v._arrayFor(0))
+        s = s.chunkedNext().chunkedNext()
+        self.assertEqual(list(s), range(64, 70))
+        self.assertEqual(s.chunkedNext(), None)
+        self.assertEqual(len(s.chunkedMore()), 0)
+        self.assertEqual(s.withMeta(pseudoMetaData).meta(), pseudoMetaData)
     # very basic tests here, do the rest .clj tests
     # better (= v q)
     def test__eq___PASS(self):
@@ -107,6 +121,15 @@ class TestPersistentVector(unittest.TestCase):
         v = pv.vec([1, 2, 3])
         self.assertEqual(v.__hash__(), vecHash(v))
         self.assertEqual(pv.EMPTY.__hash__(), 1)
+    # the hash is computed once, kept by withMeta
+    def testHashCached_PASS(self):
+        v = pv.vec([1, 2, 3])
+        self.assertEqual(v._hash, -1)
+        h = hash(v)
+        self.assertEqual(v._hash, h)
+        self.assertEqual(v.withMeta(pseudoMetaData)._hash, h)
+        self.assertEqual(hash(v.cons(4)), vecHash([1, 2, 3, 4]))
+        self.assertEqual({v: 1}[pv.vec([1, 2, 3])], 1)
     # (print v)
     def testWriteAsString_PASS(self):
         csio = StringIO()
@@ -127,6 +150,63 @@ class TestPersistentVector(unittest.TestCase):
         self.assertTrue(re.match(regex, self.printV.__repr__()))
 
 
+    # fromList()
+    def testFromList_PASS(self):
+        for n in (0, 1, 32, 33, 1056, 1057, 32 * 32 * 32 + 33):
+            items = range(n)
+            v = pv.fromList(items)
+            t = pv.EMPTY.asTransient()
+            for i in items:
+                t.conj(i)
+            w = t.persistent()
+            self.assertEqual(list(v), items)
+            self.assertEqual((v._shift, v._tail), (w._shift, w._tail))
+            self.assertEqual(v, w)
+            if n:
+                self.assertEqual(v.assocN(n - 1, "x").cons("y").nth(n - 1),
+                                 "x")
+        items = [1, 2]
+        v = pv.fromList(items)
+        items.append(3)
+        self.assertEqual(len(v), 2)
+
+class TestTransientVector(unittest.TestCase):
+    # conj(), assocN(), pop() across tail and tree boundaries
+    def testOps_PASS(self):
+        for n in (0, 1, 31, 32, 33, 1024, 1057, 33000):
+            base = pv.vec(range(n))
+            t = base.asTransient()
+            model = range(n)
+            for i in range(100):
+                t.conj(-i)
+                model.append(-i)
+            for i in range(0, len(model), 7):
+                t.assocN(i, "x")
+                model[i] = "x"
+            for i in range(min(150, len(model))):
+                t.pop()
+                model.pop()
+            self.assertEqual(len(t), len(model))
+            self.assertEqual(list(t.persistent()), model)
+            self.assertEqual(list(base), range(n))
+    # nodes built by a transient are shared, not changed, by later ones
+    def testOwnership_PASS(self):
+        v = pv.vec(range(100))
+        w = v.asTransient().assocN(0, "a").conj("b").persistent()
+        w.asTransient().assocN(0, "c").assocN(99, "d").persistent()
+        self.assertEqual(w[0], "a")
+        self.assertEqual(w[99], 99)
+        self.assertEqual(v[0], 0)
+    # use after persistent(), popping an empty transient
+    def testTransient_FAIL(self):
+        t = pv.EMPTY.asTransient()
+        self.assertRaises(IllegalStateException, t.pop)
+        self.assertRaises(IndexOutOfBoundsException, t.assocN, 1, None)
+        t.persistent()
+        self.assertRaises(IllegalAccessError, t.conj, 1)
+        self.assertRaises(IllegalAccessError, len, t)
+
+
 testCreationMap_PASS = {
     # vec
     pv.vec([]): pv.EMPTY,
@@ -6,23 +6,31 @@
 Friday, March 16 2012
 """
 
+import gc
+import os
 import re
 import string
+import tempfile
 import unittest
+import weakref
+from cStringIO import StringIO
 
 from random import choice
 from fractions import Fraction
 from clojure.lang.lispreader import read, readDelimitedList
-from clojure.lang.symbol import Symbol
+from clojure.lang.symbol import Symbol, intern
 from clojure.lang.ipersistentlist import IPersistentList
 from clojure.lang.persistentlist import PersistentList
 from clojure.lang.persistentlist import EmptyList
 from clojure.lang.persistentvector import PersistentVector
 from clojure.lang.persistenthashmap import PersistentHashMap
 from clojure.lang.persistenthashset import PersistentHashSet
-from clojure.lang.fileseq import StringReader
+from clojure.lang.fileseq import (StringReader, BufferedReader,
+                                  MappedReader, openReader)
 from clojure.lang.cljexceptions import ReaderException
+from clojure.lang.cljkeyword import LINE_KEY
 from clojure.lang.pytypes import *
+import clojure.lang.rt as RT
 
 
 # reader returns this unique *value* if it's out of characters
@@ -130,6 +138,74 @@ class TestReader(unittest.TestCase):
         r = StringReader("")
         self.assertRaises(ReaderException, read, r, True, # <- True
                           EOF, False)
+    # line numbers and positions after whitespace, comments and strings
+    def testLineNumbers_PASS(self):
+        r = StringReader('; one\n  ;; two\n(a "b\nc\\n" d)\n\n(e)foo')
+        form = read(r, False, EOF, False)
+        self.assertEqual(form.meta()[LINE_KEY], 3)
+        self.assertEqual(form.next().first(), "b\nc\n")
+        self.assertEqual(read(r, False, EOF, False).meta()[LINE_KEY], 6)
+        self.assertEqual(r.lineCol()[0], 6)
+        self.assertEqual(read(r, False, EOF, False), Symbol("foo"))
+        self.assertTrue(read(r, False, EOF, False) is EOF)
+    # tokens and numbers ending at a delimiter or at the end of the input
+    def testTokenBoundaries_PASS(self):
+        for s, v in tokenBoundaries_PASS.items():
+            r = StringReader(s)
+            self.assertEqual(read(r, False, EOF, False), v)
+    # a file read in blocks reads as the same string in one piece
+    def testBufferedReader_PASS(self):
+        s = '; c\n(a "b\nc\\n" 12 [:d/e \\f])\n\n(g 1.5)foo'
+        expected = []
+        r = StringReader(s)
+        for i in range(4):
+            form = read(r, False, EOF, False)
+            expected.append((form, getattr(form, "meta", lambda: None)(),
+                             r.lineCol()))
+        for blocksize in (1, 2, 5, 1024):
+            r = BufferedReader(StringIO(s), blocksize)
+            for form, meta, lineCol in expected:
+                got = read(r, False, EOF, False)
+                self.assertEqual(got, form)
+                self.assertEqual(getattr(got, "meta", lambda: None)(), meta)
+                self.assertEqual(r.lineCol(), lineCol)
+            self.assertTrue(read(r, False, EOF, False) is EOF)
+    # files are memory-mapped, or read in blocks when they can't be
+    def testOpenReader_PASS(self):
+        fd, path = tempfile.mkstemp(suffix=".clj")
+        try:
+            os.write(fd, '(a "b\nc")\n[d]')
+            os.close(fd)
+            r = openReader(path)
+            self.assertTrue(isinstance(r, MappedReader))
+            self.assertEqual(read(r, False, EOF, False),
+                             RT.list(Symbol("a"), "b\nc"))
+            self.assertEqual(read(r, False, EOF, False),
+                             RT.vector(Symbol("d")))
+            self.assertEqual(r.lineCol()[0], 3)
+            self.assertTrue(read(r, False, EOF, False) is EOF)
+            r.close()
+            open(path, "w").close()
+            r = openReader(path)
+            self.assertTrue(isinstance(r, BufferedReader))
+            self.assertTrue(read(r, False, EOF, False) is EOF)
+            r.close()
+        finally:
+            os.remove(path)
+    # a symbol read many times is one object, kept only while in use
+    def testInternedSymbols_PASS(self):
+        form = read(StringReader("(foo/bar baz foo/bar [baz])"), False, EOF,
+                    False)
+        self.assertTrue(form.first() is form.next().next().first())
+        self.assertTrue(form.next().first() is
+                        form.next().next().next().first().nth(0))
+        self.assertTrue(form.first() is intern("foo", "bar"))
+        self.assertEqual(hash(form.first()), hash(Symbol("foo", "bar")))
+        sym = read(StringReader("interned-only-here"), False, EOF, False)
+        ref = weakref.ref(sym)
+        del sym
+        gc.collect()
+        self.assertTrue(ref() is None)
     # miscellaneous failures
     def testMiscellaneous_FAIL(self):
         for s in miscellaneous_FAIL:
@@ -615,6 +691,21 @@ returnedType_PASS = {
     "None" : Symbol,
     }
 
+# ======================================================================
+# Token Boundaries
+# ======================================================================
+
+tokenBoundaries_PASS = {
+    "foo" : Symbol("foo"),
+    "foo)" : Symbol("foo"),
+    "foo,bar" : Symbol("foo"),
+    "12" : 12,
+    "12]" : 12,
+    "-3.5 x" : -3.5,
+    "1/2;c" : Fraction(1, 2),
+    "  \t\n,nil" : None,
+    }
+
 # ======================================================================
 # Miscellaneous Failures
 # Any type of random failures should go here
@@ -626,4 +717,6 @@ miscellaneous_FAIL = [
     # deref not implemented (yet)
     # reader eval not implemented (yet)
     "#=foo",
+    # map literal with an odd number of forms
+    "{:a 1 :b}",
     ]
@@ -0,0 +1,75 @@
+"""server_tests.py
+
+Sunday, October 18 2026
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import clojure.main
+from clojure.server import makeServer, Client
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.server = makeServer(("127.0.0.1", 0))
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def connect(self):
+        client = Client(self.server.server_address)
+        self.clients.append(client)
+        return client
+
+    def testEval_PASS(self):
+        c = self.connect()
+        self.assertEqual(c.eval('(println "hi") (+ 1 2)'),
+                         ("ret", "user", "hi\n", "3"))
+        self.assertEqual(c.eval("").val, "nil")
+        self.assertEqual(c.eval('{:a [1 "b"]}').val, '{:a [1 "b"]}')
+        self.assertEqual(c.eval("(* 2 *2)").val, "6")
+
+    def testErrors_PASS(self):
+        c = self.connect()
+        reply = c.eval("(inc 1) (/ 1 0)")
+        self.assertEqual(reply.tag, "err")
+        self.assertTrue("ZeroDivisionError" in reply.val)
+        self.assertEqual(c.eval("(+ 1").tag, "err")
+        self.assertEqual(c.eval("(inc 1)").val, "2")
+
+    def testSessions_PASS(self):
+        a = self.connect()
+        b = self.connect()
+        self.assertEqual(a.eval("(ns servertest.a) (def x 1)").ns,
+                         "servertest.a")
+        self.assertEqual(a.eval("(inc x)").val, "2")
+        self.assertEqual(b.eval("(ns-name *ns*)").val, "user")
+        self.assertEqual(b.eval("servertest.a/x").val, "1")
+        a.eval("42")
+        self.assertEqual(b.eval("*1").val, "1")
+
+    def testUnixSocket_PASS(self):
+        d = tempfile.mkdtemp()
+        try:
+            server = makeServer(os.path.join(d, "eval.sock"))
+            thread = threading.Thread(target=server.serve_forever)
+            thread.daemon = True
+            thread.start()
+            client = Client(server.server_address)
+            self.assertEqual(client.eval("(str 1 2)").val, '"12"')
+            client.close()
+            server.shutdown()
+            server.server_close()
+        finally:
+            shutil.rmtree(d)
@@ -0,0 +1,49 @@
+"""var_tests.py
+
+Sunday, October 18 2026
+"""
+
+import unittest
+
+import clojure.main
+from clojure.lang.compiler import Compiler
+from clojure.lang.globals import currentCompiler
+from clojure.lang.lispreader import readString
+from clojure.lang.namespace import Namespace
+from clojure.lang.var import threadBindings
+
+
+def evalString(s):
+    comp = Compiler()
+    comp.setNS("tests.var-tests")
+    with threadBindings({currentCompiler: comp}):
+        return comp.executeCode(comp.compile(readString(s)))
+
+
+class TestLinking(unittest.TestCase):
+    def setUp(self):
+        evalString("(clojure.core/refer 'clojure.core)")
+        evalString("(defn ^:static g [x] (* x 10))")
+        evalString("(defn f [x] (+ (g x) 1))")
+        evalString("(defn h [x] (fn [y] (g (+ x y))))")
+        self.ns = Namespace("tests.var-tests")
+
+    def testRedefinition_PASS(self):
+        f = self.ns.f.deref()
+        self.assertEqual(f(1), 11)
+        self.assertTrue(f in self.ns.g.dependents)
+        evalString("(defn ^:static g [x] (* x 100))")
+        self.assertEqual(f(1), 101)
+        self.assertEqual(self.ns.h.deref()(1)(1), 200)
+
+    def testAlterRoot_PASS(self):
+        f = self.ns.f.deref()
+        self.ns.g.alterRoot(lambda old: lambda x: old(x) + 5, None)
+        self.assertEqual(f(1), 16)
+
+    def testScalarsUnlinked_PASS(self):
+        evalString("(def ^:static c 1)")
+        evalString("(defn k [] [c 1])")
+        self.assertEqual(self.ns.c.dependents, None)
+        self.ns.c.bindRoot(2)
+        self.assertEqual(list(self.ns.k.deref()()), [1, 1])
@@ -0,0 +1,68 @@
+"""workerpool_tests.py
+
+Sunday, October 18 2026
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import clojure.main
+from clojure.lang.cljexceptions import IllegalArgumentException
+from clojure.lang.cljkeyword import Keyword
+import clojure.lang.rt as RT
+from clojure.lang.symbol import Symbol
+from clojure.lang.workerpool import WorkerPool
+
+
+SOURCES = {
+    "wptest_work": "(ns wptest_work)\n"
+                   "(defn square [x] (* x x))\n"
+                   "(defn tally [m k] (assoc m k (inc (get m k 0))))\n"
+                   "(defn pid [] (.getpid (py/__import__ \"os\")))\n"
+                   "(defn fail [] (throw (py/ValueError \"no\")))\n",
+    "wptest_late": "(ns wptest_late)\n"
+                   "(defn twice [x] (* 2 x))\n",
+    }
+
+
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for name, source in SOURCES.items():
+            with open(os.path.join(self.dir, name + ".clj"), "w") as fl:
+                fl.write(source)
+        sys.path.insert(0, self.dir)
+        self.pool = WorkerPool(2, ["wptest_work"])
+
+    def tearDown(self):
+        self.pool.terminate()
+        sys.path.remove(self.dir)
+        shutil.rmtree(self.dir)
+        for name in SOURCES:
+            sys.modules.pop(name, None)
+
+    def testApply_PASS(self):
+        ns = sys.modules["wptest_work"]
+        self.assertEqual(self.pool.apply(ns.square, 7), 49)
+        self.assertEqual(self.pool.map(ns.square, range(5)), [0, 1, 4, 9, 16])
+        self.assertEqual(self.pool.apply(ns.tally, RT.map(Keyword("a"), 1),
+                                         Keyword("a")),
+                         RT.map(Keyword("a"), 2))
+        self.assertNotEqual(self.pool.apply(ns.pid), os.getpid())
+
+    def testNames_PASS(self):
+        self.assertEqual(self.pool.apply(Symbol("wptest_work", "square"), 3),
+                         9)
+        self.assertFalse("wptest_late" in sys.modules)
+        self.assertEqual(self.pool.apply(Symbol("wptest_late", "twice"), 3),
+                         6)
+        self.assertRaises(IllegalArgumentException, self.pool.apply,
+                          Symbol("square"), 3)
+
+    def testErrors_PASS(self):
+        ns = sys.modules["wptest_work"]
+        self.assertRaises(ValueError, self.pool.apply, ns.fail)
+        self.assertEqual(self.pool.apply(ns.square, 2), 4)